@@ -1,4 +1,316 @@
+"""
+HTTP ingest server of the pager.
+
+    python app.py --policy policy.json [--host 0.0.0.0] [--port 8080] [--wal DIR]
+
+The policy file is JSON or YAML (see policy_store), reloaded on SIGHUP.
+
+    POST /alerts            {"service": name}, or a JSON array of them; answers with the id of the
+                            service's open alert, {"result": "opened", "alert": id}
+    POST /acknowledgements  {"service": name}, acknowledges the service's open alert,
+                            or {"alert": id}, acknowledges that alert only if it is still open
+    POST /healthy           {"service": name}
+    PUT  /policy            {service name: [[target, ...] per level]}, targets as "email:address" or "sms:number",
+                            timeouts as in models.policy_entry
+    GET  /metrics           Prometheus text
+
+HTTP/1.1 with keep-alive and pipelining: a connection may send requests without waiting
+for the responses, which come back in request order. Events from every connection are
+handed to PagerService.receive_alerts in batches.
+"""
+import argparse
+import asyncio
+import json
+import logging
+import signal
+from typing import Dict, List, Optional, Tuple, Union
+
+from models import MonitoredService, PagerService, load_policy
+from policy_store import PolicyStore
+from wal import WriteAheadLog
+
+logger = logging.getLogger(__name__)
+
+EVENT_PATHS = {'/alerts': 'alert', '/acknowledgements': 'ack', '/healthy': 'healthy'}
+REASONS = {200: 'OK', 207: 'Multi-Status', 400: 'Bad Request', 404: 'Not Found', 405: 'Method Not Allowed', 413: 'Payload Too Large', 422: 'Unprocessable Entity'}
+
+
+class HTTPError(Exception):
+    def __init__(self, status: int, message: str):
+        super().__init__(message)
+        self.status = status
+
+
+class IngestServer:
+    """
+    Serves the pager over HTTP/1.1 on an asyncio event loop.
+
+    Events are collected from every connection and applied together with one
+    receive_alerts call: the batch is flushed once batch_size events are waiting, or
+    batch_interval seconds after its first event (on the next loop iteration by default,
+    which still gathers everything read in the current one, e.g. a pipelined burst).
+    receive_alerts runs on the loop thread, so targets should deliver through a
+    dispatcher.NotificationDispatcher rather than block.
+    """
+
+    MAX_BODY = 1 << 20
+
+    def __init__(self, pager_service: PagerService, batch_size: int = 1024, batch_interval: float = 0.0, ack_delay: Optional[float] = None):
+        self.pager_service = pager_service
+        self.batch_size = batch_size
+        self.batch_interval = batch_interval
+        self.ack_delay = ack_delay
+        self.services = _PolicyServices(pager_service)
+        self._batch: List[Tuple[str, Union[MonitoredService, int], asyncio.Future]] = [] # service, or alert id of an ack
+        self._flush_handle: Optional[asyncio.Handle] = None
+        self._connections: Dict[asyncio.Task, asyncio.StreamWriter] = {}
+        self.server: Optional[asyncio.AbstractServer] = None
+
+    async def start(self, host: str = '127.0.0.1', port: int = 8080) -> asyncio.AbstractServer:
+        self.server = await asyncio.start_server(self._serve, host, port)
+        return self.server
+
+    async def close(self):
+        if self.server is not None:
+            self.server.close()
+            await self.server.wait_closed()
+        self._flush()
+        # closing the transports ends each connection's read loop after its pending responses
+        for writer in list(self._connections.values()):
+            writer.close()
+        await asyncio.gather(*self._connections, return_exceptions=True)
+
+    async def _serve(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        # requests are read and submitted without waiting for earlier responses (pipelining);
+        # the sender writes the responses back in order as they complete
+        responses: asyncio.Queue = asyncio.Queue()
+        sender = asyncio.ensure_future(self._send(responses, writer))
+        self._connections[asyncio.current_task()] = writer
+        try:
+            while True:
+                try:
+                    request = await self._read_request(reader)
+                except HTTPError as error:
+                    responses.put_nowait((self._done(error.status, {'error': str(error)}), False))
+                    break
+                if request is None:
+                    break
+                method, path, headers, body = request
+                keep_alive = headers.get('connection', '').lower() != 'close'
+                responses.put_nowait((self._handle(method, path, body), keep_alive))
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            responses.put_nowait(None)
+            await sender
+            writer.close()
+            self._connections.pop(asyncio.current_task(), None)
+
+    async def _send(self, responses: asyncio.Queue, writer: asyncio.StreamWriter):
+        try:
+            while True:
+                item = await responses.get()
+                if item is None:
+                    return
+                future, keep_alive = item
+                status, content_type, body = await future
+                writer.write(
+                    f'HTTP/1.1 {status} {REASONS.get(status, "")}\r\n'
+                    f'Content-Type: {content_type}\r\n'
+                    f'Content-Length: {len(body)}\r\n'
+                    f'Connection: {"keep-alive" if keep_alive else "close"}\r\n\r\n'.encode('latin-1') + body
+                )
+                if responses.empty():
+                    await writer.drain()
+                if not keep_alive:
+                    return
+        except ConnectionError:
+            pass
+
+    async def _read_request(self, reader: asyncio.StreamReader) -> Optional[tuple]:
+        try:
+            head = await reader.readuntil(b'\r\n\r\n')
+        except asyncio.IncompleteReadError as error:
+            if error.partial.strip():
+                raise HTTPError(400, 'Incomplete request')
+            return None
+        except asyncio.LimitOverrunError:
+            raise HTTPError(413, 'Request head too large')
+        lines = head.decode('latin-1').split('\r\n')
+        try:
+            method, path, _ = lines[0].split(' ', 2)
+        except ValueError:
+            raise HTTPError(400, 'Malformed request line')
+        headers = {}
+        for line in lines[1:]:
+            if line:
+                name, _, value = line.partition(':')
+                headers[name.strip().lower()] = value.strip()
+        try:
+            length = int(headers.get('content-length', 0))
+        except ValueError:
+            raise HTTPError(400, 'Malformed Content-Length')
+        if length > self.MAX_BODY:
+            raise HTTPError(413, 'Request body too large')
+        body = await reader.readexactly(length) if length else b''
+        return method, path, headers, body
+
+    def _handle(self, method: str, path: str, body: bytes) -> asyncio.Future:
+        try:
+            if path in EVENT_PATHS:
+                if method != 'POST':
+                    raise HTTPError(405, f'{path} only accepts POST')
+                return self._submit(EVENT_PATHS[path], self._decode(body))
+            if path == '/policy':
+                if method != 'PUT':
+                    raise HTTPError(405, '/policy only accepts PUT')
+                return self._update_policy(self._decode(body))
+            if path == '/metrics':
+                if method != 'GET':
+                    raise HTTPError(405, '/metrics only accepts GET')
+                metrics = self.pager_service.metrics.to_prometheus().encode()
+                return self._done(200, metrics, 'text/plain; version=0.0.4')
+            raise HTTPError(404, f'No such endpoint: {path}')
+        except HTTPError as error:
+            return self._done(error.status, {'error': str(error)})
+
+    def _decode(self, body: bytes):
+        try:
+            return json.loads(body)
+        except ValueError:
+            raise HTTPError(400, 'Body is not valid JSON')
+
+    def _submit(self, kind: str, document) -> asyncio.Future:
+        items = document if isinstance(document, list) else [document]
+        futures = []
+        for item in items:
+            alert_id = item.get('alert') if kind == 'ack' and isinstance(item, dict) else None
+            if type(alert_id) is int:
+                future = asyncio.get_running_loop().create_future()
+                self._batch.append((kind, alert_id, future))
+                futures.append(future)
+                continue
+            name = item.get('service') if isinstance(item, dict) else None
+            if not isinstance(name, str):
+                futures.append(self._done(400, {'error': 'Events need a "service" name, or an "alert" id to acknowledge'}))
+                continue
+            service = self.services.get(name)
+            if service is None:
+                futures.append(self._done(404, {'error': f'No escalation policy for {name}'}))
+                continue
+            future = asyncio.get_running_loop().create_future()
+            self._batch.append((kind, service, future))
+            futures.append(future)
+        self._schedule_flush()
+        if not isinstance(document, list):
+            return futures[0]
+        return asyncio.ensure_future(self._gather(futures))
+
+    async def _gather(self, futures: List[asyncio.Future]):
+        results = await asyncio.gather(*futures)
+        status = 200 if all(status == 200 for status, _, _ in results) else 207
+        return status, 'application/json', b'[' + b','.join(body for _, _, body in results) + b']'
+
+    def _schedule_flush(self):
+        if len(self._batch) >= self.batch_size:
+            self._flush()
+        elif self._batch and self._flush_handle is None:
+            loop = asyncio.get_running_loop()
+            if self.batch_interval > 0:
+                self._flush_handle = loop.call_later(self.batch_interval, self._flush)
+            else:
+                self._flush_handle = loop.call_soon(self._flush)
+
+    def _flush(self):
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+        batch, self._batch = self._batch, []
+        if not batch:
+            return
+        results = self.pager_service.receive_events(
+            [(kind, key if isinstance(key, int) else key.service_name) for kind, key, _ in batch], self.ack_delay
+        )
+        for (kind, key, future), result in zip(batch, results):
+            if isinstance(result, Exception):
+                future.set_result(self._response(422, {'error': str(result)}))
+            elif kind == 'alert':
+                # the id to acknowledge by, unless the alert was folded into an acknowledged one
+                alert = self.pager_service.alerts.get(key)
+                body = {'result': result, 'alert': alert.alert_id} if alert is not None else {'result': result}
+                future.set_result(self._response(200, body))
+            else:
+                future.set_result(self._response(200, {'result': result}))
+
+    def _update_policy(self, document) -> asyncio.Future:
+        try:
+            escalation_policy = load_policy(document, self.services)
+            self.pager_service.update_escalation_policy(escalation_policy)
+        except ValueError as error:
+            return self._done(400, {'error': str(error)})
+        return self._done(200, {'services': len(escalation_policy.policies)})
+
+    @staticmethod
+    def _response(status: int, body, content_type: str = 'application/json') -> tuple:
+        return status, content_type, body if isinstance(body, bytes) else json.dumps(body).encode()
+
+    def _done(self, status: int, body, content_type: str = 'application/json') -> asyncio.Future:
+        future = asyncio.get_running_loop().create_future()
+        future.set_result(self._response(status, body, content_type))
+        return future
+
+
+class _PolicyServices:
+    # { service name: MonitoredService } of the pager's current policy, looked up on demand
+    # so a policy mapped from a snapshot is not decoded whole when the server starts
+    def __init__(self, pager_service: PagerService):
+        self.pager_service = pager_service
+
+    def get(self, name: str) -> Optional[MonitoredService]:
+        policy = self.pager_service.escalation_policy.policies.get(name)
+        return policy.monitored_service if policy is not None else None
+
+
 def main():
-    print("Nothing to see here")
+    parser = argparse.ArgumentParser(description='Pager ingest server')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8080)
+    parser.add_argument('--policy', help='JSON or YAML escalation policy, {service: [[target, ...] per level]}')
+    parser.add_argument('--wal', help='write-ahead log directory; open alerts are recovered from it on start')
+    parser.add_argument('--batch-size', type=int, default=1024)
+    parser.add_argument('--batch-interval', type=float, default=0.0)
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO)
+
+    store = PolicyStore(args.policy) if args.policy else None
+    wal = WriteAheadLog(args.wal) if args.wal else None
+    pager_service = PagerService(store.load() if store is not None else load_policy({}, {}), wal=wal)
+    if wal is not None:
+        pager_service.recover()
+
+    def reload():
+        try:
+            diff = store.reload(pager_service)
+        except (OSError, ValueError) as error:
+            logger.error('Policy reload failed, keeping the current policy: %s', error)
+            return
+        logger.info('Policy reloaded: %d added, %d changed, %d removed', len(diff.added), len(diff.changed), len(diff.removed))
+
+    async def serve():
+        server = IngestServer(pager_service, args.batch_size, args.batch_interval)
+        if store is not None:
+            asyncio.get_running_loop().add_signal_handler(signal.SIGHUP, reload)
+        await server.start(args.host, args.port)
+        logger.info('Pager listening on %s:%d', args.host, args.port)
+        await server.server.serve_forever()
+
+    try:
+        asyncio.run(serve())
+    except KeyboardInterrupt:
+        pass
+
 
-main()
\ No newline at end of file
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,135 @@
+import asyncio
+import inspect
+import logging
+from typing import Optional
+
+from models import Alert, EscalationPolicy, MonitoredService, Target
+from notification_log import NotificationLog
+from policy import DEFAULT_ACK_TIMEOUT
+from templates import MessageRenderer
+
+logger = logging.getLogger(__name__)
+
+
+class AsyncPagerService:
+    """
+    asyncio counterpart of models.PagerService.
+
+    Every transition runs on the event loop thread, so the alerts dict needs no locking,
+    acknowledgement delays are loop.call_at handles instead of threads, and the targets
+    of a level are notified concurrently. Target.notify may return a plain value or an awaitable.
+    """
+
+    def __init__(self, escalation_policy: EscalationPolicy, log_capacity: int = 100_000, renderer: Optional[MessageRenderer] = None):
+        self.escalation_policy: EscalationPolicy = escalation_policy
+        self.compiled_policy = escalation_policy.compile()
+        self.alerts: dict = {} # { MonitoredService: Alert }
+        self.alert_ids: dict = {} # { alert_id: Alert }, the same open alerts
+        self.alerts_log: NotificationLog = NotificationLog(log_capacity)
+        self.timers: dict = {} # { Alert: (asyncio.TimerHandle, seconds) }
+        self.renderer: MessageRenderer = renderer if renderer is not None else MessageRenderer()
+        self._tasks = set()
+
+    async def receive_alert(self, alert: Alert, seconds: Optional[float] = None):
+        if alert.monitored_service in self.alerts:
+            raise Exception('Alert already exists')
+        self.alerts[alert.monitored_service] = alert
+        self.alert_ids[alert.alert_id] = alert
+        alert.monitored_service.set_unhealthy()
+        # arm before notifying so an acknowledgement received meanwhile finds the timer
+        self._set_timer(alert, seconds)
+        await self._send_to_targets(alert)
+
+    async def handle_acknowledgement(self, alert: Alert):
+        alert.acknowledge()
+        self._close(alert)
+
+    async def acknowledge(self, alert_id: int) -> Optional[Alert]:
+        # the open alert with this id, acknowledged, or None when there is none
+        alert = self.alert_ids.get(alert_id)
+        if alert is not None:
+            await self.handle_acknowledgement(alert)
+        return alert
+
+    async def handle_healthy(self, monitored_service: MonitoredService):
+        monitored_service.set_healthy()
+        alert = self.alerts.get(monitored_service)
+        if alert is not None:
+            self._close(alert)
+
+    async def handle_acknowledgement_timeout(self, alert: Alert):
+        if alert.acknowledged:
+            self._close(alert)
+            raise Exception('Alert already acknowledged')
+        if alert.monitored_service.healthy:
+            self._close(alert)
+            raise Exception('Service is healthy')
+        if self.alerts.get(alert.monitored_service) is not alert:
+            # resolved once its timeout task was already created, perhaps with a newer alert open
+            self._cancel_timer(alert)
+            raise Exception('Alert is no longer open')
+        if alert.current_level + 1 >= self._escalation_levels_count(alert):
+            self._cancel_timer(alert)
+            # TODO: future work, this is the extreme case, we should notify the service owner
+            raise Exception('No more escalation levels')
+        alert.escalate()
+        seconds = self.timers[alert][1] if alert in self.timers else None
+        self._set_timer(alert, seconds)
+        await self._send_to_targets(alert)
+
+    async def _send_to_targets(self, alert: Alert):
+        compiled_policy = self.compiled_policy
+        service_id, level = alert.monitored_service.service_id, alert.current_level
+        targets = compiled_policy.targets(service_id, level)
+        if targets is None:
+            raise Exception('No escalation policy for this level')
+        render = self.renderer.render
+        await asyncio.gather(*(
+            self._notify(target, render(service_id, level, target.transport), service_id, level, target_id)
+            for target, target_id in zip(targets, compiled_policy.target_ids(service_id, level))
+        ))
+
+    async def _notify(self, target: Target, message: str, service_id: int, level: int, target_id: int):
+        result = target.notify(message)
+        if inspect.isawaitable(result):
+            await result
+        self.alerts_log.append(service_id, level, target_id)
+
+    def _escalation_levels_count(self, alert: Alert) -> int:
+        return self.compiled_policy.level_count(alert.monitored_service.service_id)
+
+    def _set_timer(self, alert: Alert, seconds: Optional[float] = None):
+        # without seconds the current level's own timeout from the policy applies
+        timeout = seconds or self.compiled_policy.timeout(alert.monitored_service.service_id, alert.current_level) or DEFAULT_ACK_TIMEOUT
+        self._cancel_timer(alert)
+        loop = asyncio.get_running_loop()
+        handle = loop.call_at(loop.time() + timeout, self._handle_timeout, alert)
+        self.timers[alert] = (handle, seconds)
+
+    def _cancel_timer(self, alert: Alert):
+        if alert in self.timers:
+            self.timers.pop(alert)[0].cancel()
+
+    def _close(self, alert: Alert):
+        self._cancel_timer(alert)
+        if self.alerts.get(alert.monitored_service) is alert:
+            del self.alerts[alert.monitored_service]
+            del self.alert_ids[alert.alert_id]
+
+    def _handle_timeout(self, alert: Alert):
+        task = asyncio.get_running_loop().create_task(self.handle_acknowledgement_timeout(alert))
+        self._tasks.add(task)
+        task.add_done_callback(self._timeout_done)
+
+    def _timeout_done(self, task: asyncio.Task):
+        self._tasks.discard(task)
+        if not task.cancelled() and task.exception() is not None:
+            logger.info('Acknowledgement timeout: %s', task.exception())
+
+    def __str__(self):
+        return (
+            f"Alerts: {self.alerts}\n"
+            f"Alerts log: {self.alerts_log}\n"
+            f"Escalation policy: {self.escalation_policy}\n"
+            f"Timers: {self.timers}"
+        )
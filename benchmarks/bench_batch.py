@@ -0,0 +1,68 @@
+"""
+Batch ingestion (PagerService.receive_alerts) versus one receive_alert call per alert.
+
+    python -m benchmarks.bench_batch [--sizes 10000 100000]
+"""
+import argparse
+import gc
+import time
+
+from models import SMS, AcknowledgementEvent, Alert, Email, EscalationPolicy, EscalationPolicyLevel, EscalationPolicyMonitoredService, MonitoredService, PagerService
+
+
+def build(count: int):
+    services = [MonitoredService(f'service #{i}') for i in range(count)]
+    escalation_policy = EscalationPolicy({
+        service.service_name: EscalationPolicyMonitoredService(
+            service,
+            [EscalationPolicyLevel([SMS('900100200'), Email('oncall@example.com')])]
+        )
+        for service in services
+    })
+    return services, PagerService(escalation_policy)
+
+
+def per_call(count: int) -> float:
+    services, pager_service = build(count)
+    alerts = [Alert(service) for service in services]
+    gc.collect()
+    start = time.perf_counter()
+    for alert in alerts:
+        pager_service.receive_alert(alert, 3600)
+    for alert in alerts[::2]:
+        pager_service.handle_acknowledgement(alert)
+    elapsed = time.perf_counter() - start
+    pager_service.timer_manager.scheduler.close()
+    return elapsed
+
+
+def batched(count: int) -> float:
+    services, pager_service = build(count)
+    alerts = [Alert(service) for service in services]
+    events = alerts + [AcknowledgementEvent(alert) for alert in alerts[::2]]
+    gc.collect()
+    start = time.perf_counter()
+    pager_service.receive_alerts(events, 3600)
+    elapsed = time.perf_counter() - start
+    pager_service.timer_manager.scheduler.close()
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10_000, 100_000])
+    args = parser.parse_args()
+
+    print(f'{"alerts":>8} {"events":>8} {"per-call s":>11} {"batch s":>9} {"batch events/s":>15} {"speedup":>8}')
+    for count in args.sizes:
+        events = count + count // 2
+        per_call_seconds = per_call(count)
+        batch_seconds = batched(count)
+        print(
+            f'{count:>8} {events:>8} {per_call_seconds:>11.3f} {batch_seconds:>9.3f} '
+            f'{events / batch_seconds:>15,.0f} {per_call_seconds / batch_seconds:>7.2f}x'
+        )
+
+
+if __name__ == '__main__':
+    main()
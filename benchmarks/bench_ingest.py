@@ -0,0 +1,108 @@
+"""
+Load test of the HTTP ingest server (app.py): sustained events/s and request latency.
+
+The server runs in its own process pinned to one core; the client keeps --connections
+keep-alive connections busy, each with --pipeline requests in flight, for --seconds.
+
+    python -m benchmarks.bench_ingest [--connections 8] [--pipeline 32] [--seconds 10] [--services 1000]
+"""
+import argparse
+import asyncio
+import json
+import multiprocessing
+import os
+import random
+import time
+from collections import deque
+
+from app import IngestServer, load_policy
+from models import PagerService
+
+
+def serve(port: int, services: int, ready):
+    if hasattr(os, 'sched_setaffinity'):
+        os.sched_setaffinity(0, {0})
+    document = {f'service #{i}': [['sms:900100200'], ['email:oncall@example.com']] for i in range(services)}
+
+    async def run():
+        server = IngestServer(PagerService(load_policy(document, {})))
+        await server.start('127.0.0.1', port)
+        ready.set()
+        await server.server.serve_forever()
+
+    asyncio.run(run())
+
+
+def encode(path: str, service: str) -> bytes:
+    body = json.dumps({'service': service}).encode()
+    return f'POST {path} HTTP/1.1\r\nHost: pager\r\nContent-Length: {len(body)}\r\n\r\n'.encode() + body
+
+
+async def connection(port: int, services: int, pipeline: int, deadline: float, latencies: list, seed: int) -> int:
+    rng = random.Random(seed)
+    reader, writer = await asyncio.open_connection('127.0.0.1', port)
+    sent_at = deque()
+
+    def send():
+        service = f'service #{rng.randrange(services)}'
+        path = rng.choice(('/alerts', '/alerts', '/acknowledgements', '/healthy'))
+        sent_at.append(time.perf_counter())
+        writer.write(encode(path, service))
+
+    for _ in range(pipeline):
+        send()
+    completed = 0
+    while sent_at:
+        head = await reader.readuntil(b'\r\n\r\n')
+        length = int(head.split(b'Content-Length: ', 1)[1].split(b'\r\n', 1)[0])
+        await reader.readexactly(length)
+        latencies.append(time.perf_counter() - sent_at.popleft())
+        completed += 1
+        if time.perf_counter() < deadline:
+            send()
+    writer.close()
+    return completed
+
+
+async def load(port: int, args) -> tuple:
+    latencies = []
+    start = time.perf_counter()
+    deadline = start + args.seconds
+    completed = await asyncio.gather(*(
+        connection(port, args.services, args.pipeline, deadline, latencies, seed) for seed in range(args.connections)
+    ))
+    return sum(completed), time.perf_counter() - start, sorted(latencies)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--connections', type=int, default=8)
+    parser.add_argument('--pipeline', type=int, default=32)
+    parser.add_argument('--seconds', type=float, default=10)
+    parser.add_argument('--services', type=int, default=1_000)
+    parser.add_argument('--port', type=int, default=18080)
+    args = parser.parse_args()
+
+    ready = multiprocessing.Event()
+    server = multiprocessing.Process(target=serve, args=(args.port, args.services, ready), daemon=True)
+    server.start()
+    if not ready.wait(30):
+        raise SystemExit('Server did not start')
+    if hasattr(os, 'sched_setaffinity') and len(os.sched_getaffinity(0)) > 1:
+        os.sched_setaffinity(0, os.sched_getaffinity(0) - {0})
+    try:
+        events, elapsed, latencies = asyncio.run(load(args.port, args))
+    finally:
+        server.terminate()
+        server.join()
+
+    def percentile(p):
+        return latencies[min(len(latencies) - 1, len(latencies) * p // 100)] * 1e3
+
+    print(f'{args.connections} connections x {args.pipeline} pipelined requests, server on one core')
+    print(f'{events} events in {elapsed:.1f}s: {events / elapsed:,.0f} events/s')
+    print(f'latency p50 {percentile(50):.2f} ms, p99 {percentile(99):.2f} ms')
+
+
+if __name__ == '__main__':
+    main()
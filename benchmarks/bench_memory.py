@@ -0,0 +1,55 @@
+"""
+Bytes per open alert, measured with tracemalloc: the Alert and MonitoredService objects alone,
+then everything a PagerService holds for an open alert (registry entry, timer, suppressor state).
+
+    python -m benchmarks.bench_memory [--alerts 100000]
+"""
+import argparse
+import gc
+import tracemalloc
+
+from models import SMS, Alert, EscalationPolicy, EscalationPolicyLevel, EscalationPolicyMonitoredService, MonitoredService, PagerService
+
+
+def traced(build) -> tuple:
+    # (bytes allocated by build() and still held, its result)
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    result = build()
+    gc.collect()
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return after - before, result
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--alerts', type=int, default=100_000)
+    args = parser.parse_args()
+    count = args.alerts
+
+    names = [f'service #{i}' for i in range(count)]
+    for name in names:
+        MonitoredService(name) # interns the names outside of the measurement
+    service_bytes, services = traced(lambda: [MonitoredService(name) for name in names])
+    alert_bytes, alerts = traced(lambda: [Alert(service) for service in services])
+    # the lists holding the objects are not part of their cost
+    list_bytes = traced(lambda: [None] * count)[0]
+    print(f'MonitoredService: {(service_bytes - list_bytes) / count:>7.1f} bytes')
+    print(f'Alert:            {(alert_bytes - list_bytes) / count:>7.1f} bytes')
+
+    pager_service = PagerService(EscalationPolicy({
+        service.service_name: EscalationPolicyMonitoredService(service, [EscalationPolicyLevel([SMS('900100200')])])
+        for service in services
+    }), log_capacity=1)
+    del alerts
+    alerts = [Alert(service) for service in services]
+    opened_bytes, _ = traced(lambda: pager_service.receive_alerts(alerts, 3600))
+    print(f'Open alert in a PagerService, Alert excluded: {(opened_bytes - list_bytes) / count:>7.1f} bytes')
+    print(f'Total per open alert: {(service_bytes + alert_bytes + opened_bytes - 3 * list_bytes) / count:>7.1f} bytes')
+    pager_service.timer_manager.scheduler.close()
+
+
+if __name__ == '__main__':
+    main()
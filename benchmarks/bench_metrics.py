@@ -0,0 +1,70 @@
+"""
+Instrumentation overhead on the ingest path: receive_alert plus acknowledgement of every
+other alert, with the built-in metrics enabled and with a disabled registry.
+
+    python -m benchmarks.bench_metrics [--alerts 50000] [--chunk 500]
+"""
+import argparse
+import gc
+import time
+import timeit
+
+from metrics import MetricsRegistry
+from models import SMS, Alert, Email, EscalationPolicy, EscalationPolicyLevel, EscalationPolicyMonitoredService, MonitoredService, PagerService
+
+
+def build(count: int, metrics: MetricsRegistry):
+    services = [MonitoredService(f'service #{i}') for i in range(count)]
+    escalation_policy = EscalationPolicy({
+        service.service_name: EscalationPolicyMonitoredService(
+            service,
+            [EscalationPolicyLevel([SMS('900100200'), Email('oncall@example.com')])]
+        )
+        for service in services
+    })
+    return PagerService(escalation_policy, metrics=metrics), [Alert(service) for service in services]
+
+
+def ingest(pager_service: PagerService, alerts) -> float:
+    start = time.perf_counter()
+    for alert in alerts:
+        pager_service.receive_alert(alert, 3600)
+    for alert in alerts[::2]:
+        pager_service.handle_acknowledgement(alert)
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--alerts', type=int, default=50_000)
+    parser.add_argument('--chunk', type=int, default=500)
+    args = parser.parse_args()
+
+    disabled_service, disabled_alerts = build(args.alerts, MetricsRegistry(enabled=False))
+    enabled_service, enabled_alerts = build(args.alerts, MetricsRegistry())
+    # the two services take turns on small chunks, so drift in machine load hits both alike
+    off = on = 0.0
+    gc.collect()
+    gc.disable()
+    for start in range(0, args.alerts, args.chunk):
+        off += ingest(disabled_service, disabled_alerts[start:start + args.chunk])
+        on += ingest(enabled_service, enabled_alerts[start:start + args.chunk])
+    gc.enable()
+    for pager_service in (disabled_service, enabled_service):
+        pager_service.timer_manager.scheduler.close()
+
+    print(f'{"metrics":>9} {"seconds":>8} {"alerts/s":>10}')
+    print(f'{"disabled":>9} {off:>8.3f} {args.alerts / off:>10,.0f}')
+    print(f'{"enabled":>9} {on:>8.3f} {args.alerts / on:>10,.0f}')
+    print(f'overhead: {(on - off) / off:+.1%}')
+
+    registry = MetricsRegistry()
+    counter = registry.counter('bench_total')
+    histogram = registry.histogram('bench_seconds')
+    calls = 1_000_000
+    print(f'Counter.inc: {timeit.timeit(counter.inc, number=calls) / calls * 1e9:.0f} ns, '
+          f'Histogram.observe: {timeit.timeit(lambda: histogram.observe(1e-5), number=calls) / calls * 1e9:.0f} ns')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,71 @@
+"""
+Escalation target lookups per second: nested dict/list walk versus the compiled policy,
+the best of --repeat rounds each.
+
+    python -m benchmarks.bench_policy [--services 1000] [--levels 5] [--lookups 1000000] [--repeat 5]
+"""
+import argparse
+import random
+import time
+
+from models import SMS, Email, EscalationPolicy, EscalationPolicyLevel, EscalationPolicyMonitoredService, MonitoredService
+
+
+def build_policy(services: int, levels: int) -> EscalationPolicy:
+    policies = {}
+    for i in range(services):
+        service = MonitoredService(f'service #{i}')
+        policies[service.service_name] = EscalationPolicyMonitoredService(
+            service,
+            [EscalationPolicyLevel([SMS(f'900{i:06d}'), Email(f'oncall-{level}@example.com')]) for level in range(levels)]
+        )
+    return EscalationPolicy(policies)
+
+
+def best_of(run, repeat: int) -> float:
+    # the shortest round, the others being slowed down by whatever else the machine was doing
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        run()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--services', type=int, default=1_000)
+    parser.add_argument('--levels', type=int, default=5)
+    parser.add_argument('--lookups', type=int, default=1_000_000)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    escalation_policy = build_policy(args.services, args.levels)
+    start = time.perf_counter()
+    compiled = escalation_policy.compile()
+    compile_seconds = time.perf_counter() - start
+
+    services = [policy.monitored_service for policy in escalation_policy.policies.values()]
+    rng = random.Random(42)
+    keys = [(rng.choice(services), rng.randrange(args.levels)) for _ in range(args.lookups)]
+
+    def nested():
+        for service, level in keys:
+            escalation_policy.policies[service.service_name].levels[level].targets
+            len(escalation_policy.policies[service.service_name].levels)
+
+    def compiled_lookups():
+        for service, level in keys:
+            compiled.targets(service.service_id, level)
+            compiled.level_count(service.service_id)
+
+    nested_seconds = best_of(nested, args.repeat)
+    compiled_seconds = best_of(compiled_lookups, args.repeat)
+
+    print(f'compile {args.services} services x {args.levels} levels: {compile_seconds * 1e3:.1f} ms')
+    print(f'nested lookups/sec:   {args.lookups / nested_seconds:>12,.0f}')
+    print(f'compiled lookups/sec: {args.lookups / compiled_seconds:>12,.0f}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,83 @@
+"""
+Cold load and reload of a large escalation policy: JSON parsed into objects and compiled
+versus the memory-mapped snapshot of policy_store.
+
+    python -m benchmarks.bench_policy_store [--services 50000] [--changed 10]
+"""
+import argparse
+import json
+import os
+import random
+import tempfile
+import time
+
+from models import PagerService, load_policy
+from policy_store import PolicyStore, write_snapshot
+
+
+def build_document(services: int, generation: int = 0) -> dict:
+    return {
+        f'service #{i}': {
+            'timeout': 300,
+            'levels': [[f'sms:900{i:06d}'], [f'email:team-{i % 500}@example.com', f'sms:800{generation:06d}'], ['email:incident@example.com']],
+        }
+        for i in range(services)
+    }
+
+
+def timed(function):
+    start = time.perf_counter()
+    result = function()
+    return time.perf_counter() - start, result
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--services', type=int, default=50_000)
+    parser.add_argument('--changed', type=int, default=10)
+    parser.add_argument('--lookups', type=int, default=1_000)
+    args = parser.parse_args()
+
+    document = build_document(args.services)
+    rng = random.Random(42)
+    names = rng.sample(list(document), args.lookups)
+    with tempfile.TemporaryDirectory() as directory:
+        source_path = os.path.join(directory, 'policy.json')
+        with open(source_path, 'w', encoding='utf-8') as source:
+            json.dump(document, source)
+
+        def objects():
+            with open(source_path, encoding='utf-8') as source:
+                escalation_policy = load_policy(json.load(source), {})
+            escalation_policy.compile()
+            return escalation_policy
+        objects_seconds, escalation_policy = timed(objects)
+
+        store = PolicyStore(source_path)
+        compile_seconds, _ = timed(lambda: write_snapshot(document, store.snapshot_path))
+        load_seconds, snapshot_policy = timed(store.load)
+        compiled = snapshot_policy.compile()
+        lookup_seconds, _ = timed(lambda: [compiled.targets(snapshot_policy.policies[name].monitored_service.service_id, 1) for name in names])
+        warm_seconds, _ = timed(lambda: [compiled.targets(snapshot_policy.policies[name].monitored_service.service_id, 1) for name in names])
+
+        pager_service = PagerService(snapshot_policy)
+        for name in rng.sample(list(document), args.changed):
+            document[name]['levels'][0] = ['sms:900999999']
+        with open(source_path, 'w', encoding='utf-8') as source:
+            json.dump(document, source)
+        reload_seconds, diff = timed(lambda: store.reload(pager_service))
+        full_reload_seconds, _ = timed(lambda: pager_service.update_escalation_policy(objects()))
+        pager_service.timer_manager.scheduler.close()
+
+        print(f'{args.services} services, snapshot {os.path.getsize(store.snapshot_path) / 1e6:.1f} MB, source {os.path.getsize(source_path) / 1e6:.1f} MB')
+        print(f'cold load, JSON into objects + compile: {objects_seconds * 1e3:>9.1f} ms')
+        print(f'compile source into snapshot:           {compile_seconds * 1e3:>9.1f} ms')
+        print(f'cold load, map snapshot:                {load_seconds * 1e3:>9.3f} ms')
+        print(f'first {args.lookups} lookups (decode):          {lookup_seconds * 1e3:>9.1f} ms')
+        print(f'next {args.lookups} lookups:                    {warm_seconds * 1e3:>9.1f} ms')
+        print(f'reload, {len(diff.changed)} services changed:          {reload_seconds * 1e3:>9.1f} ms')
+        print(f'reload, rebuild whole policy:           {full_reload_seconds * 1e3:>9.1f} ms')
+
+
+if __name__ == '__main__':
+    main()
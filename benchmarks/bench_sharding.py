@@ -0,0 +1,62 @@
+"""
+Throughput of ShardedPagerService at 1, 2, 4 and 8 shards against a single in-process PagerService.
+
+    python -m benchmarks.bench_sharding [--shards 1 2 4 8] [--services 10000] [--events 200000] [--batch 5000]
+"""
+import argparse
+import os
+import random
+import time
+
+from models import SMS, Email, EscalationPolicy, EscalationPolicyLevel, EscalationPolicyMonitoredService, MonitoredService, PagerService
+from sharding import ShardedPagerService
+
+
+def build_policy(services: int) -> EscalationPolicy:
+    return EscalationPolicy({
+        f'service #{i}': EscalationPolicyMonitoredService(
+            MonitoredService(f'service #{i}'),
+            [EscalationPolicyLevel([SMS('900100200'), Email('oncall@example.com')]), EscalationPolicyLevel([Email('lead@example.com')])]
+        )
+        for i in range(services)
+    })
+
+
+def build_events(services: int, count: int, seed: int = 7) -> list:
+    rng = random.Random(seed)
+    kinds = ('alert', 'alert', 'ack', 'healthy')
+    return [(rng.choice(kinds), f'service #{rng.randrange(services)}') for _ in range(count)]
+
+
+def run(receive_events, events: list, batch: int) -> float:
+    start = time.perf_counter()
+    for offset in range(0, len(events), batch):
+        receive_events(events[offset:offset + batch])
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--shards', type=int, nargs='+', default=[1, 2, 4, 8])
+    parser.add_argument('--services', type=int, default=10_000)
+    parser.add_argument('--events', type=int, default=200_000)
+    parser.add_argument('--batch', type=int, default=5_000)
+    args = parser.parse_args()
+
+    events = build_events(args.services, args.events)
+    print(f'{os.cpu_count()} cores, {args.events} events over {args.services} services, batches of {args.batch}')
+    print(f'{"shards":>10} {"seconds":>8} {"events/s":>10} {"speedup":>8}')
+
+    pager_service = PagerService(build_policy(args.services))
+    baseline = run(lambda batch: pager_service.receive_events(batch, 3600), events, args.batch)
+    pager_service.timer_manager.scheduler.close()
+    print(f'{"in-process":>10} {baseline:>8.3f} {args.events / baseline:>10,.0f} {1:>7.2f}x')
+
+    for shards in args.shards:
+        with ShardedPagerService(build_policy(args.services), shards=shards, ack_delay=3600) as pager:
+            elapsed = run(pager.receive_events, events, args.batch)
+        print(f'{shards:>10} {elapsed:>8.3f} {args.events / elapsed:>10,.0f} {baseline / elapsed:>7.2f}x')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,61 @@
+"""
+Replays a day of synthetic alert traffic through EscalationSimulator and reports how long it takes.
+
+    python -m benchmarks.bench_simulation [--services 1000] [--alerts 50000] [--seed 7]
+"""
+import argparse
+import random
+import time
+
+from models import SMS, Email, EscalationPolicy, EscalationPolicyLevel, EscalationPolicyMonitoredService, MonitoredService
+from simulation import EscalationSimulator, TrafficEvent
+
+DAY = 24 * 3600
+
+
+def synthetic_day(services: int, alerts: int, seed: int):
+    rng = random.Random(seed)
+    traffic = []
+    for _ in range(alerts):
+        offset = rng.uniform(0, DAY)
+        service = f'service #{rng.randrange(services)}'
+        traffic.append(TrafficEvent(offset, 'alert', service))
+        outcome = rng.random()
+        if outcome < 0.6:
+            traffic.append(TrafficEvent(offset + rng.expovariate(1 / 600), 'ack', service))
+        elif outcome < 0.9:
+            traffic.append(TrafficEvent(offset + rng.expovariate(1 / 1200), 'healthy', service))
+    traffic.sort(key=lambda event: event.offset)
+    return traffic
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--services', type=int, default=1_000)
+    parser.add_argument('--alerts', type=int, default=50_000)
+    parser.add_argument('--seed', type=int, default=7)
+    args = parser.parse_args()
+
+    services = [MonitoredService(f'service #{i}') for i in range(args.services)]
+    escalation_policy = EscalationPolicy({
+        service.service_name: EscalationPolicyMonitoredService(
+            service,
+            [
+                EscalationPolicyLevel([SMS('900100200')]),
+                EscalationPolicyLevel([Email('oncall@example.com'), SMS('900300400')])
+            ]
+        )
+        for service in services
+    })
+    traffic = synthetic_day(args.services, args.alerts, args.seed)
+
+    simulator = EscalationSimulator(escalation_policy)
+    start = time.perf_counter()
+    report = simulator.run(traffic)
+    elapsed = time.perf_counter() - start
+    print(report)
+    print(f'{len(traffic)} events, 24h of traffic replayed in {elapsed:.2f}s ({len(traffic) / elapsed:,.0f} events/s)')
+
+
+if __name__ == '__main__':
+    main()
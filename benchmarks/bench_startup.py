@@ -0,0 +1,80 @@
+"""
+Start-up time of the command-line tools against the full service, as wall time of a fresh
+interpreter and as the import time reported by python -X importtime.
+
+    python -m benchmarks.bench_startup [--runs 10]
+"""
+import argparse
+import json
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def serve_acknowledgements(listener: socket.socket):
+    # stands in for app.py: answers every request with 200 and closes
+    while True:
+        try:
+            connection, _ = listener.accept()
+        except OSError:
+            return
+        with connection:
+            connection.recv(65536)
+            connection.sendall(b'HTTP/1.1 200 OK\r\nContent-Length: 17\r\nConnection: close\r\n\r\n{"result": "ok"}\n')
+
+
+def import_seconds(command: list) -> float:
+    # sum of the cumulative times of the top-level imports
+    stderr = subprocess.run([sys.executable, '-X', 'importtime'] + command, cwd=ROOT, capture_output=True, text=True).stderr
+    total = 0
+    for line in stderr.splitlines():
+        if line.startswith('import time:') and not line.split('|')[2].startswith('  '):
+            try:
+                total += int(line.split('|')[1])
+            except ValueError:
+                pass # the header line
+    return total / 1e6
+
+
+def wall_seconds(command: list, runs: int) -> float:
+    samples = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        subprocess.run([sys.executable] + command, cwd=ROOT, stdout=subprocess.DEVNULL, check=True)
+        samples.append(time.perf_counter() - start)
+    return statistics.median(samples)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--runs', type=int, default=10)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        policy_path = os.path.join(directory, 'policy.json')
+        with open(policy_path, 'w', encoding='utf-8') as policy:
+            json.dump({f'service #{i}': [[f'sms:900{i:06d}'], [f'email:oncall-{i % 10}@example.com']] for i in range(100)}, policy)
+        listener = socket.create_server(('127.0.0.1', 0))
+        threading.Thread(target=serve_acknowledgements, args=(listener,), daemon=True).start()
+        commands = {
+            'python -c pass': ['-c', 'pass'],
+            'cli.py validate (100 services)': ['cli.py', 'validate', policy_path],
+            'cli.py ack': ['cli.py', 'ack', 'service #1', '--port', str(listener.getsockname()[1])],
+            'from models import PagerService': ['-c', 'from models import PagerService'],
+            'import app': ['-c', 'import app'],
+        }
+        print(f'{"":34} {"wall (median)":>14} {"imports":>10}')
+        for name, command in commands.items():
+            print(f'{name:34} {wall_seconds(command, args.runs) * 1e3:>11.1f} ms {import_seconds(command) * 1e3:>7.1f} ms')
+        listener.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,48 @@
+"""
+Notification fan-out to one level of many Email and SMS targets: a message formatted per target,
+then wrapped per target as notify() used to, versus the template cache, which renders it once
+per (service, level, channel) and hands the same string to every target.
+
+    python -m benchmarks.bench_templates [--targets 1000] [--escalations 1000]
+"""
+import argparse
+import time
+
+from models import SMS, Alert, Email, EscalationPolicy, EscalationPolicyLevel, EscalationPolicyMonitoredService, MonitoredService, PagerService
+from templates import DEFAULT_TEMPLATES, MessageRenderer
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--targets', type=int, default=1_000)
+    parser.add_argument('--escalations', type=int, default=1_000)
+    args = parser.parse_args()
+
+    service = MonitoredService('checkout-api')
+    targets = [SMS(f'900{i:06d}') if i % 2 else Email(f'oncall-{i}@example.com') for i in range(args.targets)]
+    pager_service = PagerService(EscalationPolicy(
+        {service.service_name: EscalationPolicyMonitoredService(service, [EscalationPolicyLevel(targets)])}
+    ), renderer=MessageRenderer())
+    alert = Alert(service)
+    notifications = args.targets * args.escalations
+
+    start = time.perf_counter()
+    for _ in range(args.escalations):
+        for target in targets:
+            target.describe(DEFAULT_TEMPLATES[target.transport].format(service=service.service_name, level=alert.current_level))
+    per_target_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for _ in range(args.escalations):
+        pager_service._notify_targets(alert)
+    cached_seconds = time.perf_counter() - start
+    pager_service.timer_manager.scheduler.close()
+
+    print(f'fan-out to {args.targets} targets x {args.escalations} escalations')
+    print(f'formatted per target: {notifications / per_target_seconds:>12,.0f} notifications/sec')
+    print(f'template cache:       {notifications / cached_seconds:>12,.0f} notifications/sec')
+    print(f'cache hits {pager_service.renderer.hits}, misses {pager_service.renderer.misses}')
+
+
+if __name__ == '__main__':
+    main()
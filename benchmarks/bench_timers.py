@@ -0,0 +1,72 @@
+"""
+Compares the thread-per-timer backend with the single-thread heap scheduler.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_timers [--sizes 1000 10000 100000] [--max-threads 10000]
+"""
+import argparse
+import threading
+import time
+
+from scheduler import HeapScheduler, ThreadingTimerScheduler
+
+HOUR = 3600.0
+
+
+def rss_kib() -> int:
+    with open('/proc/self/status') as status:
+        for line in status:
+            if line.startswith('VmRSS:'):
+                return int(line.split()[1])
+    return 0
+
+
+def noop(_):
+    pass
+
+
+def run(backend_name: str, scheduler, count: int):
+    rss_before = rss_kib()
+    threads_before = threading.active_count()
+
+    start = time.perf_counter()
+    timers = [scheduler.schedule(HOUR, noop, i) for i in range(count)]
+    arm_seconds = time.perf_counter() - start
+
+    rss_delta = rss_kib() - rss_before
+    threads = threading.active_count() - threads_before
+
+    start = time.perf_counter()
+    for timer in timers:
+        scheduler.cancel(timer)
+    cancel_seconds = time.perf_counter() - start
+    scheduler.close()
+
+    print(
+        f'{backend_name:<10} {count:>8} '
+        f'{arm_seconds / count * 1e6:>10.2f} {cancel_seconds / count * 1e6:>12.2f} '
+        f'{rss_delta / 1024:>10.1f} {threads:>8}'
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1_000, 10_000, 100_000])
+    parser.add_argument('--max-threads', type=int, default=10_000,
+                        help='skip the threading backend above this many timers')
+    args = parser.parse_args()
+
+    print(f'{"backend":<10} {"timers":>8} {"arm us/op":>10} {"cancel us/op":>12} {"RSS MiB":>10} {"threads":>8}')
+    for count in args.sizes:
+        if count <= args.max_threads:
+            run('threading', ThreadingTimerScheduler(), count)
+            # let the cancelled timer threads exit before measuring the next backend
+            time.sleep(0.5)
+        else:
+            print(f'{"threading":<10} {count:>8} {"skipped (--max-threads)":>44}')
+        run('heap', HeapScheduler(), count)
+
+
+if __name__ == '__main__':
+    main()
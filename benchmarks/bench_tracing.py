@@ -0,0 +1,78 @@
+"""
+Lifecycle tracing overhead on the escalation path (receive, one escalation, acknowledge) with
+tracing off, sampled and on, then the cost of rebuilding one incident: the tracer's per-alert
+timeline versus a scan of the notification log.
+
+    python -m benchmarks.bench_tracing [--alerts 50000] [--services 1000] [--sample-rate 0.1]
+"""
+import argparse
+import time
+
+from clock import VirtualClock
+from models import Alert, EscalationPolicy, EscalationPolicyLevel, EscalationPolicyMonitoredService, MonitoredService, PagerService, Target
+from scheduler import SimulatedScheduler
+from suppression import AlertSuppressor
+from tracing import Tracer
+
+
+class Inbox(Target):
+    transport = 'sms'
+
+    def notify(self, message: str):
+        pass
+
+
+def run(alerts: int, services: int, sample_rate: float):
+    clock = VirtualClock()
+    scheduler = SimulatedScheduler(clock)
+    monitored = [MonitoredService(f'service-{i}') for i in range(services)]
+    escalation_policy = EscalationPolicy({
+        service.service_name: EscalationPolicyMonitoredService(
+            service, [EscalationPolicyLevel([Inbox(), Inbox()]), EscalationPolicyLevel([Inbox()])], timeout=60
+        )
+        for service in monitored
+    })
+    tracer = Tracer(capacity=8 * alerts, sample_rate=sample_rate, time_fn=clock.time)
+    # every round opens new alerts: no dedup window, no flap hold-back
+    suppressor = AlertSuppressor(dedup_window=0.0, flap_threshold=alerts, time_fn=clock.monotonic)
+    pager_service = PagerService(escalation_policy, log_capacity=4 * alerts, suppressor=suppressor, clock=clock, scheduler=scheduler, tracer=tracer)
+
+    start = time.perf_counter()
+    for i in range(0, alerts, services):
+        opened = [pager_service.receive_alert(Alert(service, clock)) for service in monitored[:alerts - i]]
+        scheduler.advance(60)
+        for alert in opened:
+            pager_service.handle_acknowledgement(alert)
+    seconds = time.perf_counter() - start
+    return pager_service, opened[-1], seconds
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--alerts', type=int, default=50_000)
+    parser.add_argument('--services', type=int, default=1_000)
+    parser.add_argument('--sample-rate', type=float, default=0.1)
+    args = parser.parse_args()
+
+    print(f'{args.alerts} alerts over {args.services} services, each paged, escalated once and acknowledged')
+    for label, sample_rate in (('tracing off', 0.0), (f'sampled {args.sample_rate:g}', args.sample_rate), ('tracing on', 1.0)):
+        pager_service, alert, seconds = run(args.alerts, args.services, sample_rate)
+        print(f'{label:<14} {args.alerts / seconds:>10,.0f} alerts/sec, {pager_service.tracer.total:>8} spans')
+
+    lookups = 1_000
+    start = time.perf_counter()
+    for _ in range(lookups):
+        timeline = pager_service.tracer.timeline(alert.alert_id)
+    timeline_seconds = (time.perf_counter() - start) / lookups
+    service_id = alert.monitored_service.service_id
+    start = time.perf_counter()
+    for _ in range(10):
+        # the log only knows services and times: the last incident is whatever came after its page
+        records = [record for record in pager_service.alerts_log if record.service_id == service_id]
+    scan_seconds = (time.perf_counter() - start) / 10
+    print(f'one incident: timeline {timeline_seconds * 1e6:,.1f} us ({len(timeline)} spans), '
+          f'notification log scan {scan_seconds * 1e3:,.1f} ms ({len(records)} records of the service)')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,50 @@
+"""
+Write-ahead log ingest throughput (group commit) and recovery time.
+
+    python -m benchmarks.bench_wal [--records 1000000] [--services 300000]
+"""
+import argparse
+import tempfile
+import time
+
+from models import SMS, EscalationPolicy, EscalationPolicyLevel, EscalationPolicyMonitoredService, MonitoredService, PagerService
+from wal import WriteAheadLog
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--records', type=int, default=1_000_000)
+    parser.add_argument('--services', type=int, default=300_000)
+    args = parser.parse_args()
+
+    services = [MonitoredService(f'service #{i}') for i in range(args.services)]
+    escalation_policy = EscalationPolicy({
+        service.service_name: EscalationPolicyMonitoredService(service, [EscalationPolicyLevel([SMS('900100200')])])
+        for service in services
+    })
+
+    with tempfile.TemporaryDirectory() as directory:
+        # snapshot_every above the record count: recovery has to replay the whole log
+        wal = WriteAheadLog(directory, snapshot_every=args.records + 1)
+        now = time.time()
+        start = time.perf_counter()
+        for i in range(args.records):
+            service = services[i % args.services]
+            # odd passes over the services acknowledge what the even passes opened
+            op = 'alert' if (i // args.services) % 2 == 0 else 'ack'
+            wal.append({'op': op, 'service': service.service_name, 'level': 0, 'sent_at': now, 'deadline': now + 900})
+        wal.close()
+        ingest_seconds = time.perf_counter() - start
+
+        recovered = PagerService(escalation_policy, wal=WriteAheadLog(directory, snapshot_every=args.records + 1))
+        start = time.perf_counter()
+        recovered.recover()
+        recovery_seconds = time.perf_counter() - start
+        recovered.wal.close()
+
+    print(f'ingest:   {args.records:,} records in {ingest_seconds:.2f} s ({args.records / ingest_seconds:,.0f} records/s)')
+    print(f'recovery: {args.records:,} records in {recovery_seconds:.2f} s, {len(recovered.alerts):,} open alerts re-armed')
+
+
+if __name__ == '__main__':
+    main()
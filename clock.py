@@ -0,0 +1,62 @@
+import datetime
+import threading
+import time
+from abc import ABC, abstractmethod
+
+
+class Clock(ABC):
+    @abstractmethod
+    def time(self) -> float:
+        # wall-clock time, epoch seconds
+        pass
+
+    @abstractmethod
+    def monotonic(self) -> float:
+        pass
+
+    def now(self) -> datetime.datetime:
+        return datetime.datetime.fromtimestamp(self.time())
+
+
+class SystemClock(Clock):
+    def time(self) -> float:
+        return time.time()
+
+    def monotonic(self) -> float:
+        return time.monotonic()
+
+    def now(self) -> datetime.datetime:
+        return datetime.datetime.now()
+
+
+class VirtualClock(Clock):
+    """
+    A clock that only moves when told to. Wall time starts at start_time and monotonic
+    time at 0; both advance together.
+    """
+
+    def __init__(self, start_time: float = 0.0):
+        self.start_time = start_time
+        self._elapsed = 0.0
+        self._lock = threading.Lock()
+
+    def time(self) -> float:
+        return self.start_time + self._elapsed
+
+    def monotonic(self) -> float:
+        return self._elapsed
+
+    def advance(self, seconds: float):
+        if seconds < 0:
+            raise ValueError('A clock cannot go backwards')
+        with self._lock:
+            self._elapsed += seconds
+
+    def set_monotonic(self, elapsed: float):
+        with self._lock:
+            if elapsed < self._elapsed:
+                raise ValueError('A clock cannot go backwards')
+            self._elapsed = elapsed
+
+
+SYSTEM_CLOCK = SystemClock()
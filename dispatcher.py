@@ -0,0 +1,200 @@
+import logging
+import queue
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import deque
+from typing import Callable, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class Transport(ABC):
+    @abstractmethod
+    def send(self, destination: str, messages: List[str]):
+      pass
+
+
+class SMTPTransport(Transport):
+    def __init__(self, host: str, port: int, sender: str, subject: str = 'Pager notification'):
+        self.host = host
+        self.port = port
+        self.sender = sender
+        self.subject = subject
+
+    def send(self, destination: str, messages: List[str]):
+        # smtplib and the email package are loaded on the first delivery, not at import
+        import smtplib
+        from email.message import EmailMessage
+        # every message coalesced for this address during the tick goes in one email
+        email = EmailMessage()
+        email['From'] = self.sender
+        email['To'] = destination
+        email['Subject'] = self.subject if len(messages) == 1 else f'{self.subject} ({len(messages)} alerts)'
+        email.set_content('\n'.join(messages))
+        with smtplib.SMTP(self.host, self.port) as client:
+            client.send_message(email)
+
+
+class TokenBucket:
+    def __init__(self, rate: float, burst: Optional[float] = None, time_fn: Callable[[], float] = time.monotonic):
+        self.rate = rate
+        self.capacity = burst if burst is not None else max(rate, 1.0)
+        self._time = time_fn
+        self._tokens = self.capacity
+        self._updated = time_fn()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        while True:
+            with self._lock:
+                now = self._time()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait = (1 - self._tokens) / self.rate
+            time.sleep(wait)
+
+
+class Channel:
+    """
+    Delivery pipeline of one transport: pending messages coalesced per destination,
+    a bounded queue of per-destination batches and a pool of worker threads draining it.
+    """
+
+    LATENCY_SAMPLES = 10_000
+
+    def __init__(self, name: str, transport: Transport, workers: int, queue_size: int, rate_limit: Optional[float]):
+        self.name = name
+        self.transport = transport
+        self.rate_limiter = TokenBucket(rate_limit) if rate_limit else None
+        self.max_pending = queue_size
+        self.pending: Dict[str, List[Tuple[str, float]]] = {}
+        self.queue: queue.Queue = queue.Queue(maxsize=queue_size)
+        self.latencies = deque(maxlen=self.LATENCY_SAMPLES)
+        self.sent = 0
+        self.dropped = 0
+        self.failed = 0
+        self._lock = threading.Lock()
+        self._workers = [
+            threading.Thread(target=self._work, name=f'{name}-worker-{i}', daemon=True)
+            for i in range(workers)
+        ]
+        for worker in self._workers:
+            worker.start()
+
+    def submit(self, destination: str, message: str) -> bool:
+        with self._lock:
+            batch = self.pending.get(destination)
+            if batch is not None:
+                batch.append((message, time.monotonic()))
+                return True
+            if len(self.pending) >= self.max_pending:
+                self.dropped += 1
+                return False
+            self.pending[destination] = [(message, time.monotonic())]
+            return True
+
+    def flush(self):
+        with self._lock:
+            pending, self.pending = self.pending, {}
+        for batch in pending.items():
+            # blocks the ticker, never the escalation path, when the workers fall behind
+            self.queue.put(batch)
+
+    def close(self):
+        for _ in self._workers:
+            self.queue.put(None)
+
+    def _work(self):
+        while True:
+            batch = self.queue.get()
+            try:
+                if batch is None:
+                    return
+                self._deliver(*batch)
+            finally:
+                self.queue.task_done()
+
+    def _deliver(self, destination: str, messages: List[Tuple[str, float]]):
+        if self.rate_limiter is not None:
+            self.rate_limiter.acquire()
+        try:
+            self.transport.send(destination, [message for message, _ in messages])
+        except Exception:
+            # workers of the channel update its counters concurrently
+            with self._lock:
+                self.failed += len(messages)
+            logger.exception('%s delivery to %s failed', self.name, destination)
+            return
+        delivered_at = time.monotonic()
+        latencies = [delivered_at - submitted_at for _, submitted_at in messages]
+        with self._lock:
+            self.sent += len(messages)
+            self.latencies.extend(latencies)
+
+
+class NotificationDispatcher:
+    """
+    Fans notifications out to per-transport worker pools so one slow gateway can't stall the others.
+
+    Messages are coalesced per destination for one tick, so each address receives a single
+    delivery per tick however many alerts notified it. Submitting never blocks: when a
+    transport already has queue_size destinations pending the message is dropped and counted.
+    """
+
+    def __init__(self, tick: float = 1.0):
+        self.tick = tick
+        self.channels: Dict[str, Channel] = {}
+        self._stopped = threading.Event()
+        self._ticker = threading.Thread(target=self._run, name='NotificationDispatcher', daemon=True)
+        self._ticker.start()
+
+    def register(self, name: str, transport: Transport, workers: int = 4, queue_size: int = 10_000, rate_limit: Optional[float] = None):
+        self.channels[name] = Channel(name, transport, workers, queue_size, rate_limit)
+
+    def handles(self, target) -> bool:
+        return getattr(target, 'transport', None) in self.channels
+
+    def submit(self, target, message: str) -> bool:
+        return self.channels[target.transport].submit(target.destination, message)
+
+    def flush(self, wait: bool = False):
+        for channel in self.channels.values():
+            channel.flush()
+        if wait:
+            for channel in self.channels.values():
+                channel.queue.join()
+
+    def latency_percentiles(self, name: str, percentiles=(50, 90, 99)) -> Dict[int, float]:
+        channel = self.channels[name]
+        with channel._lock:
+            samples = sorted(channel.latencies)
+        if not samples:
+            return {p: 0.0 for p in percentiles}
+        return {p: samples[min(len(samples) - 1, len(samples) * p // 100)] for p in percentiles}
+
+    def stats(self) -> Dict[str, dict]:
+        return {
+            name: {
+                'pending': len(channel.pending),
+                'queued': channel.queue.qsize(),
+                'sent': channel.sent,
+                'dropped': channel.dropped,
+                'failed': channel.failed,
+                'latency': self.latency_percentiles(name),
+            }
+            for name, channel in self.channels.items()
+        }
+
+    def close(self):
+        self._stopped.set()
+        self.flush(wait=True)
+        for channel in self.channels.values():
+            channel.close()
+
+    def _run(self):
+        while not self._stopped.wait(self.tick):
+            self.flush()
@@ -1,13 +1,239 @@
+import bisect
+import itertools
+import logging
+import threading
+import time
+from collections import deque
+from typing import Callable, Dict, Hashable, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# what emit does when a topic's queue is full
+BLOCK = 'block' # wait for a worker to make room
+DROP_OLDEST = 'drop_oldest' # discard the oldest queued event
+COALESCE = 'coalesce' # replace a queued event with the same key, otherwise block
+BACKPRESSURE_POLICIES = (BLOCK, DROP_OLDEST, COALESCE)
+
+
+class Topic:
+    """
+    Listeners, queue and counters of one event type.
+    """
+
+    LATENCY_SAMPLES = 10_000
+
+    def __init__(self, name: str, capacity: int, backpressure: str, key: Optional[Callable[[object], Hashable]]):
+        self.name = name
+        self.listeners: List[tuple] = [] # (-priority, registration order, listener), replaced on every change
+        self.capacity = capacity
+        self.backpressure = backpressure
+        self.key = key if key is not None else (lambda event: event)
+        self.queue: deque = deque() # [event, emitted at, key] slots
+        self.queued: Dict[Hashable, list] = {} # { key: slot }, only for COALESCE
+        self.latencies = deque(maxlen=self.LATENCY_SAMPLES) # seconds from emit to the last listener returning
+        self.emitted = 0
+        self.dispatched = 0
+        self.dropped = 0
+        self.coalesced = 0
+        self.errors = 0
+        self.max_depth = 0
+
+
 class EventEmitter:
-    def __init__(self):
-        self._listeners = {}
-
-    def on(self, event_type, listener):
-        if event_type not in self._listeners:
-            self._listeners[event_type] = []
-        self._listeners[event_type].append(listener)
-
-    def emit(self, event_type, event):
-        if event_type in self._listeners:
-            for listener in self._listeners[event_type]:
-                listener(event)
\ No newline at end of file
+    """
+    Publishes events to the listeners of their type, highest priority first.
+
+    With workers=0 (the default) listeners run on the emitting thread, as they always did.
+    With a worker pool every event type gets a bounded queue of capacity events, drained by
+    the workers, so a slow listener no longer holds up the emitter (e.g. the timer thread);
+    backpressure decides what emit does when a queue is full. Either way a failing listener
+    is logged and counted and the remaining listeners still run.
+    """
+
+    def __init__(self, workers: int = 0, capacity: int = 10_000, backpressure: str = BLOCK):
+        if backpressure not in BACKPRESSURE_POLICIES:
+            raise ValueError(f'Unknown backpressure policy: {backpressure}')
+        self.capacity = capacity
+        self.backpressure = backpressure
+        self._topics: Dict[str, Topic] = {}
+        self._order = itertools.count()
+        self._lock = threading.Lock()
+        self._queued = threading.Condition(self._lock) # an event was queued, or closing
+        self._room = threading.Condition(self._lock) # an event left a queue
+        self._idle = threading.Condition(self._lock) # queues empty and no dispatch in flight
+        self._in_flight = 0
+        self._cursor = 0
+        self._closed = False
+        self._workers = [
+            threading.Thread(target=self._work, name=f'EventEmitter-worker-{i}', daemon=True)
+            for i in range(workers)
+        ]
+        self._worker_ids = set()
+        for worker in self._workers:
+            worker.start()
+            self._worker_ids.add(worker.ident)
+
+    def configure(self, event_type: str, capacity: Optional[int] = None, backpressure: Optional[str] = None,
+                  key: Optional[Callable[[object], Hashable]] = None) -> Topic:
+        """
+        Overrides the queue capacity and backpressure policy of one event type. key maps an
+        event to what COALESCE compares, the event itself by default.
+        """
+        if backpressure is not None and backpressure not in BACKPRESSURE_POLICIES:
+            raise ValueError(f'Unknown backpressure policy: {backpressure}')
+        with self._lock:
+            topic = self._topic(event_type)
+            if capacity is not None:
+                topic.capacity = capacity
+            if backpressure is not None:
+                topic.backpressure = backpressure
+            if key is not None:
+                topic.key = key
+            return topic
+
+    def on(self, event_type: str, listener: Callable[[object], None], priority: int = 0):
+        with self._lock:
+            topic = self._topic(event_type)
+            listeners = list(topic.listeners)
+            # registration order breaks ties, so listeners themselves are never compared
+            bisect.insort(listeners, (-priority, next(self._order), listener))
+            topic.listeners = listeners
+
+    def off(self, event_type: str, listener: Callable[[object], None]):
+        with self._lock:
+            topic = self._topics.get(event_type)
+            if topic is not None:
+                topic.listeners = [entry for entry in topic.listeners if entry[2] != listener]
+
+    def emit(self, event_type: str, event):
+        topic = self._topics.get(event_type)
+        if topic is None:
+            return
+        emitted_at = time.perf_counter()
+        if not self._workers or threading.get_ident() in self._worker_ids:
+            # synchronous emitter, or a listener emitting from a worker: dispatching in place
+            # keeps a worker from waiting on a queue only workers can drain
+            with self._lock:
+                topic.emitted += 1
+            self._dispatch(topic, event, emitted_at)
+            return
+        with self._lock:
+            if self._closed:
+                raise RuntimeError('EventEmitter is closed')
+            topic.emitted += 1
+            key = topic.key(event) if topic.backpressure == COALESCE else None
+            while True:
+                if key is not None:
+                    slot = topic.queued.get(key)
+                    if slot is not None:
+                        slot[0] = event
+                        topic.coalesced += 1
+                        return
+                if len(topic.queue) < topic.capacity:
+                    break
+                if topic.backpressure == DROP_OLDEST:
+                    topic.queue.popleft()
+                    topic.dropped += 1
+                else:
+                    self._room.wait()
+            slot = [event, emitted_at, key]
+            topic.queue.append(slot)
+            if key is not None:
+                topic.queued[key] = slot
+            topic.max_depth = max(topic.max_depth, len(topic.queue))
+            self._queued.notify()
+
+    def depth(self, event_type: str) -> int:
+        topic = self._topics.get(event_type)
+        return len(topic.queue) if topic is not None else 0
+
+    def latency_percentiles(self, event_type: str, percentiles=(50, 90, 99)) -> Dict[int, float]:
+        samples = sorted(self._topics[event_type].latencies)
+        if not samples:
+            return {p: 0.0 for p in percentiles}
+        return {p: samples[min(len(samples) - 1, len(samples) * p // 100)] for p in percentiles}
+
+    def stats(self) -> Dict[str, dict]:
+        return {
+            name: {
+                'depth': len(topic.queue),
+                'max_depth': topic.max_depth,
+                'emitted': topic.emitted,
+                'dispatched': topic.dispatched,
+                'dropped': topic.dropped,
+                'coalesced': topic.coalesced,
+                'errors': topic.errors,
+                'latency': self.latency_percentiles(name),
+            }
+            for name, topic in list(self._topics.items())
+        }
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """
+        Waits until every queued event has been dispatched. Returns False on timeout.
+        """
+        with self._lock:
+            return self._idle.wait_for(self._drained, timeout)
+
+    def close(self):
+        # workers drain the queues before they exit
+        with self._lock:
+            self._closed = True
+            self._queued.notify_all()
+        for worker in self._workers:
+            worker.join()
+
+    def _topic(self, event_type: str) -> Topic:
+        topic = self._topics.get(event_type)
+        if topic is None:
+            topic = self._topics[event_type] = Topic(event_type, self.capacity, self.backpressure, None)
+        return topic
+
+    def _drained(self) -> bool:
+        return self._in_flight == 0 and not any(topic.queue for topic in self._topics.values())
+
+    def _next_queued(self) -> Optional[Topic]:
+        # round-robin over the topics so a busy one can't starve the others
+        topics = list(self._topics.values())
+        for i in range(len(topics)):
+            topic = topics[(self._cursor + i) % len(topics)]
+            if topic.queue:
+                self._cursor = (self._cursor + i + 1) % len(topics)
+                return topic
+        return None
+
+    def _work(self):
+        while True:
+            with self._lock:
+                topic = self._next_queued()
+                while topic is None:
+                    if self._closed:
+                        return
+                    self._queued.wait()
+                    topic = self._next_queued()
+                event, emitted_at, key = topic.queue.popleft()
+                if key is not None:
+                    del topic.queued[key]
+                self._in_flight += 1
+                self._room.notify_all()
+            try:
+                self._dispatch(topic, event, emitted_at)
+            finally:
+                with self._lock:
+                    self._in_flight -= 1
+                    if self._drained():
+                        self._idle.notify_all()
+
+    def _dispatch(self, topic: Topic, event, emitted_at: float):
+        errors = 0
+        for _, _, listener in topic.listeners:
+            try:
+                listener(event)
+            except Exception:
+                errors += 1
+                logger.exception('%s listener %r failed', topic.name, listener)
+        latency = time.perf_counter() - emitted_at
+        with self._lock:
+            topic.dispatched += 1
+            topic.errors += errors
+            topic.latencies.append(latency)
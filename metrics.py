@@ -0,0 +1,349 @@
+import itertools
+import math
+import threading
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+# HDR histogram layout: values (nanoseconds) below 2**SUB_BUCKET_BITS get a bucket each,
+# larger ones 2**(SUB_BUCKET_BITS - 1) buckets per power of two, so any recorded value is
+# within 1/64 (1.6%) of the truth however wide the range
+SUB_BUCKET_BITS = 7
+
+# upper bounds (seconds) of the cumulative buckets of the Prometheus exposition
+PROMETHEUS_BUCKETS = (1e-5, 2.5e-5, 5e-5, 1e-4, 2.5e-4, 5e-4, 1e-3, 2.5e-3, 5e-3, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def bucket_index(nanoseconds: int) -> int:
+    bits = nanoseconds.bit_length()
+    if bits <= SUB_BUCKET_BITS:
+        return nanoseconds
+    shift = bits - SUB_BUCKET_BITS
+    return (shift << (SUB_BUCKET_BITS - 1)) + (nanoseconds >> shift)
+
+
+def bucket_bounds(index: int) -> Tuple[int, int]:
+    # [lower, upper) nanoseconds of a bucket
+    if index < 1 << SUB_BUCKET_BITS:
+        return index, index + 1
+    shift = (index >> (SUB_BUCKET_BITS - 1)) - 1
+    lower = (index - (shift << (SUB_BUCKET_BITS - 1))) << shift
+    return lower, lower + (1 << shift)
+
+
+class Metric:
+    """
+    A named metric, or with labelnames a family of children, one per label values.
+
+    Hot-path updates are lock-free: every thread writes its own cell and readers add the
+    cells up, so concurrent updates are never lost and never contend.
+    """
+
+    kind = 'untyped'
+
+    def __init__(self, name: str, help: str = '', labelnames: Iterable[str] = (), function: Optional[Callable[[], float]] = None):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        # pulled at snapshot time instead of updated on the hot path
+        self.function = function
+        self.children: Dict[Tuple[str, ...], 'Metric'] = {}
+        self._cells: List[list] = []
+        self._local = threading.local()
+        self._lock = threading.Lock()
+
+    def labels(self, *values) -> 'Metric':
+        key = tuple(str(value) for value in values)
+        child = self.children.get(key)
+        if child is None:
+            if len(key) != len(self.labelnames):
+                raise ValueError(f'{self.name} expects labels {self.labelnames}')
+            with self._lock:
+                child = self.children.setdefault(key, type(self)(self.name, self.help))
+        return child
+
+    def samples(self) -> Iterable[Tuple[Tuple[str, ...], 'Metric']]:
+        # (label values, metric) of every series
+        if self.labelnames:
+            return sorted(self.children.items())
+        return (((), self),)
+
+    def _cell(self) -> list:
+        try:
+            return self._local.cell
+        except AttributeError:
+            cell = self._local.cell = self._new_cell()
+            with self._lock:
+                self._cells.append(cell)
+            return cell
+
+    def _new_cell(self) -> list:
+        return [0]
+
+
+class Counter(Metric):
+    kind = 'counter'
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # next() on an itertools.count is atomic and cheaper than a thread-local cell,
+        # so unit increments go there; every read consumes one of its values
+        self._ones = itertools.count()
+        self._reads = 0
+
+    def inc(self, amount: float = 1):
+        if amount == 1:
+            next(self._ones)
+            return
+        try:
+            self._local.cell[0] += amount
+        except AttributeError:
+            self._cell()[0] += amount
+
+    @property
+    def value(self) -> float:
+        if self.function is not None:
+            return self.function()
+        with self._lock:
+            ones = next(self._ones) - self._reads
+            self._reads += 1
+        return ones + sum(cell[0] for cell in list(self._cells))
+
+
+class Gauge(Metric):
+    kind = 'gauge'
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._value = 0.0
+
+    def set(self, value: float):
+        self._value = value
+
+    def inc(self, amount: float = 1):
+        with self._lock:
+            self._value += amount
+
+    def dec(self, amount: float = 1):
+        self.inc(-amount)
+
+    @property
+    def value(self) -> float:
+        return self.function() if self.function is not None else self._value
+
+
+class Histogram(Metric):
+    """
+    HDR-style latency histogram, in seconds.
+
+    With sample_every=n only one call in n is meant to be timed: callers check sampled()
+    before reading the clock, which keeps the cost of timing off most calls of a hot path.
+    """
+
+    kind = 'histogram'
+
+    def __init__(self, name: str, help: str = '', labelnames: Iterable[str] = (), sample_every: int = 1):
+        super().__init__(name, help, labelnames)
+        self.sample_every = sample_every
+        self._ticks = itertools.count(1)
+
+    def labels(self, *values) -> 'Histogram':
+        child = super().labels(*values)
+        child.sample_every = self.sample_every
+        return child
+
+    def sampled(self) -> bool:
+        return not next(self._ticks) % self.sample_every
+
+    def observe(self, seconds: float):
+        try:
+            cell = self._local.cell
+        except AttributeError:
+            cell = self._cell()
+        index = bucket_index(int(seconds * 1e9) if seconds > 0 else 0)
+        counts = cell[3]
+        if index >= len(counts):
+            counts.extend([0] * (index + 1 - len(counts)))
+        counts[index] += 1
+        cell[0] += 1
+        cell[1] += seconds
+        if seconds > cell[2]:
+            cell[2] = seconds
+
+    def _new_cell(self) -> list:
+        return [0, 0.0, 0.0, []] # count, sum, max, bucket counts
+
+    def merged(self) -> Tuple[int, float, float, List[int]]:
+        count, total, maximum, counts = 0, 0.0, 0.0, []
+        for cell in list(self._cells):
+            count += cell[0]
+            total += cell[1]
+            maximum = max(maximum, cell[2])
+            cell_counts = list(cell[3])
+            if len(cell_counts) > len(counts):
+                counts.extend([0] * (len(cell_counts) - len(counts)))
+            for index, bucket_count in enumerate(cell_counts):
+                counts[index] += bucket_count
+        return count, total, maximum, counts
+
+    @property
+    def count(self) -> int:
+        return sum(cell[0] for cell in list(self._cells))
+
+    def percentiles(self, percentiles=(50, 90, 99, 99.9)) -> Dict[float, float]:
+        count, _, maximum, counts = self.merged()
+        return self._percentiles(count, maximum, counts, percentiles)
+
+    @staticmethod
+    def _percentiles(count: int, maximum: float, counts: List[int], percentiles) -> Dict[float, float]:
+        result = {}
+        for p in percentiles:
+            if not count:
+                result[p] = 0.0
+                continue
+            rank = max(1, math.ceil(count * p / 100))
+            seen = 0
+            for index, bucket_count in enumerate(counts):
+                seen += bucket_count
+                if seen >= rank:
+                    lower, upper = bucket_bounds(index)
+                    # middle of the bucket, never beyond the largest value recorded
+                    result[p] = min((lower + upper) / 2e9, maximum)
+                    break
+        return result
+
+    def summary(self) -> dict:
+        count, total, maximum, counts = self.merged()
+        summary = {'count': count, 'sum': total, 'max': maximum}
+        for p, value in self._percentiles(count, maximum, counts, (50, 90, 99, 99.9)).items():
+            summary[f'p{p:g}'] = value
+        return summary
+
+    def cumulative(self, bounds=PROMETHEUS_BUCKETS) -> List[Tuple[float, int]]:
+        # (le, observations <= le), to the bucket precision
+        _, _, _, counts = self.merged()
+        result = []
+        index, seen = 0, 0
+        for bound in bounds:
+            limit = int(bound * 1e9)
+            while index < len(counts) and bucket_bounds(index)[0] <= limit:
+                seen += counts[index]
+                index += 1
+            result.append((bound, seen))
+        return result
+
+
+class _NullMetric:
+    # stands in for every metric of a disabled registry
+    value = 0
+    count = 0
+
+    def labels(self, *values):
+        return self
+
+    def inc(self, amount: float = 1):
+        pass
+
+    def dec(self, amount: float = 1):
+        pass
+
+    def set(self, value: float):
+        pass
+
+    def sampled(self) -> bool:
+        return False
+
+    def observe(self, seconds: float):
+        pass
+
+
+NULL_METRIC = _NullMetric()
+
+
+class MetricsRegistry:
+    """
+    The metrics of a process, read with snapshot() or in the Prometheus text format.
+
+    Registering a name twice returns the metric already registered, so components sharing
+    a registry share their series. A registry created with enabled=False hands out no-op
+    metrics, which is how instrumentation overhead is measured.
+    """
+
+    def __init__(self, enabled: bool = True):
+        self.enabled = enabled
+        self.metrics: Dict[str, Metric] = {}
+        self._lock = threading.Lock()
+
+    def counter(self, name: str, help: str = '', labelnames: Iterable[str] = (), function: Optional[Callable[[], float]] = None) -> Counter:
+        return self._register(Counter, name, help, labelnames, function=function)
+
+    def gauge(self, name: str, help: str = '', labelnames: Iterable[str] = (), function: Optional[Callable[[], float]] = None) -> Gauge:
+        return self._register(Gauge, name, help, labelnames, function=function)
+
+    def histogram(self, name: str, help: str = '', labelnames: Iterable[str] = (), sample_every: int = 1) -> Histogram:
+        return self._register(Histogram, name, help, labelnames, sample_every=sample_every)
+
+    def snapshot(self) -> Dict[str, object]:
+        """
+        Current value of every metric: a number for counters and gauges, a summary dict
+        (count, sum, max, p50, p90, p99, p99.9) for histograms, and for labelled
+        families a dict keyed by 'label=value,...'.
+        """
+        snapshot = {}
+        for name, metric in list(self.metrics.items()):
+            if metric.labelnames:
+                snapshot[name] = {
+                    ','.join(f'{label}={value}' for label, value in zip(metric.labelnames, values)): self._read(child)
+                    for values, child in metric.samples()
+                }
+            else:
+                snapshot[name] = self._read(metric)
+        return snapshot
+
+    def to_prometheus(self) -> str:
+        lines = []
+        for name, metric in list(self.metrics.items()):
+            if metric.help:
+                lines.append(f'# HELP {name} {metric.help}')
+            lines.append(f'# TYPE {name} {metric.kind}')
+            for values, series in metric.samples():
+                labels = [f'{label}="{_escape(value)}"' for label, value in zip(metric.labelnames, values)]
+                if isinstance(series, Histogram):
+                    count, total, _, _ = series.merged()
+                    for bound, seen in series.cumulative():
+                        le = f'le="{bound:g}"'
+                        lines.append(f'{name}_bucket{_labels(labels + [le])} {seen}')
+                    le = 'le="+Inf"'
+                    lines.append(f'{name}_bucket{_labels(labels + [le])} {count}')
+                    lines.append(f'{name}_sum{_labels(labels)} {total!r}')
+                    lines.append(f'{name}_count{_labels(labels)} {count}')
+                else:
+                    lines.append(f'{name}{_labels(labels)} {_number(series.value)}')
+        return '\n'.join(lines) + '\n'
+
+    def _register(self, kind, name: str, help: str, labelnames: Iterable[str], **options):
+        if not self.enabled:
+            return NULL_METRIC
+        with self._lock:
+            metric = self.metrics.get(name)
+            if metric is None:
+                metric = self.metrics[name] = kind(name, help, labelnames, **options)
+            elif not isinstance(metric, kind):
+                raise ValueError(f'{name} is already registered as a {metric.kind}')
+            elif options.get('function') is not None:
+                metric.function = options['function']
+            return metric
+
+    @staticmethod
+    def _read(metric: Metric):
+        return metric.summary() if isinstance(metric, Histogram) else metric.value
+
+
+def _escape(value: str) -> str:
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _labels(labels: List[str]) -> str:
+    return '{' + ','.join(labels) + '}' if labels else ''
+
+
+def _number(value: float) -> str:
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
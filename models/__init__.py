@@ -0,0 +1,50 @@
+"""
+Domain model and PagerService.
+
+Submodules are imported on first use of one of their names (PEP 562), so a tool that only
+validates policies, e.g. ``from models import load_policy``, never loads the scheduler,
+event emitter, metrics or WAL that PagerService needs:
+
+    targets     Target, Email, SMS and the target label parser (with plugin transports)
+    escalation  MonitoredService and the escalation policy classes, load_policy
+    alert       Alert and the events about it
+    timers      TimerManager
+    service     PagerService
+"""
+import importlib
+
+_EXPORTS = {
+    'Target': 'targets',
+    'Email': 'targets',
+    'SMS': 'targets',
+    'TARGET_TYPES': 'targets',
+    'parse_target': 'targets',
+    'MonitoredService': 'escalation',
+    'EscalationPolicyLevel': 'escalation',
+    'EscalationPolicyMonitoredService': 'escalation',
+    'EscalationPolicy': 'escalation',
+    'load_policy': 'escalation',
+    'policy_entry': 'escalation',
+    'Alert': 'alert',
+    'TimeoutEvent': 'alert',
+    'AcknowledgementEvent': 'alert',
+    'HealthyEvent': 'alert',
+    'EscalationEnded': 'alert',
+    'TimerManager': 'timers',
+    'PagerService': 'service',
+}
+
+__all__ = list(_EXPORTS)
+
+
+def __getattr__(name: str):
+    submodule = _EXPORTS.get(name)
+    if submodule is None:
+        raise AttributeError(f'module {__name__!r} has no attribute {name!r}')
+    value = getattr(importlib.import_module(f'.{submodule}', __name__), name)
+    globals()[name] = value # later lookups skip __getattr__
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_EXPORTS))
@@ -0,0 +1,101 @@
+import datetime
+import itertools
+from typing import Optional, Tuple
+
+from clock import SYSTEM_CLOCK, Clock
+
+from .escalation import MonitoredService
+
+_alert_ids = itertools.count(1) # next() is atomic, ids are unique per process
+_alert_id_stride = 1
+
+def stride_alert_ids(offset: int, stride: int):
+    # hands out offset, offset + stride, ...: a shard process takes one residue of the
+    # shard count so its ids never collide with another shard's and name their owner
+    global _alert_ids, _alert_id_stride
+    _alert_ids, _alert_id_stride = itertools.count(offset, stride), stride
+
+def restore_alert_id(alert, alert_id: int):
+    # gives a recovered alert back its logged id; ids handed out later stay above it.
+    # Runs from PagerService.recover(), before any new alert is created
+    global _alert_ids
+    alert.alert_id = alert_id
+    following = next(_alert_ids)
+    if following <= alert_id:
+        following += ((alert_id - following) // _alert_id_stride + 1) * _alert_id_stride
+    _alert_ids = itertools.count(following, _alert_id_stride)
+
+class Alert:
+    # slotted with float timestamps: hundreds of thousands of alerts can be open at once,
+    # see benchmarks/bench_memory.py
+    __slots__ = ('alert_id', 'monitored_service', 'sent_timestamp', 'current_level', 'acknowledged', 'occurrences', 'last_seen_timestamp', 'held',
+                 'escalation_start', 'schedule')
+
+    def __init__(self, monitored_service, clock: Clock = SYSTEM_CLOCK):
+        self.alert_id: int = next(_alert_ids)
+        self.monitored_service: MonitoredService = monitored_service
+        self.sent_timestamp: float = clock.time() # epoch seconds
+        self.current_level: int = 0
+        self.acknowledged: bool = False
+        self.occurrences: int = 1 # this alert plus the duplicates folded into it
+        self.last_seen_timestamp: float = self.sent_timestamp
+        self.held: bool = False # first page held back because the service is flapping
+        # set when the alert opens: level n times out at escalation_start + schedule[n] (monotonic)
+        self.escalation_start: Optional[float] = None
+        self.schedule: Optional[Tuple[float, ...]] = None
+    
+    @property
+    def sent_at(self) -> datetime.datetime:
+        return datetime.datetime.fromtimestamp(self.sent_timestamp)
+    
+    @sent_at.setter
+    def sent_at(self, sent_at: datetime.datetime):
+        self.sent_timestamp = sent_at.timestamp()
+    
+    @property
+    def last_seen(self) -> datetime.datetime:
+        return datetime.datetime.fromtimestamp(self.last_seen_timestamp)
+    
+    def escalate(self):
+        self.current_level += 1
+
+    def acknowledge(self):
+        self.acknowledged = True
+    
+    def record_occurrence(self, seen_timestamp: float):
+        self.occurrences += 1
+        self.last_seen_timestamp = max(self.last_seen_timestamp, seen_timestamp)
+    
+    @property
+    def message(self) -> str:
+        return f'{self.monitored_service.service_name} is unhealthy (Level {self.current_level})'
+    
+    def __str__(self):
+        return (
+            f"Alert for {self.monitored_service.service_name}\n"
+            f"Sent at {self.sent_at}\n"
+            f"Current escalation level: {self.current_level}\n"
+            f"Timeout for acknowledge: {self.timer.timeout}\n"
+        )
+
+class EscalationEnded(Exception):
+    # an acknowledgement timeout with nothing to escalate: acknowledged, resolved or out of levels
+    pass
+
+class TimeoutEvent:
+    alert: Alert
+
+    def __init__(self, alert: Alert):
+        self.alert = alert
+
+class AcknowledgementEvent:
+    alert: Alert
+
+    def __init__(self, alert: Alert):
+        self.alert = alert
+
+class HealthyEvent:
+    monitored_service: MonitoredService
+
+    def __init__(self, monitored_service: MonitoredService):
+        self.monitored_service = monitored_service
@@ -0,0 +1,95 @@
+from typing import Dict, List, Optional, Tuple
+
+from policy import CompiledEscalationPolicy, intern_service
+
+from .targets import Target, parse_target
+
+class MonitoredService:
+    __slots__ = ('service_name', 'service_id', 'healthy')
+
+    def __init__(self, service_name):
+        self.service_name = service_name
+        self.service_id: int = intern_service(service_name)
+        self.healthy = True
+    
+    def set_unhealthy(self):
+        self.healthy = False
+    
+    def set_healthy(self):
+        self.healthy = True
+    
+    def __reduce__(self):
+        # service ids are per process: unpickled, e.g. in a shard process, the name is interned again
+        return MonitoredService, (self.service_name,), self.healthy
+    
+    def __setstate__(self, healthy):
+        self.healthy = healthy
+
+class EscalationPolicyLevel:
+    def __init__(self, targets: List[Target], timeout: Optional[float] = None):
+        self.targets = targets
+        self.timeout: Optional[float] = timeout # seconds to wait for an acknowledgement, else the service's
+    
+class EscalationPolicyMonitoredService:
+    def __init__(self, monitored_service: MonitoredService, levels: List[EscalationPolicyLevel], timeout: Optional[float] = None):
+        self.monitored_service = monitored_service
+        self.levels: List[EscalationPolicyLevel] = levels
+        self.timeout: Optional[float] = timeout # default of its levels, else policy.DEFAULT_ACK_TIMEOUT
+
+    def level_targets(self, level: int) -> List[Target]:
+        return self.levels[level].targets
+
+class EscalationPolicy:
+    def __init__(self, policies: dict):
+        self.policies: dict = policies # Dictionary with monitored_service name as keys and EscalationPolicyMonitoredService as values
+    
+    def compile(self) -> CompiledEscalationPolicy:
+        return CompiledEscalationPolicy.compile(self.policies)
+    
+    def __str__(self):
+        return f"{self.policies}"
+
+
+def load_policy(document: dict, services: Dict[str, MonitoredService]) -> EscalationPolicy:
+    """
+    Builds an EscalationPolicy from {service name: entry}, see policy_entry for the entries.
+    Services already in services are reused, so their open alerts stay attached to them.
+    """
+    if not isinstance(document, dict):
+        raise ValueError('An escalation policy is an object keyed by service name')
+    policies = {}
+    for name, entry in document.items():
+        service_timeout, levels = policy_entry(name, entry)
+        service = services.get(name) or MonitoredService(name)
+        policies[name] = EscalationPolicyMonitoredService(
+            service,
+            [EscalationPolicyLevel([parse_target(label) for label in labels], timeout) for labels, timeout in levels],
+            service_timeout
+        )
+    return EscalationPolicy(policies)
+
+
+def policy_entry(name: str, entry) -> Tuple[Optional[float], List[Tuple[List[str], Optional[float]]]]:
+    """
+    Reads the policy document entry of a service into (service timeout, [(target labels, level timeout)]).
+
+    An entry is a list of levels, or {"levels": [...], "timeout": seconds}; a level is a list of
+    target labels ("email:address", "sms:number"), or {"targets": [...], "timeout": seconds}.
+    Timeouts are optional, they are validated when the policy is compiled.
+    """
+    service_timeout = None
+    if isinstance(entry, dict):
+        service_timeout = entry.get('timeout')
+        entry = entry.get('levels')
+    if not isinstance(entry, list):
+        raise ValueError(f'Escalation policy for {name} must be a list of levels, each a list of targets')
+    levels = []
+    for level in entry:
+        timeout = None
+        if isinstance(level, dict):
+            timeout = level.get('timeout')
+            level = level.get('targets')
+        if not isinstance(level, list) or not all(isinstance(label, str) for label in level):
+            raise ValueError(f'Escalation policy for {name} must be a list of levels, each a list of targets')
+        levels.append((level, timeout))
+    return service_timeout, levels
@@ -0,0 +1,517 @@
+import logging
+import time
+from typing import Iterable, List, NamedTuple, Optional, Tuple
+
+from clock import SYSTEM_CLOCK, Clock
+from event_emitter import EventEmitter
+from metrics import MetricsRegistry
+from notification_log import DROPPED, QUEUED, SENT, SUPPRESSED, NotificationLog
+from policy import DEFAULT_ACK_TIMEOUT, CompiledEscalationPolicy, uniform_schedule
+from registry import AlertRegistry
+from suppression import AlertSuppressor
+from templates import MessageRenderer
+from tracing import ACKNOWLEDGED, DUPLICATE, ESCALATED, EXHAUSTED, RECEIVED, RESOLVED, TIMEOUT, Tracer
+from wal import WriteAheadLog, replay_alerts
+
+from .alert import AcknowledgementEvent, Alert, EscalationEnded, HealthyEvent, TimeoutEvent, restore_alert_id
+from .escalation import EscalationPolicy, MonitoredService
+from .timers import TimerManager
+
+logger = logging.getLogger(__name__)
+
+class ActivePolicy(NamedTuple):
+    # a policy and its compiled form, published together so readers never pair one with the other's predecessor
+    escalation_policy: EscalationPolicy
+    compiled: CompiledEscalationPolicy
+
+class PagerService:
+    def __init__(self, escalation_policy: EscalationPolicy, dispatcher=None, wal: Optional[WriteAheadLog] = None, log_capacity: int = 100_000,
+                 suppressor: Optional[AlertSuppressor] = None, clock: Clock = SYSTEM_CLOCK, scheduler=None,
+                 event_emitter: Optional[EventEmitter] = None, metrics: Optional[MetricsRegistry] = None,
+                 renderer: Optional[MessageRenderer] = None, tracer: Optional[Tracer] = None):
+        # clock and scheduler are injectable for deterministic tests and simulations,
+        # e.g. a clock.VirtualClock with a scheduler.SimulatedScheduler
+        self.clock: Clock = clock
+        self.active_policy: ActivePolicy = ActivePolicy(escalation_policy, escalation_policy.compile())
+        # { MonitoredService: Alert }, also looked up by alerts.by_id(alert_id); transitions hold alerts.lock(service)
+        self.alerts: AlertRegistry = AlertRegistry()
+        self.alerts_log: NotificationLog = NotificationLog(log_capacity, time_fn=clock.time) # bounded, keeps the last log_capacity notifications
+        # optional dispatcher.NotificationDispatcher, delivers off the escalation path
+        self.dispatcher = dispatcher
+        # optional wal.WriteAheadLog, makes open alerts and their timers survive a restart
+        self.wal: Optional[WriteAheadLog] = wal
+        # duplicate and flapping alerts, see suppression.AlertSuppressor
+        self.suppressor: AlertSuppressor = suppressor if suppressor is not None else AlertSuppressor(time_fn=clock.monotonic)
+        # per-channel message templates, rendered once per (service, level, channel)
+        self.renderer: MessageRenderer = renderer if renderer is not None else MessageRenderer()
+        # spans of every alert's lifecycle, tracer.timeline(alert.alert_id) rebuilds one incident
+        self.tracer: Tracer = tracer if tracer is not None else Tracer(log_capacity, time_fn=clock.time)
+
+        # EventEmitter(workers=...) takes timeout handling off the timer thread
+        self.event_emitter: EventEmitter = event_emitter if event_emitter is not None else EventEmitter()
+        # read with metrics.snapshot() or metrics.to_prometheus()
+        self.metrics: MetricsRegistry = metrics if metrics is not None else MetricsRegistry()
+        self.timer_manager = TimerManager(self.event_emitter, scheduler, clock, self.metrics)
+        self._instrument()
+
+        # subscribe to timeout event; queued timeouts of the same alert coalesce
+        self.event_emitter.configure('timeout', key=lambda event: event.alert)
+        self.event_emitter.on('timeout', self._handle_timeout_event)
+    
+    @property
+    def escalation_policy(self) -> EscalationPolicy:
+        return self.active_policy.escalation_policy
+    
+    @property
+    def compiled_policy(self) -> CompiledEscalationPolicy:
+        return self.active_policy.compiled
+    
+    def _instrument(self):
+        metrics = self.metrics
+        # pulled from state the service keeps anyway, free on the hot path
+        metrics.gauge('pager_open_alerts', 'Alerts open, not yet acknowledged or resolved', function=lambda: len(self.alerts))
+        metrics.counter('pager_alerts_duplicate_total', 'Alerts folded into an open or acknowledged alert', function=lambda: self.suppressor.duplicates)
+        metrics.counter('pager_alerts_held_total', 'Alerts of flapping services whose first page was held back', function=lambda: self.suppressor.held)
+        metrics.counter('pager_notifications_total', 'Target notifications issued', function=lambda: self.alerts_log.total)
+        metrics.gauge('pager_timeout_queue_depth', 'Timeout events waiting for a listener', function=lambda: self.event_emitter.depth('timeout'))
+        metrics.counter('pager_message_cache_hits_total', 'Notification messages served from the template cache', function=lambda: self.renderer.hits)
+        metrics.counter('pager_message_cache_misses_total', 'Notification messages rendered from a template', function=lambda: self.renderer.misses)
+        metrics.counter('pager_trace_spans_total', 'Lifecycle spans recorded by the tracer', function=lambda: self.tracer.total)
+        self._received = metrics.counter('pager_alerts_received_total', 'Alerts received')
+        self._acknowledged = metrics.counter('pager_acknowledgements_total', 'Alerts acknowledged')
+        self._resolved = metrics.counter('pager_alerts_resolved_total', 'Alerts closed by a healthy event')
+        self._escalations = metrics.counter('pager_escalations_total', 'Escalations, by level reached', ('level',))
+        self._exhausted = metrics.counter('pager_escalations_exhausted_total', 'Timeouts of alerts past their last level')
+        # ingest latency is sampled, one receive_alert call in 32 reads the clock
+        self._receive_latency = metrics.histogram('pager_receive_alert_seconds', 'receive_alert latency, sampled', sample_every=32)
+        self._notify_latency = metrics.histogram('pager_notify_seconds', 'Latency of notifying the targets of a level, sampled on ingest')
+        self._timeout_latency = metrics.histogram('pager_acknowledgement_timeout_seconds', 'handle_acknowledgement_timeout latency')
+    
+    def receive_alert(self, alert: Alert, seconds: Optional[int] = None) -> Alert:
+        """
+        Opens the alert and returns it, or returns the alert it was folded into when it
+        duplicates the open (or recently acknowledged) alert of an unhealthy service.
+        """
+        self._received.inc()
+        if not self._receive_latency.sampled():
+            return self._receive_alert(alert, seconds, False)
+        start = time.perf_counter()
+        try:
+            return self._receive_alert(alert, seconds, True)
+        finally:
+            self._receive_latency.observe(time.perf_counter() - start)
+    
+    def _receive_alert(self, alert: Alert, seconds: Optional[int], timed: bool) -> Alert:
+        with self.alerts.lock(alert.monitored_service):
+          duplicate_of = self._admit(alert, seconds)
+          if duplicate_of is not None:
+            return duplicate_of
+          # send the alert to all targets of the escalation policy current level,
+          # unless the service is flapping and they were paged moments ago
+          self._send_to_targets(alert, held=alert.held, timed=timed)
+          # arms the first step of the escalation schedule
+          self.timer_manager.set_deadline(alert, alert.escalation_start + alert.schedule[0])
+          self._log_event('alert', alert)
+          return alert
+    
+    def receive_alerts(self, events: Iterable, seconds: Optional[int] = None) -> List:
+        """
+        Applies a batch (or stream) of Alert, AcknowledgementEvent and HealthyEvent items in
+        one pass and returns one result per item, in order, instead of raising:
+        'opened', 'duplicate', 'acknowledged', 'resolved', 'ignored' or the exception raised.
+
+        State transitions are applied item by item; pages, timers and write-ahead log records
+        of the whole batch are then issued together: pages grouped per (service, level), timers
+        with a single scheduler operation. An alert acknowledged or resolved later in the same
+        batch is neither paged nor given a timer.
+        """
+        results = []
+        received = 0
+        opened = []
+        opened_at = [] # index in results of each opened alert
+        # only collected with a write-ahead log, records must follow the batch order
+        wal_events = [] if self.wal is not None else None
+        for event in events:
+            try:
+                if isinstance(event, Alert):
+                    received += 1
+                    with self.alerts.lock(event.monitored_service):
+                        if self._admit(event, seconds) is None:
+                            opened.append(event)
+                            opened_at.append(len(results))
+                            result = 'opened'
+                        else:
+                            result = 'duplicate'
+                    op, alert = 'alert', event
+                elif isinstance(event, AcknowledgementEvent):
+                    with self.alerts.lock(event.alert.monitored_service):
+                        result = 'acknowledged' if self._acknowledge(event.alert) else 'ignored'
+                    if result == 'acknowledged':
+                        self._acknowledged.inc()
+                    op, alert = 'ack', event.alert
+                elif isinstance(event, HealthyEvent):
+                    alert = self._resolve_healthy(event.monitored_service)
+                    result = 'resolved' if alert is not None else 'ignored'
+                    op = 'healthy'
+                else:
+                    raise Exception(f'Unknown event: {event!r}')
+                if wal_events is not None and result != 'duplicate' and result != 'ignored':
+                    wal_events.append((op, alert))
+            except Exception as error:
+                result = error
+            results.append(result)
+        self._received.inc(received)
+
+        # pages grouped per (service, level): targets and messages are looked up once per group
+        pages = {} # { (service_id, level): [(index in results, alert)] }
+        for index, alert in zip(opened_at, opened):
+            pages.setdefault((alert.monitored_service.service_id, alert.current_level), []).append((index, alert))
+        for (service_id, level), group in pages.items():
+            with self.alerts.lock(group[0][1].monitored_service):
+                # alerts acknowledged or resolved later in the same batch are not paged
+                group = [(index, alert) for index, alert in group if self.alerts.get(alert.monitored_service) is alert]
+                if not group:
+                    continue
+                try:
+                    paged = self._notify_level(service_id, level, [alert.held for _, alert in group])
+                except Exception as error:
+                    for index, _ in group:
+                        results[index] = error
+                    continue
+                for (_, alert), records in zip(group, paged):
+                    self._log_notifications(alert, records)
+        # alerts acknowledged or resolved later in the same batch don't need a timer
+        self.timer_manager.set_deadlines([
+            (alert, alert.escalation_start + alert.schedule[0])
+            for alert in opened if self.alerts.get(alert.monitored_service) is alert
+        ])
+        for op, alert in wal_events or ():
+            self._log_event(op, alert)
+        return results
+    
+    def receive_events(self, events: Iterable[Tuple[str, str]], seconds: Optional[int] = None) -> List:
+        """
+        receive_alerts for (kind, service name) pairs as they come off the wire, kind being
+        'alert', 'ack' or 'healthy'. An acknowledgement applies to the service's open alert,
+        including one opened earlier in the same batch; with none open it is 'ignored'.
+        ('ack', alert_id) acknowledges that alert only, 'ignored' once it is no longer open.
+        """
+        events = list(events)
+        settled = {} # { index: result } of the events that never reach receive_alerts
+
+        def translate():
+            # a generator: each event is built once the previous ones have been applied
+            for index, (kind, name) in enumerate(events):
+                if kind == 'ack' and isinstance(name, int):
+                    alert = self.alerts.by_id(name)
+                    if alert is None:
+                        settled[index] = 'ignored'
+                    else:
+                        yield AcknowledgementEvent(alert)
+                    continue
+                policy = self.escalation_policy.policies.get(name)
+                if policy is None:
+                    settled[index] = Exception(f'No escalation policy for {name}')
+                elif kind == 'alert':
+                    yield Alert(policy.monitored_service, self.clock)
+                elif kind == 'healthy':
+                    yield HealthyEvent(policy.monitored_service)
+                elif kind == 'ack':
+                    alert = self.alerts.get(policy.monitored_service)
+                    if alert is None:
+                        settled[index] = 'ignored'
+                    else:
+                        yield AcknowledgementEvent(alert)
+                else:
+                    settled[index] = Exception(f'Unknown event: {kind!r}')
+
+        results = iter(self.receive_alerts(translate(), seconds))
+        return [settled[index] if index in settled else next(results) for index in range(len(events))]
+    
+    def handle_healthy(self, monitored_service: MonitoredService):
+        self.resolve_healthy(monitored_service)
+    
+    def resolve_healthy(self, monitored_service: MonitoredService) -> Optional[Alert]:
+        """
+        Marks the service healthy and closes its open alert, if any, which is returned.
+        The alert's timer is cancelled and its references dropped right away, instead of
+        the service's health being checked when the next escalation fires.
+        """
+        alert = self._resolve_healthy(monitored_service)
+        if alert is not None:
+            self._log_event('healthy', alert)
+        return alert
+    
+    def _admit(self, alert: Alert, seconds: Optional[float] = None) -> Optional[Alert]:
+        # registers the alert as open, or returns the alert it duplicates; caller holds the service lock
+        if self.compiled_policy.level_count(alert.monitored_service.service_id) == 0:
+            # checked up front: an alert that can't be paged is never opened, armed or logged
+            raise Exception('No escalation policy for this level')
+        duplicate_of = self.suppressor.absorb(alert, self.alerts.get(alert.monitored_service))
+        if duplicate_of is not None:
+            self.tracer.record(duplicate_of.alert_id, DUPLICATE, alert.monitored_service.service_id, duplicate_of.current_level)
+            return duplicate_of
+        self.tracer.record(alert.alert_id, RECEIVED, alert.monitored_service.service_id, 0)
+        # the whole escalation is fixed now: every later step is one lookup, no recomputation
+        alert.escalation_start = self.clock.monotonic()
+        alert.schedule = self._escalation_schedule(alert, seconds)
+        # append the alert to the list of alerts
+        self.alerts[alert.monitored_service] = alert
+        # set the service to unhealthy
+        alert.monitored_service.set_unhealthy()
+        alert.held = self.suppressor.opened(alert)
+        return None
+    
+    def _resolve_healthy(self, monitored_service: MonitoredService) -> Optional[Alert]:
+        with self.alerts.lock(monitored_service):
+            monitored_service.set_healthy()
+            # also lets go of an acknowledged alert kept for deduplication
+            self.suppressor.resolved(monitored_service)
+            alert = self.alerts.pop(monitored_service, None)
+            if alert is not None:
+                self.timer_manager.cancel_timer(alert)
+                self._resolved.inc()
+                self.tracer.record(alert.alert_id, RESOLVED, monitored_service.service_id, alert.current_level)
+            return alert
+    
+    def update_escalation_policy(self, escalation_policy: EscalationPolicy):
+        # compile (and validate) first, then swap both with a single reference assignment:
+        # in-flight escalations pick up the new policy at their next lookup, and a service
+        # name resolved under the new policy is always looked up in its compiled form or a later one
+        self.active_policy = ActivePolicy(escalation_policy, escalation_policy.compile())
+    
+    def _handle_timeout_event(self, event: TimeoutEvent):
+        try:
+            self.handle_acknowledgement_timeout(event.alert)
+        except EscalationEnded as outcome:
+            # expected, one per alert in a storm: no traceback, real listener failures keep theirs
+            logger.info('Acknowledgement timeout: %s', outcome)
+
+    def handle_acknowledgement_timeout(self, alert: Alert):
+        start = time.perf_counter()
+        try:
+            self._handle_acknowledgement_timeout(alert)
+        finally:
+            self._timeout_latency.observe(time.perf_counter() - start)
+    
+    def _handle_acknowledgement_timeout(self, alert: Alert):
+        with self.alerts.lock(alert.monitored_service):
+            if not alert.acknowledged and self.alerts.get(alert.monitored_service) is not alert:
+                # resolved after the dispatcher took its timer, perhaps with a newer alert open since
+                self.timer_manager.cancel_timer(alert)
+                raise EscalationEnded('Alert is no longer open')
+            if not alert.acknowledged:
+                now = self.clock.monotonic()
+                service_id = alert.monitored_service.service_id
+                self.tracer.record(alert.alert_id, TIMEOUT, service_id, alert.current_level)
+                while True:
+                    alert.escalate()
+                    if alert.current_level >= self._escalation_levels_count(alert):
+                        self.timer_manager.cancel_timer(alert)
+                        self._exhausted.inc()
+                        self.tracer.record(alert.alert_id, EXHAUSTED, service_id, alert.current_level)
+                        self._log_event('escalate', alert)
+                        # TODO: future work, this is the extreme case, we should notify the service owner
+                        raise EscalationEnded('No more escalation levels')
+                    self.tracer.record(alert.alert_id, ESCALATED, service_id, alert.current_level)
+                    self._send_to_targets(alert, timed=True)
+                    self._escalations.labels(alert.current_level).inc()
+                    deadline = self._escalation_deadline(alert)
+                    if deadline is None or deadline > now:
+                        break
+                    # this level's deadline passed too (the timer fired late, e.g. after a pause):
+                    # catch up now, one level at a time so each one is paged, in order
+                    self._log_event('escalate', alert)
+                if deadline is not None:
+                    self.timer_manager.set_deadline(alert, deadline)
+                else:
+                    self.timer_manager.cancel_timer(alert)
+                self._log_event('escalate', alert)
+            else:
+                self._remove_alert(alert)
+                self.timer_manager.cancel_timer(alert)
+                raise EscalationEnded('Alert already acknowledged')
+    
+    def handle_acknowledgement(self, alert: Alert):
+        with self.alerts.lock(alert.monitored_service):
+            if self._acknowledge(alert):
+                self._acknowledged.inc()
+                self._log_event('ack', alert)
+    
+    def acknowledge(self, alert_id: int) -> Optional[Alert]:
+        """
+        Acknowledges an open alert by its id, e.g. one quoted back from an external channel,
+        without holding the Alert. Returns it, or None when no open alert has this id.
+        """
+        alert = self.alerts.by_id(alert_id)
+        if alert is None:
+            return None
+        with self.alerts.lock(alert.monitored_service):
+            if not self._acknowledge(alert):
+                # acknowledged or resolved since the lookup
+                return None
+            self._acknowledged.inc()
+            self._log_event('ack', alert)
+        return alert
+    
+    def _acknowledge(self, alert: Alert) -> bool:
+        alert.acknowledge()
+        self.timer_manager.cancel_timer(alert)
+        if not self._remove_alert(alert):
+            return False
+        self.tracer.record(alert.alert_id, ACKNOWLEDGED, alert.monitored_service.service_id, alert.current_level)
+        return True
+    
+    def _remove_alert(self, alert: Alert) -> bool:
+        # a newer alert may already be open for the service, only drop this one
+        if self.alerts.get(alert.monitored_service) is alert:
+            del self.alerts[alert.monitored_service]
+            return True
+        return False
+    
+    def recover(self):
+        """
+        Rebuilds the open alerts from the write-ahead log and re-arms their timers with
+        whatever was left of their deadline. Targets are not notified again.
+        """
+        now = self.clock.time()
+        for service_name, record in replay_alerts(self.wal.replay()).items():
+            policy = self.escalation_policy.policies.get(service_name)
+            monitored_service = policy.monitored_service if policy is not None else MonitoredService(service_name)
+            alert = Alert(monitored_service, self.clock)
+            if 'alert' in record:
+                # logs written before alert ids were logged keep the fresh id
+                restore_alert_id(alert, record['alert'])
+            alert.sent_timestamp = record['sent_at']
+            alert.current_level = record['level']
+            # the schedule the alert opened with, e.g. a uniform one from receive_alert(alert, seconds)
+            schedule = record.get('schedule')
+            alert.schedule = tuple(schedule) if schedule else self._escalation_schedule(alert, None)
+            monitored_service.set_unhealthy()
+            self.alerts[monitored_service] = alert
+            if record['deadline'] is not None:
+                # an expired deadline fires right away instead of waiting a full delay again;
+                # the schedule is anchored so that the current level ends at the logged deadline
+                deadline = self.clock.monotonic() + max(record['deadline'] - now, 1e-3)
+                level = min(alert.current_level, len(alert.schedule) - 1)
+                alert.escalation_start = deadline - alert.schedule[level]
+                self.timer_manager.set_deadline(alert, deadline)
+        self.wal.compact(self._wal_snapshot)
+    
+    def _log_event(self, op: str, alert: Alert):
+        if self.wal is None:
+            return
+        self.wal.append(self._wal_record(op, alert))
+        if self.wal.snapshot_due:
+            # callers hold a stripe lock and the snapshot takes all of them: let the flusher do it
+            self.wal.compact_later(self._wal_snapshot)
+    
+    def _wal_record(self, op: str, alert: Alert) -> dict:
+        return {
+            'op': op,
+            'alert': alert.alert_id,
+            'service': alert.monitored_service.service_name,
+            'level': alert.current_level,
+            'sent_at': alert.sent_timestamp,
+            'deadline': self.timer_manager.deadline(alert),
+            'schedule': alert.schedule,
+        }
+    
+    def _wal_snapshot(self):
+        return [self._wal_record('alert', alert) for alert in list(self.alerts.values())]
+    
+    def _send_to_targets(self, alert: Alert, held: bool = False, timed: bool = False):
+        if alert.monitored_service.healthy:
+            self.timer_manager.cancel_timer(alert)
+            self._remove_alert(alert)
+            self._log_event('healthy', alert)
+            raise EscalationEnded('Service is healthy')
+        elif timed:
+            start = time.perf_counter()
+            self._log_notifications(alert, self._notify_targets(alert, held))
+            self._notify_latency.observe(time.perf_counter() - start)
+        else:
+            self._log_notifications(alert, self._notify_targets(alert, held))
+    
+    def _log_notifications(self, alert: Alert, records: List[tuple]):
+        self.tracer.record_notifications(alert.alert_id, records)
+        self.alerts_log.extend(records)
+    
+    def _notify_targets(self, alert: Alert, held: bool = False) -> List[tuple]:
+        # notifies the targets of the alert's current level and returns their log records
+        return self._notify_level(alert.monitored_service.service_id, alert.current_level, (held,))[0]
+    
+    def _notify_level(self, service_id: int, level: int, held: Iterable[bool]) -> List[List[tuple]]:
+        # pages the targets of one level once per alert, given whether each is held, and returns their log records
+        compiled_policy = self.compiled_policy
+        targets = compiled_policy.targets(service_id, level)
+        if targets is None:
+            raise Exception('No escalation policy for this level')
+        targets = tuple(zip(targets, compiled_policy.target_ids(service_id, level)))
+        render = self.renderer.render
+        messages = {} # { channel: message }, one cache lookup per channel of the level
+        pages = []
+        for alert_held in held:
+            records = []
+            for target, target_id in targets:
+                if alert_held:
+                    records.append((service_id, level, target_id, SUPPRESSED))
+                    continue
+                channel = target.transport
+                message = messages.get(channel)
+                if message is None:
+                    message = messages[channel] = render(service_id, level, channel)
+                if self.dispatcher is not None and self.dispatcher.handles(target):
+                    status = QUEUED if self.dispatcher.submit(target, message) else DROPPED
+                else:
+                    target.notify(message)
+                    status = SENT
+                records.append((service_id, level, target_id, status))
+            pages.append(records)
+        return pages
+    
+    def stats(self) -> dict:
+        # per-topic event queue depth and dispatch latency, plus delivery counters when dispatching
+        stats = {
+            'alerts': len(self.alerts),
+            'timers': len(self.timer_manager.timers),
+            'duplicates': self.suppressor.duplicates,
+            'held': self.suppressor.held,
+            'events': self.event_emitter.stats(),
+        }
+        if self.dispatcher is not None:
+            stats['notifications'] = self.dispatcher.stats()
+        return stats
+    
+    def _escalation_schedule(self, alert: Alert, seconds: Optional[float]) -> Tuple[float, ...]:
+        # the compiled policy's schedule, or every level waiting seconds when given
+        service_id = alert.monitored_service.service_id
+        if seconds:
+            return uniform_schedule(seconds, max(1, self.compiled_policy.level_count(service_id)))
+        schedule = self.compiled_policy.schedule(service_id)
+        return schedule if schedule is not None else uniform_schedule(DEFAULT_ACK_TIMEOUT, 1)
+    
+    def _escalation_deadline(self, alert: Alert) -> Optional[float]:
+        # monotonic time at which the alert's current level times out
+        schedule, level = alert.schedule, alert.current_level
+        if schedule is None:
+            return None
+        if level >= len(schedule):
+            # a policy swapped in since the alert opened has more levels: extend with their timeouts
+            service_id = alert.monitored_service.service_id
+            extended = list(schedule)
+            while len(extended) <= level:
+                extended.append(extended[-1] + (self.compiled_policy.timeout(service_id, len(extended)) or DEFAULT_ACK_TIMEOUT))
+            schedule = alert.schedule = tuple(extended)
+        return alert.escalation_start + schedule[level]
+    
+    def _escalation_levels_count(self, alert: Alert) -> int:
+        return self.compiled_policy.level_count(alert.monitored_service.service_id)
+    
+    def __str__(self):
+        return (
+            f"Alerts: {self.alerts}\n"
+            f"Alerts log: {self.alerts_log}\n"
+            f"Escalation policy: {self.escalation_policy}\n"
+            f"Timer manager: {self.timer_manager}"
+        )
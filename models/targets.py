@@ -0,0 +1,68 @@
+from abc import ABC, abstractmethod
+from typing import Dict, Optional, Type
+
+# transport entry points of installed plugins, e.g. pager.targets = pagerduty = pager_pd:PagerDutyTarget
+TARGET_ENTRY_POINTS = 'pager.targets'
+
+class Target(ABC):
+    transport: Optional[str] = None # name of the dispatcher.NotificationDispatcher channel delivering to this target
+
+    @abstractmethod
+    def notify(self, message: str):
+      pass
+
+class Email(Target):
+    transport = 'email'
+
+    def __init__(self, email_address):
+        self.email_address = email_address
+    
+    @property
+    def destination(self) -> str:
+        return self.email_address
+    
+    def notify(self, message: str) -> str:
+        # real delivery goes through dispatcher.SMTPTransport when the pager has a dispatcher;
+        # the shared message is handed back as is, describe() formats on demand
+        return message
+    
+    def describe(self, message: str) -> str:
+        return f'Emailing {self.email_address}: {message}'
+    
+class SMS(Target):
+    transport = 'sms'
+
+    def __init__(self, phone_number):
+        self.phone_number = phone_number
+    
+    @property
+    def destination(self) -> str:
+        return self.phone_number
+    
+    def notify(self, message: str) -> str:
+        # TODO: send sms adapter here
+        return message
+    
+    def describe(self, message: str) -> str:
+        return f'Sending SMS to {self.phone_number}: {message}'
+
+TARGET_TYPES: Dict[str, Type[Target]] = {'email': Email, 'sms': SMS}
+
+
+def parse_target(label: str) -> Target:
+    # "transport:destination", e.g. "sms:900100200"
+    transport, _, destination = label.partition(':')
+    target_type = TARGET_TYPES.get(transport) or _plugin_target(transport)
+    if target_type is None or not destination:
+        raise ValueError(f'Invalid target: {label!r}')
+    return target_type(destination)
+
+
+def _plugin_target(transport: str) -> Optional[Type[Target]]:
+    # only a transport the built-ins don't know pays for scanning the installed distributions
+    from importlib.metadata import entry_points
+    for entry_point in entry_points(group=TARGET_ENTRY_POINTS):
+        if entry_point.name == transport:
+            TARGET_TYPES[transport] = entry_point.load()
+            return TARGET_TYPES[transport]
+    return None
@@ -0,0 +1,59 @@
+from typing import List, Optional, Tuple
+
+from clock import SYSTEM_CLOCK, Clock
+from event_emitter import EventEmitter
+from metrics import MetricsRegistry
+from policy import DEFAULT_ACK_TIMEOUT
+from scheduler import HeapScheduler
+
+from .alert import Alert, TimeoutEvent
+
+class TimerManager:
+    def __init__(self, event_emitter: EventEmitter, scheduler=None, clock: Clock = SYSTEM_CLOCK, metrics: Optional[MetricsRegistry] = None):
+        self.event_emitter: EventEmitter = event_emitter
+        self.clock: Clock = clock
+        # a single dispatcher thread serves every timer, see scheduler.HeapScheduler
+        self.scheduler = scheduler if scheduler is not None else HeapScheduler(time_fn=clock.monotonic)
+        self.timers = {} # Dictionary with alert as key and timer as value
+        self.metrics: MetricsRegistry = metrics if metrics is not None else MetricsRegistry()
+        self.metrics.gauge('pager_timers_pending', 'Acknowledgement timers armed', function=lambda: len(self.timers))
+        self._fired = self.metrics.counter('pager_timers_fired_total', 'Acknowledgement timers expired')
+        self._lateness = self.metrics.histogram('pager_timer_lateness_seconds', 'Delay between a timer deadline and its timeout being emitted')
+    
+    def set_timer(self, alert, seconds: Optional[int] = None):
+        timeout: float = seconds if seconds else DEFAULT_ACK_TIMEOUT
+        # re-arming replaces the previous timer instead of leaking it
+        self.cancel_timer(alert)
+        self.timers[alert] = self.scheduler.schedule(timeout, self._handle_timeout, alert)
+    
+    def set_deadline(self, alert, deadline: float):
+        # deadline on clock.monotonic(), e.g. a step of the alert's escalation schedule
+        self.cancel_timer(alert)
+        self.timers[alert] = self.scheduler.schedule_at(deadline, self._handle_timeout, alert)
+    
+    def set_deadlines(self, deadlines: List[Tuple[Alert, float]]):
+        # one scheduler operation for the whole batch
+        for alert, _ in deadlines:
+            self.cancel_timer(alert)
+        timers = self.scheduler.schedule_many_at([(deadline, self._handle_timeout, (alert,)) for alert, deadline in deadlines])
+        self.timers.update(zip((alert for alert, _ in deadlines), timers))
+    
+    def cancel_timer(self, alert):
+        if alert in self.timers:
+            self.scheduler.cancel(self.timers.pop(alert))
+    
+    def deadline(self, alert) -> Optional[float]:
+        # wall-clock (epoch seconds) expiry of the alert's timer, None when it has no pending timer
+        timer = self.timers.get(alert)
+        remaining = self.scheduler.remaining(timer) if timer is not None else None
+        return self.clock.time() + remaining if remaining is not None else None
+    
+    def _handle_timeout(self, alert: Alert):
+        timer = self.timers.get(alert)
+        if timer is not None:
+            self._lateness.observe(self.clock.monotonic() - timer.deadline)
+        self._fired.inc()
+        self.event_emitter.emit('timeout', TimeoutEvent(alert))
+    
+    def __str__(self):
+        return f"Timers: {self.timers}"
@@ -0,0 +1,148 @@
+import csv
+import json
+import threading
+import time
+from array import array
+from typing import Callable, Iterable, Iterator, NamedTuple, Optional, TextIO, Union
+
+from policy import intern_service, service_name, target_name
+
+SENT = 0
+QUEUED = 1
+DROPPED = 2
+SUPPRESSED = 3
+STATUSES = ('sent', 'queued', 'dropped', 'suppressed')
+
+
+class NotificationRecord(NamedTuple):
+    timestamp: float
+    service_id: int
+    level: int
+    target_id: int
+    status: int
+
+    @property
+    def service_name(self) -> str:
+        return service_name(self.service_id)
+
+    @property
+    def target(self) -> str:
+        return target_name(self.target_id)
+
+    @property
+    def status_name(self) -> str:
+        return STATUSES[self.status]
+
+    def as_dict(self) -> dict:
+        return {
+            'timestamp': self.timestamp,
+            'service': self.service_name,
+            'level': self.level,
+            'target': self.target,
+            'status': self.status_name,
+        }
+
+
+class NotificationLog:
+    """
+    Fixed-capacity ring buffer of notification records.
+
+    Each field lives in its own preallocated array, so a record costs 21 bytes whatever the
+    message, and memory stays flat however long the process runs: once capacity records
+    are stored, every append overwrites the oldest one.
+    """
+
+    __slots__ = ('capacity', 'total', '_time', '_timestamps', '_service_ids', '_levels', '_target_ids', '_statuses', '_lock')
+
+    def __init__(self, capacity: int = 100_000, time_fn: Callable[[], float] = time.time):
+        if capacity <= 0:
+            raise ValueError('Notification log capacity must be positive')
+        self.capacity: int = capacity
+        self._time = time_fn
+        self.total: int = 0 # records ever appended, including the ones overwritten
+        self._timestamps = array('d', bytes(8 * capacity))
+        self._service_ids = array('i', bytes(4 * capacity))
+        self._levels = array('i', bytes(4 * capacity))
+        self._target_ids = array('i', bytes(4 * capacity))
+        self._statuses = array('b', bytes(capacity))
+        self._lock = threading.Lock()
+
+    def append(self, service_id: int, level: int, target_id: int, status: int = SENT, timestamp: Optional[float] = None):
+        with self._lock:
+            index = self.total % self.capacity
+            self._timestamps[index] = self._time() if timestamp is None else timestamp
+            self._service_ids[index] = service_id
+            self._levels[index] = level
+            self._target_ids[index] = target_id
+            self._statuses[index] = status
+            self.total += 1
+
+    def extend(self, records: Iterable[tuple]):
+        """
+        Appends (service_id, level, target_id, status) tuples under a single lock acquisition.
+        """
+        timestamp = self._time()
+        with self._lock:
+            for service_id, level, target_id, status in records:
+                index = self.total % self.capacity
+                self._timestamps[index] = timestamp
+                self._service_ids[index] = service_id
+                self._levels[index] = level
+                self._target_ids[index] = target_id
+                self._statuses[index] = status
+                self.total += 1
+
+    def records(self, service: Union[str, int, None] = None, since: Optional[float] = None, until: Optional[float] = None) -> Iterator[NotificationRecord]:
+        """
+        Yields the retained records, oldest first, optionally only those of one service
+        (name or id) and within [since, until). Records overwritten while iterating are skipped.
+        """
+        service_id = intern_service(service) if isinstance(service, str) else service
+        position = max(0, self.total - self.capacity)
+        while position < self.total:
+            with self._lock:
+                if position < self.total - self.capacity:
+                    # the writer lapped the reader
+                    position = self.total - self.capacity
+                index = position % self.capacity
+                record = NotificationRecord(
+                    self._timestamps[index],
+                    self._service_ids[index],
+                    self._levels[index],
+                    self._target_ids[index],
+                    self._statuses[index],
+                )
+            position += 1
+            if service_id is not None and record.service_id != service_id:
+                continue
+            if since is not None and record.timestamp < since:
+                continue
+            if until is not None and record.timestamp >= until:
+                continue
+            yield record
+
+    def export_jsonl(self, output: TextIO, **filters) -> int:
+        count = 0
+        for record in self.records(**filters):
+            output.write(json.dumps(record.as_dict()))
+            output.write('\n')
+            count += 1
+        return count
+
+    def export_csv(self, output: TextIO, **filters) -> int:
+        writer = csv.writer(output)
+        writer.writerow(('timestamp', 'service', 'level', 'target', 'status'))
+        count = 0
+        for record in self.records(**filters):
+            writer.writerow(record.as_dict().values())
+            count += 1
+        return count
+
+    def __iter__(self) -> Iterator[NotificationRecord]:
+        return self.records()
+
+    def __len__(self) -> int:
+        return min(self.total, self.capacity)
+
+    def __str__(self):
+        return f"NotificationLog({len(self)} of {self.total} records, capacity {self.capacity})"
@@ -0,0 +1,195 @@
+import functools
+import sys
+import threading
+from typing import Dict, Iterable, List, Optional, Tuple
+
+# seconds a level waits for an acknowledgement when neither the level nor the service sets one
+DEFAULT_ACK_TIMEOUT = 15 * 60
+
+_service_ids: Dict[str, int] = {}
+_service_names: List[str] = []
+_intern_lock = threading.Lock()
+
+
+def intern_service(service_name: str) -> int:
+    """
+    Returns the process-wide integer id of a service name, allocating it on first use.
+    Ids never change, so alerts opened under one compiled policy stay valid under the next.
+    """
+    service_id = _service_ids.get(service_name)
+    if service_id is None:
+        with _intern_lock:
+            service_id = _service_ids.get(service_name)
+            if service_id is None:
+                service_id = len(_service_names)
+                _service_names.append(sys.intern(service_name))
+                _service_ids[_service_names[service_id]] = service_id
+    return service_id
+
+
+def service_name(service_id: int) -> str:
+    return _service_names[service_id]
+
+
+_target_ids: Dict[str, int] = {}
+_target_labels: List[str] = []
+
+
+def target_label(target) -> str:
+    transport = getattr(target, 'transport', None)
+    destination = getattr(target, 'destination', None)
+    if transport is not None and destination is not None:
+        return f'{transport}:{destination}'
+    return f'{type(target).__name__}:{id(target):x}'
+
+
+def intern_target(target) -> int:
+    """
+    Returns the process-wide integer id of a target, keyed on its transport and destination:
+    two SMS targets for the same phone number share an id.
+    """
+    label = target_label(target)
+    target_id = _target_ids.get(label)
+    if target_id is None:
+        with _intern_lock:
+            target_id = _target_ids.get(label)
+            if target_id is None:
+                target_id = len(_target_labels)
+                _target_labels.append(sys.intern(label))
+                _target_ids[_target_labels[target_id]] = target_id
+    return target_id
+
+
+def target_name(target_id: int) -> str:
+    return _target_labels[target_id]
+
+
+class CompiledEscalationPolicy:
+    """
+    Immutable, validated form of an EscalationPolicy.
+
+    The targets of every (service, level) pair live in one flat tuple of tuples, and
+    levels[service_id] is the slice of it for one service (an empty tuple for unknown ids),
+    so a lookup is two tuple indexings with no bounds checks of its own: the ranges are fixed
+    at compile time and an out-of-range id or level is an IndexError, answered with None.
+    Levels are never negative. Instances are never mutated: a policy change compiles a new
+    instance and swaps the reference.
+
+    Acknowledgement timeouts are resolved (level, else service, else DEFAULT_ACK_TIMEOUT) and
+    accumulated into one schedule per service: schedules[service_id][level] is how long after
+    the alert opened that level times out.
+    """
+
+    __slots__ = ('levels', 'level_target_ids', 'level_counts', 'table', 'target_ids_table', 'service_ids', 'schedules')
+
+    def __init__(self, offsets: tuple, level_counts: tuple, table: tuple, target_ids_table: tuple, service_ids: frozenset, schedules: tuple):
+        self.level_counts: Tuple[int, ...] = level_counts
+        self.table: Tuple[tuple, ...] = table
+        self.target_ids_table: Tuple[tuple, ...] = target_ids_table # interned target ids, parallel to table
+        # per service id, the slices of table and target_ids_table for its levels; they share the inner tuples
+        self.levels: Tuple[Tuple[tuple, ...], ...] = tuple(
+            table[offset:offset + count] if offset >= 0 else () for offset, count in zip(offsets, level_counts)
+        )
+        self.level_target_ids: Tuple[Tuple[tuple, ...], ...] = tuple(
+            target_ids_table[offset:offset + count] if offset >= 0 else () for offset, count in zip(offsets, level_counts)
+        )
+        self.service_ids: frozenset = service_ids
+        self.schedules: Tuple[Optional[Tuple[float, ...]], ...] = schedules
+
+    @classmethod
+    def compile(cls, policies: dict) -> 'CompiledEscalationPolicy':
+        entries = []
+        for name, policy in policies.items():
+            if not isinstance(name, str):
+                raise ValueError(f'Escalation policy key must be a service name, got {name!r}')
+            if policy.monitored_service.service_name != name:
+                raise ValueError(f'Escalation policy for {name} monitors {policy.monitored_service.service_name}')
+            if not policy.levels:
+                raise ValueError(f'Escalation policy for {name} has no levels')
+            schedule = escalation_schedule(name, getattr(policy, 'timeout', None), [getattr(level, 'timeout', None) for level in policy.levels])
+            levels = []
+            for level_index, level in enumerate(policy.levels):
+                if not level.targets:
+                    raise ValueError(f'Escalation policy for {name} has no targets at level {level_index}')
+                for target in level.targets:
+                    if not callable(getattr(target, 'notify', None)):
+                        raise ValueError(f'Escalation policy for {name} has an invalid target at level {level_index}: {target!r}')
+                levels.append(tuple(level.targets))
+            entries.append((intern_service(name), levels, schedule))
+
+        size = max((service_id for service_id, _, _ in entries), default=-1) + 1
+        offsets = [-1] * size
+        level_counts = [0] * size
+        schedules = [None] * size
+        table = []
+        for service_id, levels, schedule in entries:
+            offsets[service_id] = len(table)
+            level_counts[service_id] = len(levels)
+            schedules[service_id] = schedule
+            table.extend(levels)
+        target_ids_table = tuple(tuple(intern_target(target) for target in targets) for targets in table)
+        return cls(
+            tuple(offsets), tuple(level_counts), tuple(table), target_ids_table,
+            frozenset(service_id for service_id, _, _ in entries), tuple(schedules)
+        )
+
+    def targets(self, service_id: int, level: int) -> Optional[tuple]:
+        try:
+            return self.levels[service_id][level]
+        except IndexError:
+            return None
+
+    def target_ids(self, service_id: int, level: int) -> Optional[tuple]:
+        try:
+            return self.level_target_ids[service_id][level]
+        except IndexError:
+            return None
+
+    def schedule(self, service_id: int) -> Optional[Tuple[float, ...]]:
+        try:
+            return self.schedules[service_id]
+        except IndexError:
+            return None
+
+    def timeout(self, service_id: int, level: int) -> Optional[float]:
+        schedule = self.schedule(service_id)
+        if schedule is None or not 0 <= level < len(schedule):
+            return None
+        return schedule[level] - (schedule[level - 1] if level else 0.0)
+
+    def level_count(self, service_id: int) -> int:
+        try:
+            return self.level_counts[service_id]
+        except IndexError:
+            return 0
+
+    def __contains__(self, service_id: int) -> bool:
+        return service_id in self.service_ids
+
+    def __len__(self) -> int:
+        return len(self.service_ids)
+
+
+@functools.lru_cache(maxsize=256)
+def uniform_schedule(timeout: float, levels: int) -> Tuple[float, ...]:
+    # the schedule of a policy whose every level waits timeout seconds, one shared tuple per shape
+    return tuple(timeout * (level + 1) for level in range(levels))
+
+
+def escalation_schedule(name: str, service_timeout: Optional[float], level_timeouts: Iterable[Optional[float]]) -> Tuple[float, ...]:
+    # cumulative deadlines of a service's levels; a level without a timeout uses the service's, else the default
+    default = _timeout(service_timeout, name, DEFAULT_ACK_TIMEOUT)
+    schedule = []
+    elapsed = 0.0
+    for timeout in level_timeouts:
+        elapsed += _timeout(timeout, name, default)
+        schedule.append(elapsed)
+    return tuple(schedule)
+
+
+def _timeout(timeout, name: str, default: float) -> float:
+    if timeout is None:
+        return default
+    if not isinstance(timeout, (int, float)) or timeout <= 0:
+        raise ValueError(f'Escalation policy for {name} has an invalid timeout: {timeout!r}')
+    return float(timeout)
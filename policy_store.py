@@ -0,0 +1,410 @@
+"""
+Escalation policies kept in a file: a JSON or YAML source, compiled into a binary snapshot
+that is memory-mapped and read in place.
+
+    python -m policy_store policy.yaml [--snapshot policy.yaml.snapshot]
+
+compiles a source by hand; PolicyStore does it on load when the snapshot is older than the source.
+"""
+import argparse
+import bisect
+import json
+import mmap
+import os
+import struct
+import threading
+import zlib
+from collections.abc import Mapping
+from typing import Dict, Iterator, List, NamedTuple, Optional, Tuple
+
+from models import EscalationPolicy, EscalationPolicyLevel, EscalationPolicyMonitoredService, MonitoredService, parse_target, policy_entry
+from policy import escalation_schedule, intern_target, service_name
+
+# snapshot layout, little-endian, every table a packed array of fixed-size rows:
+#   header    magic, version, row counts, then the offset of every table
+#   services  (name offset, name length, first level, level count, digest), sorted by UTF-8 name
+#   levels    (first target ref, target ref count, deadline), deadline cumulative seconds
+#   refs      label index of every target of every level
+#   labels    (offset, length) of every distinct target label
+#   strings   UTF-8 service names and target labels
+MAGIC = b'PAGERPOL'
+VERSION = 1
+HEADER = struct.Struct('<8sIIIIIIIIII')
+SERVICE = struct.Struct('<IIIII')
+LEVEL = struct.Struct('<IId')
+REF = struct.Struct('<I')
+LABEL = struct.Struct('<II')
+
+
+def load_source(path: str) -> dict:
+    # YAML needs PyYAML, only imported for .yaml/.yml sources
+    with open(path, encoding='utf-8') as source:
+        if path.endswith(('.yaml', '.yml')):
+            try:
+                import yaml
+            except ImportError:
+                raise ValueError(f'{path}: YAML policies need PyYAML (pip install pyyaml)')
+            return yaml.safe_load(source) or {}
+        return json.load(source)
+
+
+def write_snapshot(document: dict, path: str):
+    """
+    Validates a policy document (see models.policy_entry) and writes its snapshot to path,
+    atomically: readers still mapping the previous file keep reading it.
+    """
+    if not isinstance(document, dict):
+        raise ValueError('An escalation policy is an object keyed by service name')
+    strings = bytearray()
+    labels: Dict[str, int] = {}
+    label_rows: List[tuple] = []
+    services: List[tuple] = []
+    levels: List[tuple] = []
+    refs: List[int] = []
+    for name in sorted(document, key=lambda name: name.encode('utf-8') if isinstance(name, str) else b''):
+        if not isinstance(name, str):
+            raise ValueError(f'Escalation policy key must be a service name, got {name!r}')
+        service_timeout, entry_levels = policy_entry(name, document[name])
+        if not entry_levels:
+            raise ValueError(f'Escalation policy for {name} has no levels')
+        schedule = escalation_schedule(name, service_timeout, [timeout for _, timeout in entry_levels])
+        first_level = len(levels)
+        for level_index, ((level_labels, _), deadline) in enumerate(zip(entry_levels, schedule)):
+            if not level_labels:
+                raise ValueError(f'Escalation policy for {name} has no targets at level {level_index}')
+            levels.append((len(refs), len(level_labels), deadline))
+            for label in level_labels:
+                if label not in labels:
+                    parse_target(label) # validates it
+                    encoded = label.encode('utf-8')
+                    labels[label] = len(label_rows)
+                    label_rows.append((len(strings), len(encoded)))
+                    strings += encoded
+                refs.append(labels[label])
+        encoded = name.encode('utf-8')
+        # the digest covers what the service compiles to, reload compares it to find changes
+        digest = zlib.crc32(repr((service_timeout, entry_levels)).encode('utf-8'))
+        services.append((len(strings), len(encoded), first_level, len(entry_levels), digest))
+        strings += encoded
+
+    tables = [
+        b''.join(SERVICE.pack(*row) for row in services),
+        b''.join(LEVEL.pack(*row) for row in levels),
+        struct.pack(f'<{len(refs)}I', *refs),
+        b''.join(LABEL.pack(*row) for row in label_rows),
+        bytes(strings),
+    ]
+    offsets = []
+    position = HEADER.size
+    for table in tables:
+        offsets.append(position)
+        position += len(table)
+    temporary_path = f'{path}.tmp'
+    with open(temporary_path, 'wb') as snapshot:
+        snapshot.write(HEADER.pack(MAGIC, VERSION, len(services), len(levels), len(refs), len(label_rows), *offsets))
+        for table in tables:
+            snapshot.write(table)
+        snapshot.flush()
+        os.fsync(snapshot.fileno())
+    os.replace(temporary_path, path)
+
+
+class PolicySnapshot:
+    """
+    Read-only view of a snapshot file. Nothing is decoded up front: opening one costs the
+    same for fifty services or fifty thousand, and a lookup is a binary search over the
+    memory-mapped services table.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        with open(path, 'rb') as snapshot:
+            size = os.fstat(snapshot.fileno()).st_size
+            if size < HEADER.size:
+                raise ValueError(f'{path} is not a policy snapshot')
+            self._map = mmap.mmap(snapshot.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, self.service_count, self.level_count, ref_count, label_count, *offsets = HEADER.unpack_from(self._map)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f'{path} is not a version {VERSION} policy snapshot')
+        self._services, self._levels, self._refs, self._labels, self._strings = offsets
+        if self._strings > size or self._labels + label_count * LABEL.size > self._strings:
+            raise ValueError(f'{path} is truncated')
+
+    def __len__(self) -> int:
+        return self.service_count
+
+    def name(self, index: int) -> str:
+        offset, length = struct.unpack_from('<II', self._map, self._services + index * SERVICE.size)
+        start = self._strings + offset
+        return self._map[start:start + length].decode('utf-8')
+
+    def names(self) -> Iterator[str]:
+        return (self.name(index) for index in range(self.service_count))
+
+    def find(self, name: str) -> Optional[int]:
+        # index of the service's row, services are sorted by their UTF-8 name
+        index = bisect.bisect_left(_EncodedNames(self), name.encode('utf-8'))
+        if index < self.service_count and self.name(index) == name:
+            return index
+        return None
+
+    def digest(self, index: int) -> int:
+        return SERVICE.unpack_from(self._map, self._services + index * SERVICE.size)[4]
+
+    def digests(self) -> Dict[str, int]:
+        return {self.name(index): self.digest(index) for index in range(self.service_count)}
+
+    def levels(self, index: int) -> List[Tuple[Tuple[str, ...], float]]:
+        # (target labels, deadline) of every level of a service
+        _, _, first_level, level_count, _ = SERVICE.unpack_from(self._map, self._services + index * SERVICE.size)
+        levels = []
+        for level in range(first_level, first_level + level_count):
+            first_ref, ref_count, deadline = LEVEL.unpack_from(self._map, self._levels + level * LEVEL.size)
+            label_indexes = struct.unpack_from(f'<{ref_count}I', self._map, self._refs + first_ref * REF.size)
+            levels.append((tuple(self._label(label_index) for label_index in label_indexes), deadline))
+        return levels
+
+    def close(self):
+        self._map.close()
+
+    def _label(self, label_index: int) -> str:
+        offset, length = LABEL.unpack_from(self._map, self._labels + label_index * LABEL.size)
+        start = self._strings + offset
+        return self._map[start:start + length].decode('utf-8')
+
+    def _encoded_name(self, index: int) -> bytes:
+        offset, length = struct.unpack_from('<II', self._map, self._services + index * SERVICE.size)
+        start = self._strings + offset
+        return self._map[start:start + length]
+
+
+class _EncodedNames:
+    # the sorted service names as a sequence bisect can search without decoding every row
+    def __init__(self, snapshot: PolicySnapshot):
+        self.snapshot = snapshot
+
+    def __len__(self) -> int:
+        return self.snapshot.service_count
+
+    def __getitem__(self, index: int) -> bytes:
+        return self.snapshot._encoded_name(index)
+
+
+class SnapshotCompiledPolicy:
+    """
+    CompiledEscalationPolicy read from a PolicySnapshot: a service's levels are decoded and
+    its targets built the first time the service is looked up, then kept.
+    """
+
+    def __init__(self, snapshot: PolicySnapshot, entries: Optional[dict] = None):
+        self.snapshot = snapshot
+        self._entries: Dict[int, Optional[tuple]] = entries if entries is not None else {} # { service_id: (targets, target ids, schedule) or None }
+        self._targets: Dict[str, object] = {} # { label: Target }, shared across services
+        self._lock = threading.Lock()
+
+    def targets(self, service_id: int, level: int) -> Optional[tuple]:
+        entry = self._entry(service_id)
+        if entry is None or not 0 <= level < len(entry[0]):
+            return None
+        return entry[0][level]
+
+    def target_ids(self, service_id: int, level: int) -> Optional[tuple]:
+        entry = self._entry(service_id)
+        if entry is None or not 0 <= level < len(entry[1]):
+            return None
+        return entry[1][level]
+
+    def schedule(self, service_id: int) -> Optional[Tuple[float, ...]]:
+        entry = self._entry(service_id)
+        return entry[2] if entry is not None else None
+
+    def timeout(self, service_id: int, level: int) -> Optional[float]:
+        schedule = self.schedule(service_id)
+        if schedule is None or not 0 <= level < len(schedule):
+            return None
+        return schedule[level] - (schedule[level - 1] if level else 0.0)
+
+    def level_count(self, service_id: int) -> int:
+        entry = self._entry(service_id)
+        return len(entry[0]) if entry is not None else 0
+
+    def __contains__(self, service_id: int) -> bool:
+        return self._entry(service_id) is not None
+
+    def __len__(self) -> int:
+        return len(self.snapshot)
+
+    def _entry(self, service_id: int) -> Optional[tuple]:
+        try:
+            return self._entries[service_id]
+        except KeyError:
+            pass
+        try:
+            index = self.snapshot.find(service_name(service_id))
+        except IndexError:
+            index = None # not an interned service id
+        entry = None
+        if index is not None:
+            levels = self.snapshot.levels(index)
+            with self._lock:
+                targets = tuple(tuple(self._target(label) for label in labels) for labels, _ in levels)
+            entry = (targets, tuple(tuple(intern_target(target) for target in level) for level in targets), tuple(deadline for _, deadline in levels))
+        return self._entries.setdefault(service_id, entry)
+
+    def _target(self, label: str):
+        target = self._targets.get(label)
+        if target is None:
+            target = self._targets[label] = parse_target(label)
+        return target
+
+
+class SnapshotPolicies(Mapping):
+    """
+    The policies mapping of a SnapshotEscalationPolicy: {service name: EscalationPolicyMonitoredService}
+    built on first access from the compiled view, one MonitoredService per name for the mapping's lifetime.
+    """
+
+    def __init__(self, compiled: SnapshotCompiledPolicy, services: Optional[Dict[str, MonitoredService]] = None,
+                 policies: Optional[Dict[str, EscalationPolicyMonitoredService]] = None):
+        self.compiled = compiled
+        self.services: Dict[str, MonitoredService] = services if services is not None else {}
+        self._policies: Dict[str, EscalationPolicyMonitoredService] = policies if policies is not None else {}
+        self._lock = threading.Lock()
+
+    def __getitem__(self, name: str) -> EscalationPolicyMonitoredService:
+        policy = self._policies.get(name)
+        if policy is not None:
+            return policy
+        if not isinstance(name, str) or self.compiled.snapshot.find(name) is None:
+            raise KeyError(name)
+        with self._lock:
+            service = self.services.get(name)
+            if service is None:
+                service = self.services[name] = MonitoredService(name)
+        compiled = self.compiled
+        schedule = compiled.schedule(service.service_id)
+        policy = EscalationPolicyMonitoredService(service, [
+            EscalationPolicyLevel(list(compiled.targets(service.service_id, level)), compiled.timeout(service.service_id, level))
+            for level in range(len(schedule))
+        ])
+        return self._policies.setdefault(name, policy)
+
+    def __contains__(self, name) -> bool:
+        return isinstance(name, str) and self.compiled.snapshot.find(name) is not None
+
+    def __iter__(self) -> Iterator[str]:
+        return self.compiled.snapshot.names()
+
+    def __len__(self) -> int:
+        return len(self.compiled.snapshot)
+
+
+class SnapshotEscalationPolicy(EscalationPolicy):
+    # an EscalationPolicy whose compile() is free: the snapshot was validated when written
+    def __init__(self, snapshot: PolicySnapshot, compiled: Optional[SnapshotCompiledPolicy] = None,
+                 services: Optional[Dict[str, MonitoredService]] = None, policies: Optional[Dict[str, EscalationPolicyMonitoredService]] = None):
+        self.snapshot = snapshot
+        self.compiled = compiled if compiled is not None else SnapshotCompiledPolicy(snapshot)
+        super().__init__(SnapshotPolicies(self.compiled, services, policies))
+
+    def compile(self) -> SnapshotCompiledPolicy:
+        return self.compiled
+
+
+class PolicyDiff(NamedTuple):
+    added: List[str]
+    changed: List[str]
+    removed: List[str]
+
+
+def _built_services(escalation_policy: EscalationPolicy) -> Dict[str, MonitoredService]:
+    # the MonitoredService of every service the policy has handed out so far
+    policies = escalation_policy.policies
+    if isinstance(policies, SnapshotPolicies):
+        return dict(policies.services)
+    return {name: policy.monitored_service for name, policy in policies.items()}
+
+
+class PolicyStore:
+    """
+    A policy source file and its compiled snapshot (source path + '.snapshot' by default).
+
+    load() maps the snapshot, recompiling it first when it is missing or older than the source.
+    reload() recompiles the source and diffs it service by service against the policy in use:
+    unchanged services keep their MonitoredService and everything already built for them,
+    only added and changed ones are decoded again, on their next lookup. Open alerts stay
+    attached to their MonitoredService, so they escalate on with the new policy.
+    """
+
+    def __init__(self, source_path: str, snapshot_path: Optional[str] = None):
+        self.source_path = source_path
+        self.snapshot_path = snapshot_path if snapshot_path is not None else f'{source_path}.snapshot'
+        self.policy: Optional[SnapshotEscalationPolicy] = None
+
+    def load(self) -> SnapshotEscalationPolicy:
+        if not os.path.exists(self.snapshot_path) or os.path.getmtime(self.snapshot_path) < os.path.getmtime(self.source_path):
+            write_snapshot(load_source(self.source_path), self.snapshot_path)
+        self.policy = SnapshotEscalationPolicy(PolicySnapshot(self.snapshot_path))
+        return self.policy
+
+    def reload(self, pager_service=None) -> PolicyDiff:
+        """
+        Recompiles the source and swaps the new policy in, into pager_service too when given.
+        An invalid source raises ValueError and leaves the policy in use untouched.
+        """
+        write_snapshot(load_source(self.source_path), self.snapshot_path)
+        # the old map stays open until the last reference to the old policy is gone
+        snapshot = PolicySnapshot(self.snapshot_path)
+        old_policy = self.policy
+        old_digests = old_policy.snapshot.digests() if old_policy is not None else {}
+        diff = PolicyDiff([], [], [])
+        kept = set()
+        for index in range(len(snapshot)):
+            name = snapshot.name(index)
+            digest = old_digests.pop(name, None)
+            if digest is None:
+                diff.added.append(name)
+            elif digest != snapshot.digest(index):
+                diff.changed.append(name)
+            else:
+                kept.add(name)
+        diff.removed.extend(old_digests)
+
+        # every surviving service keeps its MonitoredService, unchanged ones what was built for them too.
+        # The pager's own services win: PUT /policy may have replaced the store's policy, and
+        # its open alerts are attached to the MonitoredService objects it is using
+        services = {}
+        policies = {}
+        entries = {}
+        if old_policy is not None:
+            services.update((name, service) for name, service in old_policy.policies.services.items() if name not in old_digests)
+        if pager_service is not None:
+            services.update((name, service) for name, service in _built_services(pager_service.escalation_policy).items() if snapshot.find(name) is not None)
+        if old_policy is not None:
+            policies = {
+                name: policy for name, policy in old_policy.policies._policies.items()
+                if name in kept and policy.monitored_service is services.get(name)
+            }
+            old_entries = old_policy.compiled._entries
+            entries = {
+                service.service_id: old_entries[service.service_id]
+                for name, service in services.items() if name in kept and service.service_id in old_entries
+            }
+        self.policy = SnapshotEscalationPolicy(snapshot, SnapshotCompiledPolicy(snapshot, entries), services, policies)
+        if pager_service is not None:
+            pager_service.update_escalation_policy(self.policy)
+        return diff
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Compile an escalation policy source into its snapshot')
+    parser.add_argument('source', help='JSON or YAML policy, {service: [[target, ...] per level]}')
+    parser.add_argument('--snapshot', help='output path, source path + .snapshot by default')
+    args = parser.parse_args()
+    snapshot_path = args.snapshot or f'{args.source}.snapshot'
+    write_snapshot(load_source(args.source), snapshot_path)
+    print(f'{snapshot_path}: {len(PolicySnapshot(snapshot_path))} services')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,83 @@
+import threading
+from typing import Iterator, List
+
+
+class AlertRegistry:
+    """
+    Open alerts keyed by MonitoredService, split into lock stripes, and indexed by alert_id.
+
+    A service always maps to the same stripe, so holding lock(service) makes a whole
+    receive/ack/timeout/healthy transition for that service atomic while transitions of
+    services on other stripes run in parallel. Locks are reentrant: the mapping methods
+    can be called while the stripe lock is already held. The id index is a single dict,
+    updated under the stripe lock of the alert's service.
+    """
+
+    def __init__(self, stripes: int = 64):
+        self._locks = [threading.RLock() for _ in range(stripes)]
+        self._alerts = [{} for _ in range(stripes)]
+        self._ids = {} # { alert_id: Alert }
+
+    def lock(self, monitored_service) -> threading.RLock:
+        return self._locks[hash(monitored_service) % len(self._locks)]
+
+    def _stripe(self, monitored_service) -> dict:
+        return self._alerts[hash(monitored_service) % len(self._alerts)]
+
+    def get(self, monitored_service, default=None):
+        with self.lock(monitored_service):
+            return self._stripe(monitored_service).get(monitored_service, default)
+
+    def by_id(self, alert_id: int):
+        # the open alert with this id, None once it is acknowledged or resolved
+        return self._ids.get(alert_id)
+
+    def pop(self, monitored_service, *default):
+        with self.lock(monitored_service):
+            stripe = self._stripe(monitored_service)
+            if monitored_service in stripe:
+                self._ids.pop(stripe[monitored_service].alert_id, None)
+            return stripe.pop(monitored_service, *default)
+
+    def values(self) -> List:
+        return [alert for _, alert in self.items()]
+
+    def items(self) -> List:
+        items = []
+        for lock, stripe in zip(self._locks, self._alerts):
+            with lock:
+                items.extend(stripe.items())
+        return items
+
+    def __getitem__(self, monitored_service):
+        with self.lock(monitored_service):
+            return self._stripe(monitored_service)[monitored_service]
+
+    def __setitem__(self, monitored_service, alert):
+        with self.lock(monitored_service):
+            stripe = self._stripe(monitored_service)
+            if monitored_service in stripe:
+                self._ids.pop(stripe[monitored_service].alert_id, None)
+            stripe[monitored_service] = alert
+            self._ids[alert.alert_id] = alert
+
+    def __delitem__(self, monitored_service):
+        with self.lock(monitored_service):
+            alert = self._stripe(monitored_service).pop(monitored_service)
+            self._ids.pop(alert.alert_id, None)
+
+    def __contains__(self, monitored_service) -> bool:
+        with self.lock(monitored_service):
+            return monitored_service in self._stripe(monitored_service)
+
+    def __iter__(self) -> Iterator:
+        for lock, stripe in zip(self._locks, self._alerts):
+            with lock:
+                services = list(stripe)
+            yield from services
+
+    def __len__(self) -> int:
+        return sum(len(stripe) for stripe in self._alerts)
+
+    def __str__(self):
+        return f"{dict(self.items())}"
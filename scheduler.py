@@ -0,0 +1,224 @@
+import heapq
+import itertools
+import logging
+import threading
+import time
+from typing import Callable, Iterable, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class ScheduledTimer:
+    __slots__ = ('deadline', 'callback', 'args', 'active')
+
+    def __init__(self, deadline: float, callback: Callable, args: tuple):
+        self.deadline: float = deadline
+        self.callback: Callable = callback
+        self.args: tuple = args
+        self.active: bool = True
+
+
+class HeapScheduler:
+    """
+    Runs every timer from a single dispatcher thread ordered by a min-heap of deadlines.
+
+    Arming is O(log n). Cancelling is O(1): the entry is only flagged and is dropped
+    when it reaches the top of the heap (lazy deletion). The heap is rebuilt once
+    cancelled entries outnumber live ones so a cancel-heavy workload can't grow it forever.
+    """
+
+    COMPACT_THRESHOLD = 1024
+
+    def __init__(self, time_fn: Callable[[], float] = time.monotonic):
+        self._time = time_fn
+        self._heap: List[Tuple[float, int, ScheduledTimer]] = []
+        self._sequence = itertools.count()
+        self._cancelled = 0
+        self._condition = threading.Condition()
+        self._thread = None
+        self._closed = False
+
+    def schedule(self, delay: float, callback: Callable, *args) -> ScheduledTimer:
+        return self.schedule_at(self._time() + delay, callback, *args)
+
+    def schedule_at(self, deadline: float, callback: Callable, *args) -> ScheduledTimer:
+        # deadline on the scheduler's time_fn clock; one already past fires right away
+        timer = ScheduledTimer(deadline, callback, args)
+        with self._condition:
+            heapq.heappush(self._heap, (timer.deadline, next(self._sequence), timer))
+            self._ensure_dispatcher()
+            if self._heap[0][2] is timer:
+                # the new timer is the earliest one, the dispatcher must shorten its wait
+                self._condition.notify()
+        return timer
+
+    def schedule_many(self, entries: Iterable[Tuple[float, Callable, tuple]]) -> List[ScheduledTimer]:
+        """
+        Arms a batch of (delay, callback, args) timers under a single lock acquisition and
+        a single dispatcher wake-up.
+        """
+        now = self._time()
+        return self.schedule_many_at([(now + delay, callback, args) for delay, callback, args in entries])
+
+    def schedule_many_at(self, entries: Iterable[Tuple[float, Callable, tuple]]) -> List[ScheduledTimer]:
+        # schedule_many with (deadline, callback, args) entries
+        timers = [ScheduledTimer(deadline, callback, args) for deadline, callback, args in entries]
+        if not timers:
+            return timers
+        with self._condition:
+            earliest = self._heap[0][0] if self._heap else None
+            entries = [(timer.deadline, next(self._sequence), timer) for timer in timers]
+            if len(entries) > len(self._heap):
+                # cheaper to rebuild the heap in O(n) than to push one by one
+                self._heap.extend(entries)
+                heapq.heapify(self._heap)
+            else:
+                for entry in entries:
+                    heapq.heappush(self._heap, entry)
+            self._ensure_dispatcher()
+            if earliest is None or self._heap[0][0] < earliest:
+                self._condition.notify()
+        return timers
+
+    def cancel(self, timer: ScheduledTimer):
+        with self._condition:
+            if timer.active:
+                timer.active = False
+                # the flagged entry may sit in the heap until its deadline: drop what it holds
+                timer.callback, timer.args = None, ()
+                self._cancelled += 1
+                if self._cancelled > self.COMPACT_THRESHOLD and self._cancelled * 2 > len(self._heap):
+                    self._compact()
+
+    def remaining(self, timer: ScheduledTimer) -> Optional[float]:
+        if not timer.active:
+            return None
+        return max(0.0, timer.deadline - self._time())
+
+    def close(self):
+        with self._condition:
+            self._closed = True
+            self._condition.notify()
+
+    def __len__(self) -> int:
+        return len(self._heap) - self._cancelled
+
+    def _compact(self):
+        self._heap = [entry for entry in self._heap if entry[2].active]
+        heapq.heapify(self._heap)
+        self._cancelled = 0
+
+    def _ensure_dispatcher(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._dispatch, name='HeapScheduler', daemon=True)
+            self._thread.start()
+
+    def _earliest(self) -> Optional[ScheduledTimer]:
+        # drops cancelled entries from the top of the heap; caller holds the condition
+        while self._heap and not self._heap[0][2].active:
+            heapq.heappop(self._heap)
+            self._cancelled -= 1
+        return self._heap[0][2] if self._heap else None
+
+    def _pop(self) -> ScheduledTimer:
+        timer = heapq.heappop(self._heap)[2]
+        timer.active = False
+        return timer
+
+    def _next_due(self) -> ScheduledTimer:
+        with self._condition:
+            while not self._closed:
+                earliest = self._earliest()
+                if earliest is None:
+                    self._condition.wait()
+                    continue
+                delay = earliest.deadline - self._time()
+                if delay <= 0:
+                    return self._pop()
+                self._condition.wait(delay)
+            return None
+
+    def _dispatch(self):
+        while True:
+            timer = self._next_due()
+            if timer is None:
+                return
+            try:
+                timer.callback(*timer.args)
+            except Exception:
+                # a failing callback must not take the dispatcher (and every other timer) down with it
+                logger.exception('Timer callback failed')
+
+
+class SimulatedScheduler(HeapScheduler):
+    """
+    Discrete-event variant of HeapScheduler for a clock.VirtualClock: there is no dispatcher
+    thread, timers fire from advance(), in deadline order, with the clock set to each deadline.
+    Failing callbacks are counted in errors instead of being logged.
+    """
+
+    def __init__(self, clock):
+        super().__init__(time_fn=clock.monotonic)
+        self.clock = clock
+        self.errors = 0
+
+    def advance(self, seconds: float) -> int:
+        return self.run_until(self.clock.monotonic() + seconds)
+
+    def run_until(self, until: float) -> int:
+        fired = 0
+        while True:
+            with self._condition:
+                earliest = self._earliest()
+                if earliest is None or earliest.deadline > until:
+                    break
+                timer = self._pop()
+            self.clock.set_monotonic(max(timer.deadline, self.clock.monotonic()))
+            try:
+                timer.callback(*timer.args)
+            except Exception:
+                self.errors += 1
+            fired += 1
+        self.clock.set_monotonic(max(until, self.clock.monotonic()))
+        return fired
+
+    def next_deadline(self) -> Optional[float]:
+        with self._condition:
+            earliest = self._earliest()
+            return earliest.deadline if earliest is not None else None
+
+    def _ensure_dispatcher(self):
+        pass
+
+
+class ThreadingTimerScheduler:
+    """
+    Legacy backend: one threading.Timer (one OS thread) per armed timer.
+    """
+
+    def schedule(self, delay: float, callback: Callable, *args) -> threading.Timer:
+        timer = threading.Timer(delay, callback, args=args)
+        timer.daemon = True
+        timer.deadline = time.monotonic() + delay
+        timer.start()
+        return timer
+
+    def schedule_at(self, deadline: float, callback: Callable, *args) -> threading.Timer:
+        return self.schedule(max(0.0, deadline - time.monotonic()), callback, *args)
+
+    def schedule_many(self, entries: Iterable[Tuple[float, Callable, tuple]]) -> List[threading.Timer]:
+        return [self.schedule(delay, callback, *args) for delay, callback, args in entries]
+
+    def schedule_many_at(self, entries: Iterable[Tuple[float, Callable, tuple]]) -> List[threading.Timer]:
+        return [self.schedule_at(deadline, callback, *args) for deadline, callback, args in entries]
+
+    def cancel(self, timer: threading.Timer):
+        timer.cancel()
+
+    def remaining(self, timer: threading.Timer) -> Optional[float]:
+        if timer.finished.is_set():
+            return None
+        return max(0.0, timer.deadline - time.monotonic())
+
+    def close(self):
+        pass
@@ -0,0 +1,157 @@
+import multiprocessing
+import zlib
+from typing import Iterable, List, Optional, Tuple
+
+from models import EscalationPolicy, EscalationPolicyMonitoredService, PagerService
+from models.alert import stride_alert_ids
+
+
+def shard_of(service_name: str, shards: int) -> int:
+    # crc32 rather than hash(): str hashes are salted per process, the owner must not be
+    return zlib.crc32(service_name.encode('utf-8')) % shards
+
+
+def shard_of_alert(alert_id: int, shards: int) -> int:
+    # shard k numbers its alerts k + shards, k + 2 * shards, ... (see _serve_shard)
+    return alert_id % shards
+
+
+def split_policy(escalation_policy: EscalationPolicy, shards: int) -> List[EscalationPolicy]:
+    slices = [{} for _ in range(shards)]
+    for name, policy in escalation_policy.policies.items():
+        slices[shard_of(name, shards)][name] = policy
+    return [EscalationPolicy(policies) for policies in slices]
+
+
+def _serve_shard(connection, escalation_policy: EscalationPolicy, ack_delay: Optional[float], options: dict, shard: int, shards: int):
+    # a shard's main loop: one request in, one reply out, until ('close',)
+    stride_alert_ids(shards + shard, shards)
+    pager_service = PagerService(escalation_policy, **options)
+    while True:
+        request = connection.recv()
+        command = request[0]
+        try:
+            if command == 'events':
+                reply = pager_service.receive_events(request[1], ack_delay)
+            elif command == 'policy':
+                # keep this shard's MonitoredService objects, open alerts are attached to them
+                current = pager_service.escalation_policy.policies
+                reply = pager_service.update_escalation_policy(EscalationPolicy({
+                    name: EscalationPolicyMonitoredService(
+                        current[name].monitored_service if name in current else policy.monitored_service,
+                        policy.levels,
+                        policy.timeout
+                    )
+                    for name, policy in request[1].policies.items()
+                }))
+            elif command == 'metrics':
+                reply = pager_service.metrics.snapshot()
+            elif command == 'close':
+                pager_service.timer_manager.scheduler.close()
+                connection.send(None)
+                return
+            else:
+                raise ValueError(f'Unknown shard command: {command!r}')
+        except Exception as error:
+            reply = error
+        connection.send(reply)
+
+
+class ShardedPagerService:
+    """
+    Runs N PagerService instances in worker processes, one per core, each owning the
+    services whose name hashes to it (shard_of) with their alerts, timers and policy slice.
+
+    The calling process is the router: a batch of (kind, service name) events is split by
+    owner, each shard receives its part over a pipe in the original order and the results
+    are put back in batch order. Every event of a service, alert, acknowledgement or healthy,
+    lands on the same shard, so per-service ordering is kept without any cross-shard state.
+    Alert ids are numbered per shard (shard_of_alert), so ('ack', alert_id) reaches the
+    shard that opened the alert.
+    """
+
+    def __init__(self, escalation_policy: EscalationPolicy, shards: int = 4, ack_delay: Optional[float] = None,
+                 context: Optional[str] = None, **options):
+        if shards <= 0:
+            raise ValueError('A sharded pager needs at least one shard')
+        escalation_policy.compile() # validates before any process starts
+        self.shards = shards
+        self.escalation_policy = escalation_policy
+        multiprocessing_context = multiprocessing.get_context(context)
+        self._connections = []
+        self._processes = []
+        for index, policy_slice in enumerate(split_policy(escalation_policy, shards)):
+            connection, worker_connection = multiprocessing_context.Pipe()
+            process = multiprocessing_context.Process(
+                target=_serve_shard,
+                args=(worker_connection, policy_slice, ack_delay, options, index, shards),
+                name=f'PagerShard-{index}',
+                daemon=True,
+            )
+            process.start()
+            worker_connection.close()
+            self._connections.append(connection)
+            self._processes.append(process)
+
+    def receive_events(self, events: Iterable[Tuple[str, str]]) -> List:
+        """
+        Applies (kind, service name) events, kind being 'alert', 'ack' or 'healthy', and
+        ('ack', alert_id) events, and returns one result per event as PagerService.receive_events does.
+        """
+        events = list(events)
+        batches: List[list] = [[] for _ in range(self.shards)]
+        positions: List[list] = [[] for _ in range(self.shards)]
+        for position, event in enumerate(events):
+            key = event[1]
+            shard = shard_of_alert(key, self.shards) if isinstance(key, int) else shard_of(key, self.shards)
+            batches[shard].append(event)
+            positions[shard].append(position)
+        # every shard gets its batch before any reply is awaited, so they run in parallel
+        busy = [shard for shard in range(self.shards) if batches[shard]]
+        for shard in busy:
+            self._connections[shard].send(('events', batches[shard]))
+        results = [None] * len(events)
+        for shard in busy:
+            replies = self._connections[shard].recv()
+            if isinstance(replies, Exception):
+                replies = [replies] * len(positions[shard])
+            for position, result in zip(positions[shard], replies):
+                results[position] = result
+        return results
+
+    def receive_alert(self, service_name: str):
+        return self.receive_events([('alert', service_name)])[0]
+
+    def acknowledge(self, service_name: str):
+        return self.receive_events([('ack', service_name)])[0]
+
+    def handle_healthy(self, service_name: str):
+        return self.receive_events([('healthy', service_name)])[0]
+
+    def update_escalation_policy(self, escalation_policy: EscalationPolicy):
+        escalation_policy.compile()
+        replies = self._broadcast([('policy', policy_slice) for policy_slice in split_policy(escalation_policy, self.shards)])
+        for reply in replies:
+            if isinstance(reply, Exception):
+                raise reply
+        self.escalation_policy = escalation_policy
+
+    def metrics_snapshots(self) -> List[dict]:
+        # one metrics.MetricsRegistry snapshot per shard
+        return self._broadcast([('metrics',)] * self.shards)
+
+    def close(self):
+        self._broadcast([('close',)] * self.shards)
+        for process in self._processes:
+            process.join()
+
+    def _broadcast(self, requests: List[tuple]) -> list:
+        for connection, request in zip(self._connections, requests):
+            connection.send(request)
+        return [connection.recv() for connection in self._connections]
+
+    def __enter__(self) -> 'ShardedPagerService':
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
@@ -0,0 +1,126 @@
+import json
+from collections import Counter
+from typing import Dict, Iterable, Iterator, List, NamedTuple, Optional
+
+from clock import VirtualClock
+from models import Alert, EscalationPolicy, EscalationPolicyMonitoredService, MonitoredService, PagerService
+from notification_log import SUPPRESSED
+from scheduler import SimulatedScheduler
+
+
+class TrafficEvent(NamedTuple):
+    offset: float # seconds since the start of the recording
+    kind: str # 'alert', 'ack' or 'healthy'
+    service: str
+
+
+def load_traffic(path: str) -> Iterator[TrafficEvent]:
+    """
+    Reads recorded traffic from a JSON Lines file of {"t": seconds, "event": kind, "service": name}.
+    """
+    with open(path, encoding='utf-8') as source:
+        for line in source:
+            if line.strip():
+                record = json.loads(line)
+                yield TrafficEvent(float(record['t']), record['event'], record['service'])
+
+
+class SimulationReport:
+    def __init__(self):
+        self.alerts = 0
+        self.duplicates = 0
+        self.acknowledged = 0
+        self.resolved = 0
+        self.pages_per_target: Counter = Counter()
+        self.pages_per_level: Counter = Counter()
+        self.time_to_ack: List[float] = []
+
+    def time_to_ack_percentiles(self, percentiles=(50, 90, 99)) -> Dict[int, float]:
+        samples = sorted(self.time_to_ack)
+        if not samples:
+            return {p: 0.0 for p in percentiles}
+        return {p: samples[min(len(samples) - 1, len(samples) * p // 100)] for p in percentiles}
+
+    def __str__(self):
+        percentiles = ', '.join(f'p{p} {seconds:.0f}s' for p, seconds in self.time_to_ack_percentiles().items())
+        return (
+            f"Alerts: {self.alerts} ({self.duplicates} duplicates)\n"
+            f"Acknowledged: {self.acknowledged}, resolved by healthy: {self.resolved}\n"
+            f"Pages per level: {dict(sorted(self.pages_per_level.items()))}\n"
+            f"Pages per target: {dict(self.pages_per_target.most_common())}\n"
+            f"Time to acknowledge: {percentiles}"
+        )
+
+
+class EscalationSimulator:
+    """
+    Replays recorded alert traffic against an escalation policy on a virtual clock.
+
+    Timers are discrete events: between two traffic events the simulator jumps straight to
+    the next deadline, so a day of traffic replays in seconds and always gives the same result.
+    The policy's MonitoredService objects are copied, the replay doesn't touch their state.
+    """
+
+    def __init__(self, escalation_policy: EscalationPolicy, ack_delay: Optional[float] = None, start_time: float = 0.0, log_capacity: int = 1_000_000):
+        self.clock = VirtualClock(start_time)
+        self.scheduler = SimulatedScheduler(self.clock)
+        self.ack_delay = ack_delay
+        self.services: Dict[str, MonitoredService] = {}
+        policies = {}
+        for name, policy in escalation_policy.policies.items():
+            self.services[name] = MonitoredService(name)
+            policies[name] = EscalationPolicyMonitoredService(self.services[name], policy.levels, policy.timeout)
+        self.pager_service = PagerService(
+            EscalationPolicy(policies),
+            log_capacity=log_capacity,
+            clock=self.clock,
+            scheduler=self.scheduler,
+        )
+
+    def run(self, traffic: Iterable[TrafficEvent]) -> SimulationReport:
+        report = SimulationReport()
+        for event in traffic:
+            self.scheduler.run_until(event.offset)
+            service = self.services.get(event.service)
+            if service is None:
+                service = self.services[event.service] = MonitoredService(event.service)
+            if event.kind == 'alert':
+                self._alert(service, report)
+            elif event.kind == 'ack':
+                self._acknowledge(service, report)
+            elif event.kind == 'healthy':
+                if service in self.pager_service.alerts:
+                    report.resolved += 1
+                self.pager_service.handle_healthy(service)
+            else:
+                raise ValueError(f'Unknown traffic event: {event.kind}')
+        # let the escalations still open run their course
+        while self.scheduler.next_deadline() is not None:
+            self.scheduler.run_until(self.scheduler.next_deadline())
+
+        for record in self.pager_service.alerts_log:
+            if record.status == SUPPRESSED:
+                continue
+            report.pages_per_target[record.target] += 1
+            report.pages_per_level[record.level] += 1
+        return report
+
+    def _alert(self, service: MonitoredService, report: SimulationReport):
+        alert = Alert(service, self.clock)
+        try:
+            opened = self.pager_service.receive_alert(alert, self.ack_delay) is alert
+        except Exception:
+            # no escalation policy for this service
+            return
+        if opened:
+            report.alerts += 1
+        else:
+            report.duplicates += 1
+
+    def _acknowledge(self, service: MonitoredService, report: SimulationReport):
+        alert = self.pager_service.alerts.get(service)
+        if alert is None:
+            return
+        report.acknowledged += 1
+        report.time_to_ack.append(self.clock.time() - alert.sent_timestamp)
+        self.pager_service.handle_acknowledgement(alert)
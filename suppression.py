@@ -0,0 +1,66 @@
+import time
+from typing import Callable, Dict, Optional, Tuple
+
+
+class AlertSuppressor:
+    """
+    Deduplication and flap detection state, keyed by service name.
+
+    An acknowledged alert keeps absorbing repeats of its service for dedup_window seconds
+    after it was last seen, as long as the service stays unhealthy. A service that opened
+    flap_threshold alerts within flap_window seconds is flapping: its new alerts are held
+    back from the first level, whose targets were just paged for the previous flaps.
+    Callers hold the service's registry lock, so per-service state needs no locking of its own.
+    """
+
+    def __init__(self, dedup_window: float = 300.0, flap_window: float = 600.0, flap_threshold: int = 3, time_fn: Callable[[], float] = time.monotonic):
+        self.dedup_window = dedup_window
+        self.flap_window = flap_window
+        self.flap_threshold = flap_threshold
+        self._time = time_fn
+        self._last_alerts: Dict[str, tuple] = {} # { service name: (Alert, last seen) }
+        # { service name: last flap_threshold opening times }, a tuple costs far less than a deque
+        self._openings: Dict[str, Tuple[float, ...]] = {}
+        self.duplicates = 0
+        self.held = 0
+
+    def absorb(self, alert, open_alert=None) -> Optional[object]:
+        """
+        Folds a repeated alert into the open alert of its service or, failing that, into its
+        last acknowledged one. Returns the alert it was folded into, or None when it is not
+        a duplicate and a new alert must be opened.
+        """
+        service = alert.monitored_service
+        now = self._time()
+        if open_alert is None:
+            entry = self._last_alerts.get(service.service_name)
+            if entry is None or service.healthy or now - entry[1] > self.dedup_window:
+                return None
+            open_alert = entry[0]
+        open_alert.record_occurrence(alert.sent_timestamp)
+        self._last_alerts[service.service_name] = (open_alert, now)
+        self.duplicates += 1
+        return open_alert
+
+    def opened(self, alert) -> bool:
+        """
+        Records a newly opened alert and returns whether its first page should be held back.
+        """
+        now = self._time()
+        name = alert.monitored_service.service_name
+        recent = tuple(opened_at for opened_at in self._openings.get(name, ()) if now - opened_at <= self.flap_window)
+        flapping = len(recent) >= self.flap_threshold
+        self._openings[name] = (recent + (now,))[-self.flap_threshold:]
+        self._last_alerts[alert.monitored_service.service_name] = (alert, now)
+        if flapping:
+            self.held += 1
+        return flapping
+
+    def resolved(self, monitored_service):
+        # a healthy service absorbs nothing into its last alert, which need not be kept alive
+        self._last_alerts.pop(monitored_service.service_name, None)
+
+    def is_flapping(self, monitored_service) -> bool:
+        openings = self._openings.get(monitored_service.service_name, ())
+        now = self._time()
+        return sum(1 for opened_at in openings if now - opened_at <= self.flap_window) >= self.flap_threshold
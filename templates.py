@@ -0,0 +1,84 @@
+import sys
+import threading
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+
+from policy import service_name
+
+# per transport channel (Target.transport); None is the fallback of every other channel
+DEFAULT_TEMPLATES: Dict[Optional[str], str] = {
+    None: '{service} is unhealthy (Level {level})',
+    'sms': '{service} is unhealthy (Level {level})',
+    'email': (
+        '{service} is unhealthy (Level {level})\n'
+        '\n'
+        'Service: {service}\n'
+        'Escalation level: {level}\n'
+        'Acknowledge the alert to stop the escalation.'
+    ),
+}
+
+
+class MessageRenderer:
+    """
+    Renders notification messages from per-channel templates, with the fields service and level.
+
+    Every target of a level gets the same text, so messages are rendered once and kept in an
+    LRU cache keyed on (service_id, level, channel, template version): a fan-out to a thousand
+    targets, or the same level paged again, reuses one interned string (and its UTF-8 bytes)
+    instead of formatting it per target. Replacing a template bumps its version, entries
+    rendered from the old one are never hit again and age out of the cache.
+    """
+
+    def __init__(self, templates: Optional[Dict[Optional[str], str]] = None, maxsize: int = 4096):
+        if maxsize <= 0:
+            raise ValueError('A message cache needs room for at least one message')
+        self.maxsize = maxsize
+        self.templates: Dict[Optional[str], Tuple[str, int]] = {} # { channel: (template, version) }
+        self.hits = 0
+        self.misses = 0
+        self._cache: OrderedDict = OrderedDict() # { (service_id, level, channel, version): [text, bytes or None] }
+        self._lock = threading.Lock()
+        for channel, template in {**DEFAULT_TEMPLATES, **(templates or {})}.items():
+            self.set_template(channel, template)
+
+    def set_template(self, channel: Optional[str], template: str):
+        try:
+            template.format(service='', level=0)
+        except (AttributeError, KeyError, IndexError, ValueError) as error:
+            raise ValueError(f'Invalid {channel or "default"} template: {error!r}')
+        with self._lock:
+            _, version = self.templates.get(channel, ('', 0))
+            self.templates[channel] = (template, version + 1)
+
+    def render(self, service_id: int, level: int, channel: Optional[str] = None) -> str:
+        return self._entry(service_id, level, channel)[0]
+
+    def encoded(self, service_id: int, level: int, channel: Optional[str] = None) -> bytes:
+        # UTF-8 body for transports writing bytes, encoded once per cached message
+        entry = self._entry(service_id, level, channel)
+        if entry[1] is None:
+            entry[1] = entry[0].encode('utf-8')
+        return entry[1]
+
+    def __len__(self) -> int:
+        return len(self._cache)
+
+    def _entry(self, service_id: int, level: int, channel: Optional[str]) -> list:
+        templates = self.templates
+        template, version = templates[channel] if channel in templates else templates[None]
+        key = (service_id, level, channel, version)
+        with self._lock:
+            entry = self._cache.get(key)
+            if entry is not None:
+                self._cache.move_to_end(key)
+                self.hits += 1
+                return entry
+            self.misses += 1
+        entry = [sys.intern(template.format(service=service_name(service_id), level=level)), None]
+        with self._lock:
+            # another thread may have rendered it meanwhile, keep the first so the text stays shared
+            entry = self._cache.setdefault(key, entry)
+            if len(self._cache) > self.maxsize:
+                self._cache.popitem(last=False)
+        return entry
@@ -0,0 +1,110 @@
+import asyncio
+import json
+import unittest
+
+from app import IngestServer, load_policy
+from models import PagerService
+
+
+def request(method, path, body=None, close=False):
+    payload = json.dumps(body).encode() if body is not None else b''
+    head = f'{method} {path} HTTP/1.1\r\nHost: pager\r\nContent-Length: {len(payload)}\r\n'
+    if close:
+        head += 'Connection: close\r\n'
+    return (head + '\r\n').encode() + payload
+
+
+async def read_response(reader):
+    head = (await reader.readuntil(b'\r\n\r\n')).decode()
+    status = int(head.split(' ', 2)[1])
+    length = int(next(line for line in head.split('\r\n') if line.lower().startswith('content-length')).split(':')[1])
+    return status, await reader.readexactly(length)
+
+
+class TestIngestServer(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        escalation_policy = load_policy({
+            'payments': [['sms:900100200'], ['email:oncall@example.com']],
+            'search': [['email:search@example.com']],
+        }, {})
+        self.pager_service = PagerService(escalation_policy)
+        self.server = IngestServer(self.pager_service)
+        await self.server.start('127.0.0.1', 0)
+        port = self.server.server.sockets[0].getsockname()[1]
+        self.reader, self.writer = await asyncio.open_connection('127.0.0.1', port)
+
+    async def asyncTearDown(self):
+        self.writer.close()
+        await self.server.close()
+        self.pager_service.timer_manager.scheduler.close()
+
+    async def call(self, method, path, body=None):
+        self.writer.write(request(method, path, body))
+        status, payload = await read_response(self.reader)
+        return status, json.loads(payload) if payload.startswith((b'{', b'[')) else payload
+
+    async def testPipelinedRequestsAreBatchedAndAnsweredInOrder(self):
+        self.writer.write(
+            request('POST', '/alerts', {'service': 'payments'})
+            + request('POST', '/alerts', {'service': 'payments'})
+            + request('POST', '/alerts', {'service': 'search'})
+            + request('POST', '/acknowledgements', {'service': 'search'})
+            + request('POST', '/healthy', {'service': 'payments'})
+            + request('POST', '/acknowledgements', {'service': 'payments'})
+        )
+        responses = [await read_response(self.reader) for _ in range(6)]
+        self.assertEqual(
+            [json.loads(body)['result'] for _, body in responses],
+            ['opened', 'duplicate', 'opened', 'acknowledged', 'resolved', 'ignored']
+        )
+        self.assertEqual(len(self.pager_service.alerts), 0)
+        self.assertEqual(self.pager_service.metrics.snapshot()['pager_alerts_received_total'], 3)
+
+    async def testBatchBody(self):
+        status, results = await self.call('POST', '/alerts', [{'service': 'payments'}, {'service': 'unknown'}, {}])
+        self.assertEqual(status, 207)
+        self.assertEqual(results[0], {'result': 'opened', 'alert': self.pager_service.alerts.get(self.server.services.get('payments')).alert_id})
+        self.assertEqual(results[1], {'error': 'No escalation policy for unknown'})
+        self.assertIn('error', results[2])
+
+    async def testAcknowledgeByAlertId(self):
+        _, opened = await self.call('POST', '/alerts', {'service': 'payments'})
+        _, duplicate = await self.call('POST', '/alerts', {'service': 'payments'})
+        self.assertEqual(duplicate, {'result': 'duplicate', 'alert': opened['alert']})
+        self.assertEqual(await self.call('POST', '/acknowledgements', {'alert': opened['alert'] + 1000}), (200, {'result': 'ignored'}))
+        self.assertEqual(await self.call('POST', '/acknowledgements', {'alert': opened['alert']}), (200, {'result': 'acknowledged'}))
+        self.assertEqual(await self.call('POST', '/acknowledgements', {'alert': opened['alert']}), (200, {'result': 'ignored'}))
+        self.assertEqual(len(self.pager_service.timer_manager.timers), 0)
+        self.assertEqual((await self.call('POST', '/acknowledgements', {'alert': 'x'}))[0], 400)
+
+    async def testErrors(self):
+        self.assertEqual((await self.call('GET', '/alerts'))[0], 405)
+        self.assertEqual((await self.call('POST', '/nowhere', {}))[0], 404)
+        self.writer.write(b'POST /alerts HTTP/1.1\r\nContent-Length: 3\r\n\r\n{{{')
+        self.assertEqual((await read_response(self.reader))[0], 400)
+
+    async def testPolicyUpload(self):
+        await self.call('POST', '/alerts', {'service': 'payments'})
+        status, body = await self.call('PUT', '/policy', {'payments': [['sms:900300400']], 'checkout': [['sms:900500600']]})
+        self.assertEqual((status, body), (200, {'services': 2}))
+        # the open alert is still attached to the service, acknowledging it works
+        self.assertEqual(await self.call('POST', '/acknowledgements', {'service': 'payments'}), (200, {'result': 'acknowledged'}))
+        response = await self.call('POST', '/alerts', {'service': 'checkout'})
+        self.assertEqual(response, (200, {'result': 'opened', 'alert': self.pager_service.alerts.get(self.server.services.get('checkout')).alert_id}))
+        self.assertEqual((await self.call('PUT', '/policy', {'payments': [['pigeon:coop']]}))[0], 400)
+
+    async def testMetrics(self):
+        await self.call('POST', '/alerts', {'service': 'payments'})
+        status, body = await self.call('GET', '/metrics')
+        self.assertEqual(status, 200)
+        self.assertIn(b'pager_open_alerts 1\n', body)
+
+    async def testConnectionClose(self):
+        self.writer.write(request('POST', '/alerts', {'service': 'payments'}, close=True))
+        status, _ = await read_response(self.reader)
+        self.assertEqual(status, 200)
+        self.assertEqual(await self.reader.read(), b'')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,108 @@
+import asyncio
+import time
+import unittest
+
+from async_pager import AsyncPagerService
+from models import SMS, Alert, Email, EscalationPolicy, EscalationPolicyLevel, EscalationPolicyMonitoredService, MonitoredService, Target
+
+
+class SlowTarget(Target):
+    def __init__(self, name, delay):
+        self.name = name
+        self.delay = delay
+
+    async def notify(self, message: str) -> str:
+        await asyncio.sleep(self.delay)
+        return f'{self.name}: {message}'
+
+
+def two_level_policy(service):
+    return EscalationPolicy(
+      {
+        service.service_name: EscalationPolicyMonitoredService(
+          service,
+          [
+            EscalationPolicyLevel([SMS('900100200')]),
+            EscalationPolicyLevel([Email('user@example.com')])
+          ]
+        )
+      }
+    )
+
+
+class TestAsyncPagerService(unittest.IsolatedAsyncioTestCase):
+    async def testReceiveAlert(self):
+        service = MonitoredService('service #1')
+        alert = Alert(service)
+        pager_service = AsyncPagerService(two_level_policy(service))
+        await pager_service.receive_alert(alert, 60)
+        self.assertIs(pager_service.alerts[service], alert)
+        self.assertFalse(service.healthy)
+        self.assertIn(alert, pager_service.timers)
+        self.assertEqual([(record.level, record.target) for record in pager_service.alerts_log], [(0, 'sms:900100200')])
+        with self.assertRaises(Exception):
+            await pager_service.receive_alert(Alert(service), 60)
+
+    async def testTimeoutEscalatesAndRearms(self):
+        service = MonitoredService('service #1')
+        alert = Alert(service)
+        pager_service = AsyncPagerService(two_level_policy(service))
+        await pager_service.receive_alert(alert, 0.01)
+        await asyncio.sleep(0.05)
+        self.assertEqual(alert.current_level, 1)
+        self.assertEqual(
+          [(record.level, record.target) for record in pager_service.alerts_log],
+          [(0, 'sms:900100200'), (1, 'email:user@example.com')]
+        )
+        # the last level never re-arms
+        await asyncio.sleep(0.05)
+        self.assertNotIn(alert, pager_service.timers)
+        self.assertEqual(len(pager_service.alerts_log), 2)
+
+    async def testAcknowledgementCancelsTimer(self):
+        service = MonitoredService('service #1')
+        alert = Alert(service)
+        pager_service = AsyncPagerService(two_level_policy(service))
+        await pager_service.receive_alert(alert, 0.01)
+        await pager_service.handle_acknowledgement(alert)
+        await asyncio.sleep(0.03)
+        self.assertTrue(alert.acknowledged)
+        self.assertNotIn(service, pager_service.alerts)
+        self.assertNotIn(alert, pager_service.timers)
+        self.assertEqual(alert.current_level, 0)
+
+    async def testAcknowledgeById(self):
+        service = MonitoredService('service #1')
+        alert = Alert(service)
+        pager_service = AsyncPagerService(two_level_policy(service))
+        await pager_service.receive_alert(alert, 0.01)
+        self.assertIs(await pager_service.acknowledge(alert.alert_id), alert)
+        self.assertIsNone(await pager_service.acknowledge(alert.alert_id))
+        self.assertEqual((pager_service.alerts, pager_service.alert_ids, pager_service.timers), ({}, {}, {}))
+
+    async def testHealthyCancelsTimer(self):
+        service = MonitoredService('service #1')
+        alert = Alert(service)
+        pager_service = AsyncPagerService(two_level_policy(service))
+        await pager_service.receive_alert(alert, 0.01)
+        await pager_service.handle_healthy(service)
+        await asyncio.sleep(0.03)
+        self.assertTrue(service.healthy)
+        self.assertNotIn(service, pager_service.alerts)
+        self.assertNotIn(alert, pager_service.timers)
+        self.assertEqual(len(pager_service.alerts_log), 1)
+
+    async def testTargetsAreNotifiedConcurrently(self):
+        service = MonitoredService('service #1')
+        targets = [SlowTarget(f'target #{i}', 0.05) for i in range(10)]
+        pager_service = AsyncPagerService(EscalationPolicy(
+          {service.service_name: EscalationPolicyMonitoredService(service, [EscalationPolicyLevel(targets)])}
+        ))
+        start = time.perf_counter()
+        await pager_service.receive_alert(Alert(service), 60)
+        self.assertLess(time.perf_counter() - start, 0.05 * len(targets) / 2)
+        self.assertEqual(len(pager_service.alerts_log), len(targets))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,114 @@
+import unittest
+
+from models import SMS, AcknowledgementEvent, Alert, Email, EscalationPolicy, EscalationPolicyLevel, EscalationPolicyMonitoredService, HealthyEvent, MonitoredService, PagerService
+
+
+class TestReceiveAlerts(unittest.TestCase):
+    def setUp(self):
+        self.services = [MonitoredService(f'batch service #{i}') for i in range(5)]
+        self.pager_service = PagerService(EscalationPolicy(
+          {
+            service.service_name: EscalationPolicyMonitoredService(
+              service,
+              [
+                EscalationPolicyLevel([SMS('900100200'), Email('user@example.com')]),
+                EscalationPolicyLevel([Email('oncall@example.com')])
+              ]
+            )
+            for service in self.services
+          }
+        ))
+
+    def tearDown(self):
+        for alert in list(self.pager_service.timer_manager.timers):
+            self.pager_service.timer_manager.cancel_timer(alert)
+
+    def testMixedBatch(self):
+        alerts = [Alert(service) for service in self.services]
+        results = self.pager_service.receive_alerts(
+          [
+            *alerts,
+            Alert(self.services[0]),
+            AcknowledgementEvent(alerts[1]),
+            AcknowledgementEvent(alerts[1]),
+            HealthyEvent(self.services[2]),
+            'not an event',
+          ],
+          60
+        )
+        self.assertEqual(results[:9], ['opened'] * 5 + ['duplicate', 'acknowledged', 'ignored', 'resolved'])
+        self.assertIsInstance(results[9], Exception)
+        self.assertCountEqual(list(self.pager_service.alerts), [self.services[0], self.services[3], self.services[4]])
+        # only the alerts still open were paged, acknowledged and resolved ones were not
+        self.assertCountEqual(
+          [record.service_name for record in self.pager_service.alerts_log],
+          [service.service_name for service in (self.services[0], self.services[3], self.services[4]) for _ in range(2)]
+        )
+        self.assertEqual([span.kind_name for span in self.pager_service.tracer.timeline(alerts[2].alert_id)], ['received', 'resolved'])
+        self.assertEqual([span.kind_name for span in self.pager_service.tracer.timeline(alerts[1].alert_id)], ['received', 'acknowledged'])
+        # only the alerts still open have a timer
+        self.assertCountEqual(list(self.pager_service.timer_manager.timers), [alerts[0], alerts[3], alerts[4]])
+        self.assertTrue(self.services[2].healthy)
+
+    def testReopenedInTheSameBatch(self):
+        first, second = Alert(self.services[0]), Alert(self.services[0])
+        results = self.pager_service.receive_alerts([first, HealthyEvent(self.services[0]), second], 60)
+        self.assertEqual(results, ['opened', 'resolved', 'opened'])
+        # both alerts share a (service, level) group, only the one still open is paged
+        self.assertEqual(len(self.pager_service.alerts_log), 2)
+        self.assertEqual(len(self.pager_service.tracer.timeline(second.alert_id)), 3)
+        self.assertEqual(list(self.pager_service.timer_manager.timers), [second])
+
+    def testAlertWithoutPolicyIsNotOpened(self):
+        unknown = MonitoredService('batch service without a policy')
+        results = self.pager_service.receive_alerts([Alert(unknown), Alert(self.services[0])], 60)
+        self.assertEqual(str(results[0]), 'No escalation policy for this level')
+        self.assertEqual(results[1], 'opened')
+        self.assertNotIn(unknown, self.pager_service.alerts)
+        self.assertTrue(unknown.healthy)
+        self.assertEqual(list(self.pager_service.timer_manager.timers), [self.pager_service.alerts[self.services[0]]])
+        # nothing was left open to fold the next alert into
+        self.assertIsInstance(self.pager_service.receive_alerts([Alert(unknown)], 60)[0], Exception)
+
+    def testAcceptsAGenerator(self):
+        results = self.pager_service.receive_alerts((Alert(service) for service in self.services), 60)
+        self.assertEqual(results, ['opened'] * len(self.services))
+        self.assertEqual(len(self.pager_service.timer_manager.scheduler), len(self.services))
+
+    def testSameResultAsPerCallPath(self):
+        per_call = PagerService(self.pager_service.escalation_policy)
+        for service in self.services:
+            per_call.receive_alert(Alert(service), 60)
+        per_call_log = [(record.service_id, record.level, record.target_id) for record in per_call.alerts_log]
+        for alert in list(per_call.timer_manager.timers):
+            per_call.timer_manager.cancel_timer(alert)
+        for service in self.services:
+            service.set_healthy()
+
+        self.pager_service.receive_alerts([Alert(service) for service in self.services], 60)
+        self.assertEqual([(record.service_id, record.level, record.target_id) for record in self.pager_service.alerts_log], per_call_log)
+
+    def testHandleHealthyCancelsTimer(self):
+        alert = Alert(self.services[0])
+        self.pager_service.receive_alert(alert, 60)
+        self.pager_service.handle_healthy(self.services[0])
+        self.assertTrue(self.services[0].healthy)
+        self.assertNotIn(self.services[0], self.pager_service.alerts)
+        self.assertNotIn(alert, self.pager_service.timer_manager.timers)
+        self.assertEqual(len(self.pager_service.timer_manager.scheduler), 0)
+
+    def testReceiveEventsByServiceName(self):
+        first, second = self.services[0].service_name, self.services[1].service_name
+        results = self.pager_service.receive_events(
+          [('alert', first), ('ack', first), ('ack', second), ('alert', 'unknown'), ('page', second), ('alert', second), ('healthy', second)],
+          60
+        )
+        self.assertEqual(results[:3], ['opened', 'acknowledged', 'ignored'])
+        self.assertEqual(str(results[3]), 'No escalation policy for unknown')
+        self.assertIsInstance(results[4], Exception)
+        self.assertEqual(results[5:], ['opened', 'resolved'])
+        self.assertEqual(len(self.pager_service.alerts), 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,77 @@
+import asyncio
+import contextlib
+import io
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import unittest
+
+import cli
+from app import IngestServer
+from models import Alert, PagerService, load_policy
+
+
+class TestValidate(unittest.TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.directory = directory.name
+
+    def write(self, document) -> str:
+        path = os.path.join(self.directory, 'policy.json')
+        with open(path, 'w', encoding='utf-8') as policy:
+            json.dump(document, policy)
+        return path
+
+    def testValidPolicy(self):
+        path = self.write({'payments': [['sms:900100200'], ['email:oncall@example.com', 'sms:900100200']]})
+        output = io.StringIO()
+        with contextlib.redirect_stdout(output):
+            self.assertEqual(cli.main(['validate', path]), 0)
+        self.assertEqual(output.getvalue(), f'{path}: 1 services, 2 levels, 2 targets\n')
+
+    def testInvalidPolicy(self):
+        for document in ({'payments': [['fax:1']]}, {'payments': []}, ['payments']):
+            errors = io.StringIO()
+            with contextlib.redirect_stderr(errors):
+                self.assertEqual(cli.main(['validate', self.write(document)]), 1)
+            self.assertTrue(errors.getvalue().startswith(self.directory))
+
+    def testLoadsOnlyThePolicyClasses(self):
+        path = self.write({'payments': [['sms:900100200']]})
+        heavy = ('scheduler', 'event_emitter', 'metrics', 'wal', 'models.service', 'asyncio', 'smtplib', 'socket')
+        loaded = subprocess.run(
+            [sys.executable, '-c', f'import cli, sys; cli.main(["validate", {path!r}]); print(*[m for m in {heavy!r} if m in sys.modules])'],
+            cwd=os.path.dirname(os.path.abspath(__file__)), capture_output=True, text=True, check=True
+        ).stdout.splitlines()[-1]
+        self.assertEqual(loaded, '')
+
+
+class TestAcknowledge(unittest.IsolatedAsyncioTestCase):
+    async def testAcknowledgesOpenAlert(self):
+        pager_service = PagerService(load_policy({'payments': [['sms:900100200']]}, {}))
+        self.addCleanup(pager_service.timer_manager.scheduler.close)
+        server = IngestServer(pager_service)
+        await server.start('127.0.0.1', 0)
+        self.addAsyncCleanup(server.close)
+        port = server.server.sockets[0].getsockname()[1]
+        service = pager_service.escalation_policy.policies['payments'].monitored_service
+        pager_service.receive_alert(Alert(service), 60)
+
+        loop = asyncio.get_running_loop()
+        with contextlib.redirect_stdout(io.StringIO()), contextlib.redirect_stderr(io.StringIO()):
+            self.assertEqual(await loop.run_in_executor(None, cli.main, ['ack', 'payments', '--port', str(port)]), 0)
+            self.assertNotIn(service, pager_service.alerts)
+            self.assertEqual(await loop.run_in_executor(None, cli.main, ['ack', 'unknown', '--port', str(port)]), 1)
+
+            alert = pager_service.receive_alert(Alert(service), 60)
+            self.assertEqual(await loop.run_in_executor(None, cli.main, ['ack', '--alert', str(alert.alert_id), '--port', str(port)]), 0)
+            self.assertTrue(alert.acknowledged)
+            with self.assertRaises(SystemExit):
+                cli.main(['ack', 'payments', '--alert', '1'])
+
+
+if __name__ == '__main__':
+    unittest.main()
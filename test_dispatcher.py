@@ -0,0 +1,180 @@
+import email
+import socketserver
+import sys
+import threading
+import time
+import unittest
+
+from dispatcher import NotificationDispatcher, SMTPTransport, TokenBucket, Transport
+from models import SMS, Alert, Email, EscalationPolicy, EscalationPolicyLevel, EscalationPolicyMonitoredService, MonitoredService, PagerService
+
+
+class FakeSMSSink(Transport):
+    def __init__(self, delay: float = 0.0):
+        self.delay = delay
+        self.received = []
+        self._lock = threading.Lock()
+
+    def send(self, destination, messages):
+        time.sleep(self.delay)
+        with self._lock:
+            self.received.append((destination, list(messages)))
+
+
+class FakeSMTPHandler(socketserver.StreamRequestHandler):
+    def reply(self, line):
+        self.wfile.write(f'{line}\r\n'.encode())
+
+    def handle(self):
+        self.reply('220 fake-smtp')
+        while True:
+            line = self.rfile.readline().decode().strip()
+            command = line.split(' ', 1)[0].upper()
+            if not line or command == 'QUIT':
+                self.reply('221 bye')
+                return
+            if command == 'DATA':
+                self.reply('354 go ahead')
+                data = []
+                while True:
+                    row = self.rfile.readline().decode()
+                    if row.rstrip('\r\n') == '.':
+                        break
+                    data.append(row)
+                self.server.messages.append(email.message_from_string(''.join(data)))
+            self.reply('250 ok')
+
+
+class FakeSMTPSink(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self):
+        super().__init__(('127.0.0.1', 0), FakeSMTPHandler)
+        self.messages = []
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+
+
+class TestNotificationDispatcher(unittest.TestCase):
+    def setUp(self):
+        # a long tick, the tests flush explicitly
+        self.dispatcher = NotificationDispatcher(tick=60)
+
+    def tearDown(self):
+        self.dispatcher.close()
+
+    def testCoalescesPerDestinationPerTick(self):
+        sink = FakeSMSSink()
+        self.dispatcher.register('sms', sink)
+        for i in range(5):
+            self.dispatcher.submit(SMS('900100200'), f'service #{i} is unhealthy (Level 0)')
+        self.dispatcher.submit(SMS('900100300'), 'service #1 is unhealthy (Level 0)')
+        self.dispatcher.flush(wait=True)
+        self.assertEqual(len(sink.received), 2)
+        self.assertEqual(dict(sink.received)['900100200'], [f'service #{i} is unhealthy (Level 0)' for i in range(5)])
+        self.assertEqual(self.dispatcher.stats()['sms']['sent'], 6)
+
+    def testSlowTransportDoesNotStallOthers(self):
+        slow, fast = FakeSMSSink(delay=0.5), FakeSMSSink()
+        self.dispatcher.register('email', slow, workers=1)
+        self.dispatcher.register('sms', fast, workers=1)
+        self.dispatcher.submit(Email('user@example.com'), 'message')
+        self.dispatcher.submit(SMS('900100200'), 'message')
+        self.dispatcher.flush()
+        self.dispatcher.channels['sms'].queue.join()
+        self.assertEqual(len(fast.received), 1)
+        self.assertEqual(slow.received, [])
+
+    def testBoundedPendingDropsInsteadOfBlocking(self):
+        self.dispatcher.register('sms', FakeSMSSink(), queue_size=2)
+        self.assertTrue(self.dispatcher.submit(SMS('1'), 'message'))
+        self.assertTrue(self.dispatcher.submit(SMS('2'), 'message'))
+        # coalescing onto an already pending destination is still accepted
+        self.assertTrue(self.dispatcher.submit(SMS('2'), 'message'))
+        self.assertFalse(self.dispatcher.submit(SMS('3'), 'message'))
+        self.assertEqual(self.dispatcher.stats()['sms']['dropped'], 1)
+
+    def testCountersAddUpAcrossWorkers(self):
+        class FlakySink(Transport):
+            def send(self, destination, messages):
+                if int(destination) % 3 == 0:
+                    raise ConnectionError('gateway unavailable')
+
+        self.dispatcher.register('sms', FlakySink(), workers=8)
+        interval = sys.getswitchinterval()
+        # switch threads as often as possible, so that unsynchronised updates would be lost
+        sys.setswitchinterval(1e-6)
+        try:
+            for i in range(3_000):
+                self.dispatcher.submit(SMS(str(i)), 'message')
+            with self.assertLogs('dispatcher', level='ERROR'):
+                self.dispatcher.flush(wait=True)
+        finally:
+            sys.setswitchinterval(interval)
+        stats = self.dispatcher.stats()['sms']
+        self.assertEqual((stats['sent'], stats['failed']), (2_000, 1_000))
+
+    def testLatencyPercentiles(self):
+        self.dispatcher.register('sms', FakeSMSSink())
+        for i in range(100):
+            self.dispatcher.submit(SMS(str(i)), 'message')
+        self.dispatcher.flush(wait=True)
+        percentiles = self.dispatcher.latency_percentiles('sms')
+        self.assertEqual(sorted(percentiles), [50, 90, 99])
+        self.assertTrue(0 <= percentiles[50] <= percentiles[90] <= percentiles[99])
+
+    def testSMTPTransportDeliversOneEmailPerAddress(self):
+        sink = FakeSMTPSink()
+        self.addCleanup(sink.server_close)
+        self.addCleanup(sink.shutdown)
+        host, port = sink.server_address
+        self.dispatcher.register('email', SMTPTransport(host, port, 'pager@example.com'))
+        self.dispatcher.submit(Email('user@example.com'), 'service #1 is unhealthy (Level 0)')
+        self.dispatcher.submit(Email('user@example.com'), 'service #2 is unhealthy (Level 0)')
+        self.dispatcher.flush(wait=True)
+        self.assertEqual(len(sink.messages), 1)
+        self.assertEqual(sink.messages[0]['To'], 'user@example.com')
+        self.assertIn('service #2 is unhealthy (Level 0)', sink.messages[0].get_payload())
+
+
+class TestTokenBucket(unittest.TestCase):
+    def testLimitsRate(self):
+        bucket = TokenBucket(rate=100, burst=1)
+        start = time.perf_counter()
+        for _ in range(11):
+            bucket.acquire()
+        self.assertGreaterEqual(time.perf_counter() - start, 0.09)
+
+
+class TestPagerServiceWithDispatcher(unittest.TestCase):
+    def testSendToTargetsQueuesThroughDispatcher(self):
+        dispatcher = NotificationDispatcher(tick=60)
+        self.addCleanup(dispatcher.close)
+        sink = FakeSMSSink()
+        dispatcher.register('sms', sink)
+        service = MonitoredService('service #1')
+        pager_service = PagerService(EscalationPolicy(
+          {
+            service.service_name: EscalationPolicyMonitoredService(
+              service,
+              [EscalationPolicyLevel([SMS('900100200'), Email('user@example.com')])]
+            )
+          }
+        ), dispatcher)
+        alert = Alert(service)
+        pager_service.receive_alert(alert, 60)
+        pager_service.handle_acknowledgement(alert)
+        dispatcher.flush(wait=True)
+        self.assertEqual(
+          [(record.target, record.status_name) for record in pager_service.alerts_log],
+          [
+            ('sms:900100200', 'queued'),
+            # no email channel registered, the target is notified directly
+            ('email:user@example.com', 'sent')
+          ]
+        )
+        self.assertEqual(sink.received, [('900100200', ['service #1 is unhealthy (Level 0)'])])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,144 @@
+import threading
+import unittest
+
+from event_emitter import BLOCK, COALESCE, DROP_OLDEST, EventEmitter
+from models import SMS, Alert, EscalationPolicy, EscalationPolicyLevel, EscalationPolicyMonitoredService, MonitoredService, PagerService
+
+
+class TestSynchronousEmitter(unittest.TestCase):
+    def testListenersRunByPriorityThenRegistrationOrder(self):
+        emitter = EventEmitter()
+        calls = []
+        emitter.on('timeout', lambda event: calls.append('default'))
+        emitter.on('timeout', lambda event: calls.append('urgent'), priority=10)
+        emitter.on('timeout', lambda event: calls.append('default, second'))
+        emitter.on('timeout', lambda event: calls.append('last'), priority=-1)
+        emitter.emit('timeout', object())
+        self.assertEqual(calls, ['urgent', 'default', 'default, second', 'last'])
+
+    def testFailingListenerDoesNotStopTheOthers(self):
+        emitter = EventEmitter()
+        calls = []
+
+        def fail(event):
+            raise Exception('boom')
+
+        emitter.on('timeout', fail, priority=1)
+        emitter.on('timeout', calls.append)
+        with self.assertLogs('event_emitter', level='ERROR'):
+            emitter.emit('timeout', 'event')
+        self.assertEqual(calls, ['event'])
+        self.assertEqual(emitter.stats()['timeout']['errors'], 1)
+        self.assertEqual(emitter.stats()['timeout']['dispatched'], 1)
+
+    def testOff(self):
+        emitter = EventEmitter()
+        calls = []
+        emitter.on('timeout', calls.append)
+        emitter.off('timeout', calls.append)
+        emitter.emit('timeout', 'event')
+        emitter.emit('unknown', 'event')
+        self.assertEqual(calls, [])
+
+
+class TestQueuedEmitter(unittest.TestCase):
+    def blocked_emitter(self, backpressure, **options):
+        # a single worker stuck in the first event, so the queue fills up behind it
+        emitter = EventEmitter(workers=1, capacity=2, backpressure=backpressure)
+        emitter.configure('timeout', **options)
+        release = threading.Event()
+        started = threading.Event()
+        calls = []
+
+        def listener(event):
+            if event == 'first':
+                started.set()
+                release.wait(2)
+            calls.append(event)
+
+        emitter.on('timeout', listener)
+        emitter.emit('timeout', 'first')
+        self.assertTrue(started.wait(2))
+        return emitter, release, calls
+
+    def testSlowListenerDoesNotBlockTheEmitter(self):
+        emitter, release, calls = self.blocked_emitter(BLOCK)
+        emitter.emit('timeout', 'second')
+        self.assertEqual(emitter.depth('timeout'), 1)
+        release.set()
+        self.assertTrue(emitter.flush(2))
+        self.assertEqual(calls, ['first', 'second'])
+        emitter.close()
+
+    def testBlockWaitsForRoom(self):
+        emitter, release, calls = self.blocked_emitter(BLOCK)
+        emitter.emit('timeout', 'second')
+        emitter.emit('timeout', 'third')
+        emitted = threading.Event()
+        threading.Thread(target=lambda: (emitter.emit('timeout', 'fourth'), emitted.set()), daemon=True).start()
+        self.assertFalse(emitted.wait(0.05))
+        release.set()
+        self.assertTrue(emitted.wait(2))
+        self.assertTrue(emitter.flush(2))
+        self.assertEqual(calls, ['first', 'second', 'third', 'fourth'])
+        emitter.close()
+
+    def testDropOldest(self):
+        emitter, release, calls = self.blocked_emitter(DROP_OLDEST)
+        for event in ('second', 'third', 'fourth'):
+            emitter.emit('timeout', event)
+        release.set()
+        self.assertTrue(emitter.flush(2))
+        self.assertEqual(calls, ['first', 'third', 'fourth'])
+        self.assertEqual(emitter.stats()['timeout']['dropped'], 1)
+        emitter.close()
+
+    def testCoalesce(self):
+        emitter, release, calls = self.blocked_emitter(COALESCE, key=lambda event: event[0])
+        for event in ('a1', 'b1', 'a2', 'a3'):
+            emitter.emit('timeout', event)
+        release.set()
+        self.assertTrue(emitter.flush(2))
+        self.assertEqual(calls, ['first', 'a3', 'b1'])
+        stats = emitter.stats()['timeout']
+        self.assertEqual((stats['emitted'], stats['dispatched'], stats['coalesced']), (5, 3, 2))
+        emitter.close()
+
+    def testCloseDrainsQueues(self):
+        emitter = EventEmitter(workers=2)
+        calls = []
+        emitter.on('timeout', calls.append)
+        for i in range(100):
+            emitter.emit('timeout', i)
+        emitter.close()
+        self.assertCountEqual(calls, range(100))
+        with self.assertRaises(RuntimeError):
+            emitter.emit('timeout', 100)
+
+
+class TestPagerServiceWithQueuedEmitter(unittest.TestCase):
+    def testTimeoutEscalatesOffTheTimerThread(self):
+        service = MonitoredService('service #1')
+        escalation_policy = EscalationPolicy({
+            service.service_name: EscalationPolicyMonitoredService(
+                service,
+                [EscalationPolicyLevel([SMS('900100200')]), EscalationPolicyLevel([SMS('900300400')])]
+            )
+        })
+        emitter = EventEmitter(workers=2)
+        pager_service = PagerService(escalation_policy, event_emitter=emitter)
+        alert = Alert(service)
+        pager_service.receive_alert(alert, 0.01)
+        escalated = threading.Event()
+        emitter.on('timeout', lambda event: escalated.set(), priority=-1)
+        self.assertTrue(escalated.wait(2))
+        self.assertTrue(emitter.flush(2))
+        self.assertEqual(alert.current_level, 1)
+        stats = pager_service.stats()['events']['timeout']
+        self.assertEqual((stats['dispatched'], stats['errors'], stats['depth']), (1, 0, 0))
+        pager_service.timer_manager.scheduler.close()
+        emitter.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
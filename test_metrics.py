@@ -0,0 +1,102 @@
+import threading
+import unittest
+
+from clock import VirtualClock
+from metrics import MetricsRegistry, bucket_bounds, bucket_index
+from models import SMS, Alert, EscalationPolicy, EscalationPolicyLevel, EscalationPolicyMonitoredService, MonitoredService, PagerService
+from scheduler import SimulatedScheduler
+
+
+class TestMetrics(unittest.TestCase):
+    def testCounterKeepsEveryThreadsIncrements(self):
+        counter = MetricsRegistry().counter('things_total')
+
+        def work():
+            for _ in range(10_000):
+                counter.inc()
+
+        threads = [threading.Thread(target=work) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(counter.value, 80_000)
+
+    def testHistogramBucketsStayWithinPrecision(self):
+        for value in (0, 1, 127, 128, 1_000, 123_456, 10**9, 3_600 * 10**9):
+            lower, upper = bucket_bounds(bucket_index(value))
+            self.assertLessEqual(lower, value)
+            self.assertLess(value, upper)
+            self.assertLessEqual(upper - lower, max(1, value / 64))
+
+    def testHistogramPercentiles(self):
+        histogram = MetricsRegistry().histogram('latency_seconds')
+        for i in range(1, 1001):
+            histogram.observe(i / 1e6)
+        percentiles = histogram.percentiles((50, 99))
+        self.assertAlmostEqual(percentiles[50], 500e-6, delta=500e-6 / 64)
+        self.assertAlmostEqual(percentiles[99], 990e-6, delta=990e-6 / 64)
+        self.assertEqual(histogram.summary()['count'], 1000)
+        self.assertEqual(histogram.summary()['max'], 1e-3)
+
+    def testRegisteringTwiceReturnsTheSameMetric(self):
+        registry = MetricsRegistry()
+        self.assertIs(registry.counter('things_total'), registry.counter('things_total'))
+        with self.assertRaises(ValueError):
+            registry.gauge('things_total')
+
+    def testPrometheusText(self):
+        registry = MetricsRegistry()
+        registry.counter('escalations_total', 'Escalations', ('level',)).labels(1).inc(3)
+        registry.gauge('open_alerts', 'Open alerts', function=lambda: 2)
+        registry.histogram('latency_seconds').observe(0.002)
+        text = registry.to_prometheus()
+        self.assertIn('# TYPE escalations_total counter\nescalations_total{level="1"} 3\n', text)
+        self.assertIn('# HELP open_alerts Open alerts\n# TYPE open_alerts gauge\nopen_alerts 2\n', text)
+        self.assertIn('latency_seconds_bucket{le="0.001"} 0\n', text)
+        self.assertIn('latency_seconds_bucket{le="0.0025"} 1\n', text)
+        self.assertIn('latency_seconds_bucket{le="+Inf"} 1\n', text)
+        self.assertIn('latency_seconds_count 1\n', text)
+
+    def testDisabledRegistry(self):
+        registry = MetricsRegistry(enabled=False)
+        registry.counter('things_total').inc()
+        registry.histogram('latency_seconds').observe(1)
+        self.assertEqual(registry.snapshot(), {})
+
+
+class TestPagerServiceMetrics(unittest.TestCase):
+    def testSnapshotAfterEscalation(self):
+        clock = VirtualClock()
+        scheduler = SimulatedScheduler(clock)
+        services = [MonitoredService(f'service #{i}') for i in range(2)]
+        escalation_policy = EscalationPolicy({
+            service.service_name: EscalationPolicyMonitoredService(
+                service,
+                [EscalationPolicyLevel([SMS('900100200')]), EscalationPolicyLevel([SMS('900300400')])]
+            )
+            for service in services
+        })
+        pager_service = PagerService(escalation_policy, clock=clock, scheduler=scheduler)
+        first, second = Alert(services[0], clock), Alert(services[1], clock)
+        pager_service.receive_alert(first)
+        pager_service.receive_alert(Alert(services[0], clock))
+        pager_service.receive_alert(second)
+        pager_service.handle_acknowledgement(second)
+        scheduler.advance(15 * 60)
+
+        snapshot = pager_service.metrics.snapshot()
+        self.assertEqual(snapshot['pager_alerts_received_total'], 3)
+        self.assertEqual(snapshot['pager_alerts_duplicate_total'], 1)
+        self.assertEqual(snapshot['pager_acknowledgements_total'], 1)
+        self.assertEqual(snapshot['pager_open_alerts'], 1)
+        self.assertEqual(snapshot['pager_escalations_total'], {'level=1': 1})
+        self.assertEqual(snapshot['pager_notifications_total'], 3)
+        self.assertEqual(snapshot['pager_timers_fired_total'], 1)
+        self.assertEqual(snapshot['pager_timer_lateness_seconds']['max'], 0)
+        self.assertEqual(snapshot['pager_acknowledgement_timeout_seconds']['count'], 1)
+        self.assertIn('pager_open_alerts 1\n', pager_service.metrics.to_prometheus())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,9 +1,12 @@
 from pydoc import pager
 import unittest
 import datetime
+import sys
 
 from event_emitter import EventEmitter
-from models import SMS, Alert, Email, EscalationPolicy, EscalationPolicyLevel, EscalationPolicyMonitoredService, PagerService, MonitoredService, TimerManager
+from models import SMS, Alert, Email, EscalationEnded, EscalationPolicy, EscalationPolicyLevel, EscalationPolicyMonitoredService, PagerService, MonitoredService, TimeoutEvent, TimerManager
+from notification_log import NotificationLog
+from registry import AlertRegistry
 
 class TestEmail(unittest.TestCase):
     def test_initialization(self):
@@ -13,8 +16,10 @@ class TestEmail(unittest.TestCase):
     def testNotify(self):
         email = Email('user@example.com')
         message = 'Service is down'
+        # the shared message is not copied per target, the description is built on demand
+        self.assertIs(email.notify(message), message)
         self.assertEqual(
-          email.notify(message),
+          email.describe(message),
           f'Emailing {email.email_address}: {message}'
         )
 
@@ -26,8 +31,9 @@ class TestSMS(unittest.TestCase):
     def test_initialization(self):
         sms = SMS('900100100')
         message = 'Service is down'
+        self.assertIs(sms.notify(message), message)
         self.assertEqual(
-          sms.notify(message),
+          sms.describe(message),
           f'Sending SMS to {sms.phone_number}: {message}'
         )
 
@@ -104,6 +110,17 @@ class TestAlert(unittest.TestCase):
       alert = Alert(service)
       alert.acknowledge()
       self.assertTrue(alert.acknowledged)
+  
+  def testSlottedWithDatetimeViews(self):
+      service = MonitoredService('service #1')
+      alert = Alert(service)
+      self.assertFalse(hasattr(alert, '__dict__'))
+      self.assertFalse(hasattr(service, '__dict__'))
+      self.assertEqual(alert.sent_at, datetime.datetime.fromtimestamp(alert.sent_timestamp))
+      alert.record_occurrence(alert.sent_timestamp + 60)
+      self.assertEqual(alert.last_seen - alert.sent_at, datetime.timedelta(seconds=60))
+      alert.sent_at = datetime.datetime(2024, 1, 1, 12, 0)
+      self.assertEqual(alert.sent_timestamp, datetime.datetime(2024, 1, 1, 12, 0).timestamp())
 
 class TestPagerService(unittest.TestCase):
     def test_initialization(self):
@@ -121,8 +138,8 @@ class TestPagerService(unittest.TestCase):
       ))
 
       self.assertIsInstance(pager_service.escalation_policy, EscalationPolicy)
-      self.assertIsInstance(pager_service.alerts, dict)
-      self.assertIsInstance(pager_service.alerts_log, list)
+      self.assertIsInstance(pager_service.alerts, AlertRegistry)
+      self.assertIsInstance(pager_service.alerts_log, NotificationLog)
       self.assertIsInstance(pager_service.timer_manager, TimerManager)
       self.assertIsInstance(pager_service.event_emitter, EventEmitter)
 
@@ -188,12 +205,9 @@ class TestPagerService(unittest.TestCase):
         # then the Alert escalates to the next level of the escalation policy,
         # and notifies all targets of the new level.
         # Test that the alert was sent to all targets of the next level
-        # Expected message for Email target in the second level:
-        expected_message_level_0 = "Sending SMS to 900100200: service #1 is unhealthy (Level 0)"
-        expected_message_level_1 = "Emailing user@example.com: service #1 is unhealthy (Level 1)"
         self.assertEqual(
-          pager_service.alerts_log,
-          [expected_message_level_0, expected_message_level_1]
+          [(record.service_name, record.level, record.target, record.status_name) for record in pager_service.alerts_log],
+          [('service #1', 0, 'sms:900100200', 'sent'), ('service #1', 1, 'email:user@example.com', 'sent')]
         )
     
     def testHandleNoMoreEscalationLevelsException(self):
@@ -218,6 +232,22 @@ class TestPagerService(unittest.TestCase):
         
         pager_service.timer_manager.cancel_timer(alert)
     
+    def testExpectedTimeoutOutcomesAreNotErrors(self):
+        service = MonitoredService('service #1')
+        alert = Alert(service)
+        pager_service = PagerService(EscalationPolicy(
+          {service.service_name: EscalationPolicyMonitoredService(service, [EscalationPolicyLevel([SMS('900100200')])])}
+        ))
+        pager_service.receive_alert(alert, 60)
+        pager_service.timer_manager.cancel_timer(alert)
+        # delivered by the timer: logged once, without a traceback, instead of as a failed listener
+        with self.assertLogs(level='INFO') as logs:
+            pager_service._handle_timeout_event(TimeoutEvent(alert))
+        self.assertEqual([(record.levelname, record.exc_info) for record in logs.records], [('INFO', None)])
+        self.assertIn('No more escalation levels', logs.output[0])
+        with self.assertRaises(EscalationEnded):
+            pager_service.handle_acknowledgement_timeout(alert)
+    
     def testHandleAcknowledgement(self):
         service = MonitoredService('service #1')
         alert = Alert(service)
@@ -298,15 +328,16 @@ class TestPagerService(unittest.TestCase):
         pager_service = PagerService(escalation_policy)
         timeout = 2
         pager_service.receive_alert(alert, timeout)
+        # a duplicate of the open alert is folded into it
+        self.assertIs(pager_service.receive_alert(duplicated_alert, timeout), alert)
         pager_service.handle_acknowledgement(alert)
+        # the service is still unhealthy: a duplicate of the acknowledged alert is folded too
+        self.assertIs(pager_service.receive_alert(Alert(service), timeout), alert)
 
-        with self.assertRaises(Exception) as context:
-            pager_service.receive_alert(duplicated_alert, timeout)
-            self.assertEqual(str(context.exception), 'Alert already exists')
-        
-            self.assertEqual(alert, pager_service.alerts[alert.monitored_service])
-            self.assertNotEqual(duplicated_alert, pager_service.alerts[duplicated_alert.monitored_service])
-            self.assertEqual(len(pager_service.alerts), 1)
+        self.assertEqual(alert.occurrences, 3)
+        self.assertEqual(len(pager_service.alerts_log), 1)
+        self.assertNotIn(service, pager_service.alerts)
+        self.assertNotIn(duplicated_alert, pager_service.timer_manager.timers)
 
     def testHandleTimeoutIfHealthy(self):
         """
@@ -346,7 +377,79 @@ class TestPagerService(unittest.TestCase):
         self.assertNotIn(alert.monitored_service, pager_service.alerts)
         # Verify that there is no timer associated with the alert
         self.assertNotIn(alert, pager_service.timer_manager.timers)
-            
+
+    def testStaleTimeoutOfResolvedAlert(self):
+        service = MonitoredService('service #1')
+        escalation_policy = EscalationPolicy(
+          {
+            service.service_name: EscalationPolicyMonitoredService(
+              service, [EscalationPolicyLevel([SMS('900100200')]), EscalationPolicyLevel([Email('user@example.com')])]
+            )
+          }
+        )
+        pager_service = PagerService(escalation_policy)
+        self.addCleanup(pager_service.timer_manager.scheduler.close)
+        old, new = Alert(service), Alert(service)
+        pager_service.receive_alert(old, 60)
+        pager_service.resolve_healthy(service)
+        pager_service.receive_alert(new, 60)
+        # the old alert's timer was already taken by the dispatcher when it was resolved
+        with self.assertRaises(Exception) as context:
+            pager_service.handle_acknowledgement_timeout(old)
+        self.assertEqual(str(context.exception), 'Alert is no longer open')
+        self.assertEqual(old.current_level, 0)
+        self.assertNotIn(old, pager_service.timer_manager.timers)
+        self.assertIs(pager_service.alerts[service], new)
+        self.assertEqual([record.level for record in pager_service.alerts_log], [0, 0])
+
+    def testAcknowledgeById(self):
+        service = MonitoredService('service #1')
+        escalation_policy = EscalationPolicy(
+          {service.service_name: EscalationPolicyMonitoredService(service, [EscalationPolicyLevel([SMS('900100200')])])}
+        )
+        pager_service = PagerService(escalation_policy)
+        self.addCleanup(pager_service.timer_manager.scheduler.close)
+        alert = Alert(service)
+        pager_service.receive_alert(alert, 60)
+        self.assertIs(pager_service.alerts.by_id(alert.alert_id), alert)
+        self.assertIs(pager_service.acknowledge(alert.alert_id), alert)
+        self.assertTrue(alert.acknowledged)
+        self.assertIsNone(pager_service.alerts.by_id(alert.alert_id))
+        self.assertIsNone(pager_service.acknowledge(alert.alert_id))
+        self.assertEqual(pager_service.metrics.snapshot()['pager_acknowledgements_total'], 1)
+        pager_service.resolve_healthy(service)
+        self.assertEqual(pager_service.receive_events([('alert', service.service_name), ('ack', alert.alert_id)]), ['opened', 'ignored'])
+        self.assertEqual(pager_service.receive_events([('ack', pager_service.alerts[service].alert_id)]), ['acknowledged'])
+
+    def testResolveHealthyReleasesTheAlert(self):
+        service = MonitoredService('service #1')
+        escalation_policy = EscalationPolicy(
+          {service.service_name: EscalationPolicyMonitoredService(service, [EscalationPolicyLevel([SMS('900100200')])])}
+        )
+        pager_service = PagerService(escalation_policy)
+        scheduler = pager_service.timer_manager.scheduler
+        self.addCleanup(scheduler.close)
+        alert = Alert(service)
+        pager_service.receive_alert(alert, 60)
+        timer = pager_service.timer_manager.timers[alert]
+        self.assertIs(pager_service.resolve_healthy(service), alert)
+        self.assertTrue(service.healthy)
+        # released now, not when the timer would have fired
+        self.assertEqual((len(pager_service.alerts), len(pager_service.timer_manager.timers), len(scheduler)), (0, 0, 0))
+        self.assertIsNone(pager_service.alerts.by_id(alert.alert_id))
+        self.assertEqual((timer.callback, timer.args), (None, ()))
+        self.assertIsNone(pager_service.resolve_healthy(service))
+
+
+class TestModelsPackage(unittest.TestCase):
+    def testNamesResolveLazily(self):
+        import models
+        self.assertIs(models.PagerService, PagerService)
+        self.assertIs(models.Alert, sys.modules['models.alert'].Alert)
+        self.assertIn('TimerManager', dir(models))
+        with self.assertRaises(AttributeError):
+            models.NoSuchThing
+
 
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file
@@ -0,0 +1,86 @@
+import csv
+import io
+import json
+import tracemalloc
+import unittest
+
+from models import SMS, Email
+from notification_log import DROPPED, QUEUED, SENT, NotificationLog
+from policy import intern_service, intern_target
+
+
+class TestNotificationLog(unittest.TestCase):
+    def setUp(self):
+        self.service_a = intern_service('service #a')
+        self.service_b = intern_service('service #b')
+        self.sms = intern_target(SMS('900100200'))
+        self.email = intern_target(Email('user@example.com'))
+
+    def testKeepsTheLastCapacityRecords(self):
+        log = NotificationLog(capacity=3)
+        for i in range(5):
+            log.append(self.service_a, i, self.sms, SENT, timestamp=float(i))
+        self.assertEqual(len(log), 3)
+        self.assertEqual(log.total, 5)
+        self.assertEqual([record.level for record in log], [2, 3, 4])
+
+    def testRecordFields(self):
+        log = NotificationLog()
+        log.append(self.service_a, 1, self.email, QUEUED, timestamp=10.0)
+        record = next(iter(log))
+        self.assertEqual(record.service_name, 'service #a')
+        self.assertEqual(record.level, 1)
+        self.assertEqual(record.target, 'email:user@example.com')
+        self.assertEqual(record.status_name, 'queued')
+        self.assertEqual(record.timestamp, 10.0)
+
+    def testFilters(self):
+        log = NotificationLog()
+        for i in range(10):
+            log.append(self.service_a if i % 2 else self.service_b, 0, self.sms, SENT, timestamp=float(i))
+        self.assertEqual([record.timestamp for record in log.records(service='service #a')], [1.0, 3.0, 5.0, 7.0, 9.0])
+        self.assertEqual([record.timestamp for record in log.records(service=self.service_b, since=4.0, until=8.0)], [4.0, 6.0])
+
+    def testExports(self):
+        log = NotificationLog()
+        log.append(self.service_a, 0, self.sms, SENT, timestamp=1.0)
+        log.append(self.service_b, 1, self.email, DROPPED, timestamp=2.0)
+
+        jsonl = io.StringIO()
+        self.assertEqual(log.export_jsonl(jsonl, service='service #b'), 1)
+        self.assertEqual(
+          [json.loads(line) for line in jsonl.getvalue().splitlines()],
+          [{'timestamp': 2.0, 'service': 'service #b', 'level': 1, 'target': 'email:user@example.com', 'status': 'dropped'}]
+        )
+
+        rows = io.StringIO()
+        self.assertEqual(log.export_csv(rows), 2)
+        rows.seek(0)
+        self.assertEqual(
+          list(csv.reader(rows)),
+          [
+            ['timestamp', 'service', 'level', 'target', 'status'],
+            ['1.0', 'service #a', '0', 'sms:900100200', 'sent'],
+            ['2.0', 'service #b', '1', 'email:user@example.com', 'dropped'],
+          ]
+        )
+
+    def testMemoryStaysFlat(self):
+        log = NotificationLog(capacity=1_000)
+        tracemalloc.start()
+        for i in range(1_000):
+            log.append(self.service_a, 0, self.sms)
+        baseline = tracemalloc.get_traced_memory()[0]
+        for i in range(50_000):
+            log.append(self.service_a, 0, self.sms)
+        grown = tracemalloc.get_traced_memory()[0] - baseline
+        tracemalloc.stop()
+        self.assertLess(grown, 4096)
+
+    def testRejectsEmptyCapacity(self):
+        with self.assertRaises(ValueError):
+            NotificationLog(capacity=0)
+
+
+if __name__ == '__main__':
+    unittest.main()
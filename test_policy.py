@@ -0,0 +1,124 @@
+import unittest
+
+from models import SMS, Alert, Email, EscalationPolicy, EscalationPolicyLevel, EscalationPolicyMonitoredService, MonitoredService, PagerService
+from policy import DEFAULT_ACK_TIMEOUT, CompiledEscalationPolicy, intern_service, service_name
+
+
+def policy_for(service, *levels):
+    return EscalationPolicy(
+      {
+        service.service_name: EscalationPolicyMonitoredService(
+          service,
+          [EscalationPolicyLevel(targets) for targets in levels]
+        )
+      }
+    )
+
+
+class TestInterning(unittest.TestCase):
+    def testServiceIdsAreStable(self):
+        service_id = intern_service('service #1')
+        self.assertEqual(intern_service('service #1'), service_id)
+        self.assertEqual(MonitoredService('service #1').service_id, service_id)
+        self.assertEqual(service_name(service_id), 'service #1')
+        self.assertNotEqual(intern_service('service #2'), service_id)
+
+
+class TestCompiledEscalationPolicy(unittest.TestCase):
+    def testTargetsLookup(self):
+        service = MonitoredService('service #1')
+        sms, email = SMS('900100200'), Email('user@example.com')
+        compiled = policy_for(service, [sms], [email, sms]).compile()
+        self.assertIsInstance(compiled, CompiledEscalationPolicy)
+        self.assertEqual(compiled.targets(service.service_id, 0), (sms,))
+        self.assertEqual(compiled.targets(service.service_id, 1), (email, sms))
+        self.assertIsNone(compiled.targets(service.service_id, 2))
+        self.assertEqual(compiled.level_count(service.service_id), 2)
+        self.assertIn(service.service_id, compiled)
+
+    def testUnknownService(self):
+        compiled = policy_for(MonitoredService('service #1'), [SMS('900100200')]).compile()
+        unknown = MonitoredService('unknown service')
+        self.assertEqual(compiled.level_count(unknown.service_id), 0)
+        self.assertIsNone(compiled.targets(unknown.service_id, 0))
+        self.assertNotIn(unknown.service_id, compiled)
+
+    def testIsImmutable(self):
+        compiled = policy_for(MonitoredService('service #1'), [SMS('900100200')]).compile()
+        with self.assertRaises(AttributeError):
+            compiled.extra = 1
+        self.assertIsInstance(compiled.table, tuple)
+
+    def testValidation(self):
+        service = MonitoredService('service #1')
+        with self.assertRaises(ValueError):
+            policy_for(service).compile()
+        with self.assertRaises(ValueError):
+            policy_for(service, []).compile()
+        with self.assertRaises(ValueError):
+            policy_for(service, ['not a target']).compile()
+        with self.assertRaises(ValueError):
+            EscalationPolicy(
+              {'another name': EscalationPolicyMonitoredService(service, [EscalationPolicyLevel([SMS('1')])])}
+            ).compile()
+
+    def testTimeoutSchedule(self):
+        service = MonitoredService('service #1')
+        compiled = EscalationPolicy(
+          {
+            service.service_name: EscalationPolicyMonitoredService(
+              service,
+              [EscalationPolicyLevel([SMS('1')], timeout=30), EscalationPolicyLevel([SMS('2')]), EscalationPolicyLevel([SMS('3')])],
+              timeout=90
+            )
+          }
+        ).compile()
+        self.assertEqual(compiled.schedule(service.service_id), (30.0, 120.0, 210.0))
+        self.assertEqual(compiled.timeout(service.service_id, 1), 90.0)
+        self.assertIsNone(compiled.timeout(service.service_id, 3))
+        default = policy_for(service, [SMS('1')]).compile()
+        self.assertEqual(default.schedule(service.service_id), (DEFAULT_ACK_TIMEOUT,))
+        for timeout in (0, -5, '60'):
+            with self.assertRaises(ValueError):
+                EscalationPolicy(
+                  {service.service_name: EscalationPolicyMonitoredService(service, [EscalationPolicyLevel([SMS('1')], timeout)])}
+                ).compile()
+
+class TestPolicyHotSwap(unittest.TestCase):
+    def testInFlightAlertEscalatesWithNewPolicy(self):
+        service = MonitoredService('service #1')
+        pager_service = PagerService(policy_for(service, [SMS('900100200')]))
+        alert = Alert(service)
+        pager_service.receive_alert(alert, 60)
+        pager_service.update_escalation_policy(policy_for(service, [SMS('900100200')], [Email('oncall@example.com')]))
+        pager_service.handle_acknowledgement_timeout(alert)
+        pager_service.timer_manager.cancel_timer(alert)
+        self.assertEqual(list(pager_service.alerts_log)[-1].target, 'email:oncall@example.com')
+
+    def testInvalidPolicyIsNotSwappedIn(self):
+        service = MonitoredService('service #1')
+        pager_service = PagerService(policy_for(service, [SMS('900100200')]))
+        escalation_policy, compiled = pager_service.escalation_policy, pager_service.compiled_policy
+        with self.assertRaises(ValueError):
+            pager_service.update_escalation_policy(policy_for(service))
+        self.assertIs(pager_service.compiled_policy, compiled)
+        self.assertIs(pager_service.escalation_policy, escalation_policy)
+
+    def testPolicyAndCompiledFormSwapTogether(self):
+        service, added = MonitoredService('service #1'), MonitoredService('service #2')
+        pager_service = PagerService(policy_for(service, [SMS('900100200')]))
+        active_policy = pager_service.active_policy
+        escalation_policy = EscalationPolicy({
+            **policy_for(service, [SMS('900100200')]).policies,
+            **policy_for(added, [Email('oncall@example.com')]).policies,
+        })
+        pager_service.update_escalation_policy(escalation_policy)
+        self.assertIsNot(pager_service.active_policy, active_policy)
+        self.assertIs(pager_service.escalation_policy, escalation_policy)
+        self.assertIn(added.service_id, pager_service.compiled_policy.service_ids)
+        self.assertEqual(pager_service.receive_events([('alert', 'service #2')]), ['opened'])
+        pager_service.resolve_healthy(added)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,169 @@
+import json
+import os
+import tempfile
+import unittest
+
+from clock import VirtualClock
+from models import EscalationPolicy, MonitoredService, PagerService, load_policy
+from policy_store import PolicySnapshot, PolicyStore, SnapshotEscalationPolicy, write_snapshot
+from scheduler import SimulatedScheduler
+
+DOCUMENT = {
+    'payments': [['sms:900100200'], ['email:oncall@example.com', 'sms:900100200']],
+    'search': {'timeout': 60, 'levels': [{'targets': ['email:search@example.com'], 'timeout': 30}, ['sms:900300400']]},
+    'checkout': [['email:checkout@example.com']],
+}
+
+
+class PolicyFiles(unittest.TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.directory = directory.name
+
+    def path(self, name: str) -> str:
+        return os.path.join(self.directory, name)
+
+    def write_source(self, document, name: str = 'policy.json') -> str:
+        with open(self.path(name), 'w', encoding='utf-8') as source:
+            json.dump(document, source)
+        return self.path(name)
+
+
+class TestPolicySnapshot(PolicyFiles):
+    def testRoundTrip(self):
+        write_snapshot(DOCUMENT, self.path('policy.snapshot'))
+        snapshot = PolicySnapshot(self.path('policy.snapshot'))
+        self.addCleanup(snapshot.close)
+        self.assertEqual(list(snapshot.names()), ['checkout', 'payments', 'search'])
+        self.assertIsNone(snapshot.find('unknown'))
+        self.assertEqual(
+          snapshot.levels(snapshot.find('payments')),
+          [(('sms:900100200',), 900.0), (('email:oncall@example.com', 'sms:900100200'), 1800.0)]
+        )
+        self.assertEqual(snapshot.levels(snapshot.find('search')), [(('email:search@example.com',), 30.0), (('sms:900300400',), 90.0)])
+
+    def testCompiledView(self):
+        write_snapshot(DOCUMENT, self.path('policy.snapshot'))
+        escalation_policy = SnapshotEscalationPolicy(PolicySnapshot(self.path('policy.snapshot')))
+        compiled = escalation_policy.compile()
+        payments = escalation_policy.policies['payments'].monitored_service
+        self.assertEqual([target.destination for target in compiled.targets(payments.service_id, 1)], ['oncall@example.com', '900100200'])
+        self.assertIs(compiled.targets(payments.service_id, 0)[0], compiled.targets(payments.service_id, 1)[1])
+        self.assertEqual(compiled.level_count(payments.service_id), 2)
+        self.assertIsNone(compiled.targets(payments.service_id, 2))
+        self.assertNotIn(MonitoredService('unknown').service_id, compiled)
+        self.assertIs(escalation_policy.policies['payments'].monitored_service, payments)
+        self.assertNotIn('unknown', escalation_policy.policies)
+        self.assertEqual(len(escalation_policy.policies), 3)
+
+    def testInvalidSource(self):
+        for document in ({'payments': []}, {'payments': [[]]}, {'payments': [['fax:1']]}, {'payments': {'timeout': -1, 'levels': [['sms:1']]}}, ['payments']):
+            with self.assertRaises(ValueError):
+                write_snapshot(document, self.path('policy.snapshot'))
+        self.assertFalse(os.path.exists(self.path('policy.snapshot')))
+
+    def testNotASnapshot(self):
+        with open(self.path('policy.snapshot'), 'wb') as snapshot:
+            snapshot.write(b'{"payments": [["sms:1"]]}' * 4)
+        with self.assertRaises(ValueError):
+            PolicySnapshot(self.path('policy.snapshot'))
+
+
+class TestPolicyStore(PolicyFiles):
+    def testLoadCompilesStaleSnapshot(self):
+        source = self.write_source(DOCUMENT)
+        store = PolicyStore(source)
+        self.assertEqual(len(store.load().policies), 3)
+        self.assertTrue(os.path.exists(source + '.snapshot'))
+        os.utime(source + '.snapshot', (0, 0))
+        self.write_source({'payments': [['sms:900100200']]})
+        self.assertEqual(list(store.load().policies), ['payments'])
+
+    def testYamlSource(self):
+        with open(self.path('policy.yaml'), 'w', encoding='utf-8') as source:
+            source.write('payments:\n  timeout: 120\n  levels:\n    - [sms:900100200]\n    - [email:oncall@example.com]\n')
+        escalation_policy = PolicyStore(self.path('policy.yaml')).load()
+        service = escalation_policy.policies['payments'].monitored_service
+        self.assertEqual(escalation_policy.compile().schedule(service.service_id), (120.0, 240.0))
+
+    def testPagerServiceEscalatesFromSnapshot(self):
+        clock = VirtualClock()
+        scheduler = SimulatedScheduler(clock)
+        escalation_policy = PolicyStore(self.write_source(DOCUMENT)).load()
+        pager_service = PagerService(escalation_policy, clock=clock, scheduler=scheduler)
+        self.assertEqual(pager_service.receive_events([('alert', 'search'), ('alert', 'unknown')])[1].args, ('No escalation policy for unknown',))
+        scheduler.advance(30)
+        self.assertEqual(
+          [(record.timestamp, record.level, record.target) for record in pager_service.alerts_log],
+          [(0.0, 0, 'email:search@example.com'), (30.0, 1, 'sms:900300400')]
+        )
+
+    def testIncrementalReload(self):
+        clock = VirtualClock()
+        scheduler = SimulatedScheduler(clock)
+        source = self.write_source(DOCUMENT)
+        store = PolicyStore(source)
+        pager_service = PagerService(store.load(), clock=clock, scheduler=scheduler)
+        old_policies = pager_service.escalation_policy.policies
+        checkout = old_policies['checkout']
+        payments = old_policies['payments'].monitored_service
+        pager_service.receive_events([('alert', 'payments')])
+
+        self.write_source({
+            'payments': [['sms:900100200'], ['email:escalations@example.com']],
+            'checkout': [['email:checkout@example.com']],
+            'billing': [['sms:900500600']],
+        })
+        diff = store.reload(pager_service)
+        self.assertEqual((diff.added, diff.changed, diff.removed), (['billing'], ['payments'], ['search']))
+        policies = pager_service.escalation_policy.policies
+        # unchanged services are carried over as they were, changed ones keep their MonitoredService
+        self.assertIs(policies['checkout'], checkout)
+        self.assertIs(policies['payments'].monitored_service, payments)
+        self.assertNotIn('search', policies)
+        # the open alert escalates with the new policy
+        scheduler.advance(900)
+        self.assertEqual(list(pager_service.alerts_log)[-1].target, 'email:escalations@example.com')
+
+    def testReloadKeepsServicesOfAnUploadedPolicy(self):
+        source = self.write_source(DOCUMENT)
+        store = PolicyStore(source)
+        pager_service = PagerService(store.load())
+        self.addCleanup(pager_service.timer_manager.scheduler.close)
+        # PUT /policy: a new service, with its own MonitoredService, gets an alert
+        pager_service.update_escalation_policy(load_policy({**DOCUMENT, 'billing': [['sms:900500600']]}, {}))
+        billing = pager_service.escalation_policy.policies['billing'].monitored_service
+        self.assertEqual(pager_service.receive_events([('alert', 'billing')]), ['opened'])
+
+        self.write_source({**DOCUMENT, 'billing': [['sms:900700800']]})
+        store.reload(pager_service)
+        self.assertIs(pager_service.escalation_policy.policies['billing'].monitored_service, billing)
+        self.assertEqual(pager_service.receive_events([('alert', 'billing'), ('ack', 'billing')]), ['duplicate', 'acknowledged'])
+        self.assertEqual(len(pager_service.alerts), 0)
+
+    def testFirstReloadAppliesThePolicy(self):
+        source = self.write_source(DOCUMENT)
+        store = PolicyStore(source)
+        pager_service = PagerService(EscalationPolicy({}))
+        self.addCleanup(pager_service.timer_manager.scheduler.close)
+        diff = store.reload(pager_service)
+        self.assertEqual(sorted(diff.added), ['checkout', 'payments', 'search'])
+        self.assertIs(pager_service.escalation_policy, store.policy)
+        self.assertEqual(pager_service.receive_events([('alert', 'checkout')]), ['opened'])
+
+    def testInvalidReloadKeepsPolicy(self):
+        source = self.write_source(DOCUMENT)
+        store = PolicyStore(source)
+        pager_service = PagerService(store.load())
+        self.addCleanup(pager_service.timer_manager.scheduler.close)
+        escalation_policy = pager_service.escalation_policy
+        self.write_source({'payments': [['fax:1']]})
+        with self.assertRaises(ValueError):
+            store.reload(pager_service)
+        self.assertIs(pager_service.escalation_policy, escalation_policy)
+        self.assertIs(store.policy, escalation_policy)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,89 @@
+import random
+import threading
+import time
+import unittest
+from collections import Counter
+
+from models import SMS, Alert, Email, EscalationPolicy, EscalationPolicyLevel, EscalationPolicyMonitoredService, MonitoredService, PagerService
+from registry import AlertRegistry
+
+
+class TestAlertRegistry(unittest.TestCase):
+    def testMappingInterface(self):
+        registry = AlertRegistry(stripes=4)
+        services = [MonitoredService(f'service #{i}') for i in range(10)]
+        for service in services:
+            registry[service] = Alert(service)
+        self.assertEqual(len(registry), 10)
+        self.assertCountEqual(list(registry), services)
+        self.assertIn(services[3], registry)
+        del registry[services[3]]
+        self.assertNotIn(services[3], registry)
+        self.assertIsNone(registry.get(services[3]))
+        self.assertIs(registry.pop(services[4]).monitored_service, services[4])
+        self.assertEqual(len(registry.values()), 8)
+        replaced = registry[services[0]]
+        registry[services[0]] = Alert(services[0])
+        self.assertIsNone(registry.by_id(replaced.alert_id))
+        self.assertIs(registry.by_id(registry[services[0]].alert_id), registry[services[0]])
+        self.assertIsNone(registry.by_id(Alert(services[3]).alert_id))
+
+    def testSameServiceSameLock(self):
+        registry = AlertRegistry()
+        service = MonitoredService('service #1')
+        self.assertIs(registry.lock(service), registry.lock(service))
+
+
+class TestPagerServiceConcurrency(unittest.TestCase):
+    def testNoLostOrDuplicatedNotifications(self):
+        services = [MonitoredService(f'stress service #{i}') for i in range(400)]
+        pager_service = PagerService(EscalationPolicy(
+          {
+            service.service_name: EscalationPolicyMonitoredService(
+              service,
+              [
+                EscalationPolicyLevel([SMS('900100200')]),
+                EscalationPolicyLevel([Email('user@example.com')]),
+                EscalationPolicyLevel([SMS('900100300')])
+              ]
+            )
+          for service in services
+          }
+        ))
+        alerts = {service: Alert(service) for service in services}
+        errors = []
+
+        def worker(chunk, seed):
+            rng = random.Random(seed)
+            try:
+                for service in chunk:
+                    # tiny delays so timeouts fire while other threads receive and acknowledge
+                    pager_service.receive_alert(alerts[service], rng.choice([0.001, 0.002, 0.005]))
+                for service in chunk:
+                    time.sleep(rng.random() / 1000)
+                    pager_service.handle_acknowledgement(alerts[service])
+            except Exception as error:
+                errors.append(error)
+
+        threads = [threading.Thread(target=worker, args=(services[i::8], i)) for i in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        time.sleep(0.05)
+
+        self.assertEqual(errors, [])
+        self.assertEqual(len(pager_service.alerts), 0)
+        notifications = Counter((record.service_name, record.level) for record in pager_service.alerts_log)
+        for service in services:
+            alert = alerts[service]
+            # every level reached was paged exactly once, levels past the last one page nobody
+            reached = range(min(alert.current_level, 2) + 1)
+            self.assertEqual(
+              {level: notifications[(service.service_name, level)] for level in range(3)},
+              {level: 1 if level in reached else 0 for level in range(3)}
+            )
+
+
+if __name__ == '__main__':
+    unittest.main()
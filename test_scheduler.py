@@ -0,0 +1,103 @@
+import threading
+import unittest
+
+from event_emitter import EventEmitter
+from models import Alert, MonitoredService, TimerManager
+from scheduler import HeapScheduler
+
+
+class TestHeapScheduler(unittest.TestCase):
+    def testFiresInDeadlineOrder(self):
+        scheduler = HeapScheduler()
+        fired = []
+        done = threading.Event()
+        scheduler.schedule(0.03, fired.append, 'late')
+        scheduler.schedule(0.01, fired.append, 'early')
+        scheduler.schedule(0.05, lambda: done.set())
+        self.assertTrue(done.wait(2))
+        self.assertEqual(fired, ['early', 'late'])
+        scheduler.close()
+
+    def testCancelledTimerDoesNotFire(self):
+        scheduler = HeapScheduler()
+        fired = []
+        done = threading.Event()
+        timer = scheduler.schedule(0.01, fired.append, 'cancelled')
+        scheduler.cancel(timer)
+        scheduler.schedule(0.02, lambda: done.set())
+        self.assertTrue(done.wait(2))
+        self.assertEqual(fired, [])
+        self.assertEqual(len(scheduler), 0)
+        scheduler.close()
+
+    def testFailingCallbackDoesNotStopDispatcher(self):
+        scheduler = HeapScheduler()
+        done = threading.Event()
+
+        def fail():
+            raise Exception('boom')
+
+        scheduler.schedule(0.01, fail)
+        scheduler.schedule(0.02, lambda: done.set())
+        with self.assertLogs('scheduler', level='ERROR'):
+            self.assertTrue(done.wait(2))
+        scheduler.close()
+
+    def testScheduleManyFiresEveryTimer(self):
+        scheduler = HeapScheduler()
+        fired = []
+        done = threading.Event()
+        scheduler.schedule(3600, fired.append, 'later')
+        scheduler.schedule_many([(0.01 + i / 1000, fired.append, (i,)) for i in range(10)])
+        scheduler.schedule(0.05, lambda: done.set())
+        self.assertTrue(done.wait(2))
+        self.assertEqual(fired, list(range(10)))
+        self.assertEqual(len(scheduler), 1)
+        scheduler.close()
+
+    def testCompactsCancelledEntries(self):
+        scheduler = HeapScheduler()
+        timers = [scheduler.schedule(3600, print) for _ in range(HeapScheduler.COMPACT_THRESHOLD * 3)]
+        for timer in timers:
+            scheduler.cancel(timer)
+        self.assertLess(len(scheduler._heap), HeapScheduler.COMPACT_THRESHOLD * 3)
+        self.assertEqual(len(scheduler), 0)
+        scheduler.close()
+
+
+class TestTimerManager(unittest.TestCase):
+    def testEmitsTimeoutWithoutThreadPerTimer(self):
+        emitter = EventEmitter()
+        timer_manager = TimerManager(emitter)
+        received = []
+        done = threading.Event()
+        alerts = [Alert(MonitoredService(f'service #{i}')) for i in range(50)]
+
+        def on_timeout(event):
+            received.append(event.alert)
+            if len(received) == len(alerts):
+                done.set()
+
+        emitter.on('timeout', on_timeout)
+        threads_before = threading.active_count()
+        for alert in alerts:
+            timer_manager.set_timer(alert, 0.01)
+        self.assertLessEqual(threading.active_count() - threads_before, 1)
+        self.assertTrue(done.wait(2))
+        self.assertCountEqual(received, alerts)
+        timer_manager.scheduler.close()
+
+    def testSetTimerReplacesPreviousTimer(self):
+        timer_manager = TimerManager(EventEmitter())
+        alert = Alert(MonitoredService('service #1'))
+        timer_manager.set_timer(alert, 60)
+        timer_manager.set_timer(alert, 60)
+        self.assertEqual(len(timer_manager.scheduler), 1)
+        timer_manager.cancel_timer(alert)
+        self.assertNotIn(alert, timer_manager.timers)
+        self.assertEqual(len(timer_manager.scheduler), 0)
+        timer_manager.scheduler.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
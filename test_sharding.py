@@ -0,0 +1,92 @@
+import unittest
+
+from models import SMS, Email, EscalationPolicy, EscalationPolicyLevel, EscalationPolicyMonitoredService, MonitoredService
+from sharding import ShardedPagerService, shard_of, shard_of_alert, split_policy
+
+
+def policy_for(names, level_targets):
+    return EscalationPolicy({
+        name: EscalationPolicyMonitoredService(MonitoredService(name), [EscalationPolicyLevel(list(targets)) for targets in level_targets])
+        for name in names
+    })
+
+
+class TestSharding(unittest.TestCase):
+    def testShardOfIsStableAndSpreads(self):
+        names = [f'service #{i}' for i in range(1_000)]
+        self.assertEqual([shard_of(name, 4) for name in names], [shard_of(name, 4) for name in names])
+        counts = [0] * 4
+        for name in names:
+            counts[shard_of(name, 4)] += 1
+        self.assertTrue(all(count > 150 for count in counts))
+
+    def testSplitPolicy(self):
+        escalation_policy = policy_for([f'service #{i}' for i in range(20)], [[SMS('900100200')]])
+        slices = split_policy(escalation_policy, 3)
+        self.assertEqual(sum(len(policy_slice.policies) for policy_slice in slices), 20)
+        for shard, policy_slice in enumerate(slices):
+            self.assertTrue(all(shard_of(name, 3) == shard for name in policy_slice.policies))
+
+    def testEventsReachTheOwningShard(self):
+        names = [f'service #{i}' for i in range(8)]
+        with ShardedPagerService(policy_for(names, [[SMS('900100200')], [Email('oncall@example.com')]]), shards=3, ack_delay=60) as pager:
+            results = pager.receive_events(
+                [('alert', name) for name in names]
+                + [('alert', names[0]), ('ack', names[1]), ('healthy', names[2]), ('ack', names[2]), ('alert', 'unknown')]
+            )
+            self.assertEqual(results[:8], ['opened'] * 8)
+            self.assertEqual(results[8:12], ['duplicate', 'acknowledged', 'resolved', 'ignored'])
+            self.assertIsInstance(results[12], Exception)
+
+            snapshots = pager.metrics_snapshots()
+            self.assertEqual(len(snapshots), 3)
+            self.assertEqual(sum(snapshot['pager_open_alerts'] for snapshot in snapshots), 6)
+            for shard, snapshot in enumerate(snapshots):
+                owned = sum(1 for name in names if shard_of(name, 3) == shard)
+                self.assertEqual(snapshot['pager_alerts_received_total'], owned + (shard_of(names[0], 3) == shard))
+
+    def testAcknowledgeByAlertId(self):
+        names = ['payments', 'search', 'checkout']
+        with ShardedPagerService(policy_for(names, [[SMS('900100200')]]), shards=3, ack_delay=60) as pager:
+            self.assertEqual(pager.receive_events([('alert', name) for name in names]), ['opened'] * 3)
+            # each shard numbers its first alert shards + shard
+            alert_ids = [3 + shard_of(name, 3) for name in names]
+            self.assertEqual([shard_of_alert(alert_id, 3) for alert_id in alert_ids], [shard_of(name, 3) for name in names])
+            self.assertEqual(pager.receive_events([('ack', alert_ids[0]), ('ack', alert_ids[0]), ('ack', 1_000_000)]), ['acknowledged', 'ignored', 'ignored'])
+            snapshots = pager.metrics_snapshots()
+            self.assertEqual(sum(snapshot['pager_open_alerts'] for snapshot in snapshots), 2)
+
+    def testPolicyUpdateKeepsOpenAlerts(self):
+        names = ['payments', 'search']
+        with ShardedPagerService(policy_for(names, [[SMS('900100200')]]), shards=2, ack_delay=60) as pager:
+            self.assertEqual(pager.receive_alert('payments'), 'opened')
+            pager.update_escalation_policy(policy_for(names + ['checkout'], [[SMS('900300400')]]))
+            self.assertEqual(pager.acknowledge('payments'), 'acknowledged')
+            self.assertEqual(pager.receive_alert('checkout'), 'opened')
+            with self.assertRaises(ValueError):
+                pager.update_escalation_policy(EscalationPolicy({'payments': EscalationPolicyMonitoredService(MonitoredService('payments'), [])}))
+
+    def testSpawnedShards(self):
+        # spawned shards intern service names afresh, ids must not be carried over from this process
+        MonitoredService('interned before the spawned services')
+        names = [f'spawned service #{i}' for i in range(6)]
+        with ShardedPagerService(policy_for(names, [[SMS('900100200')]]), shards=2, ack_delay=60, context='spawn') as pager:
+            self.assertEqual(pager.receive_events([('alert', name) for name in names]), ['opened'] * 6)
+            added = [f'added service #{i}' for i in range(6)]
+            pager.update_escalation_policy(policy_for(names + added, [[SMS('900100200')]]))
+            self.assertEqual(pager.receive_events([('alert', name) for name in added]), ['opened'] * 6)
+
+    def testPolicyUpdateAddsServices(self):
+        names = ['payments', 'search']
+        with ShardedPagerService(policy_for(names, [[SMS('900100200')]]), shards=2, ack_delay=60) as pager:
+            # names interned here after the fork take ids the shards have not given out the same way
+            for i in range(10):
+                MonitoredService(f'interned after the fork #{i}')
+            added = [f'added service #{i}' for i in range(6)]
+            pager.update_escalation_policy(policy_for(names + added, [[SMS('900100200')], [Email('oncall@example.com')]]))
+            self.assertEqual(pager.receive_events([('alert', name) for name in added]), ['opened'] * 6)
+            self.assertEqual(sum(snapshot['pager_notifications_total'] for snapshot in pager.metrics_snapshots()), 6)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,184 @@
+import json
+import os
+import tempfile
+import unittest
+
+from clock import VirtualClock
+from models import SMS, Alert, Email, EscalationPolicy, EscalationPolicyLevel, EscalationPolicyMonitoredService, MonitoredService, PagerService
+from scheduler import SimulatedScheduler
+from simulation import EscalationSimulator, TrafficEvent, load_traffic
+
+
+def two_level_policy(*services):
+    return EscalationPolicy(
+      {
+        service.service_name: EscalationPolicyMonitoredService(
+          service,
+          [
+            EscalationPolicyLevel([SMS('900100200')]),
+            EscalationPolicyLevel([Email('user@example.com')])
+          ]
+        )
+        for service in services
+      }
+    )
+
+
+class TestVirtualClock(unittest.TestCase):
+    def testAdvance(self):
+        clock = VirtualClock(start_time=1_000.0)
+        clock.advance(15)
+        self.assertEqual(clock.time(), 1_015.0)
+        self.assertEqual(clock.monotonic(), 15.0)
+        self.assertEqual(clock.now().timestamp(), 1_015.0)
+        with self.assertRaises(ValueError):
+            clock.advance(-1)
+
+    def testSimulatedSchedulerFiresInOrderAtDeadline(self):
+        clock = VirtualClock()
+        scheduler = SimulatedScheduler(clock)
+        fired = []
+        scheduler.schedule(20, lambda: fired.append(('late', clock.monotonic())))
+        scheduler.schedule(10, lambda: fired.append(('early', clock.monotonic())))
+        self.assertEqual(scheduler.advance(15), 1)
+        self.assertEqual(clock.monotonic(), 15)
+        scheduler.advance(100)
+        self.assertEqual(fired, [('early', 10), ('late', 20)])
+
+
+class TestPagerServiceOnVirtualClock(unittest.TestCase):
+    def testFifteenMinuteEscalationWithoutWaiting(self):
+        clock = VirtualClock(start_time=1_700_000_000.0)
+        scheduler = SimulatedScheduler(clock)
+        service = MonitoredService('service #1')
+        pager_service = PagerService(two_level_policy(service), clock=clock, scheduler=scheduler)
+        alert = Alert(service, clock)
+        pager_service.receive_alert(alert)
+        self.assertEqual(pager_service.timer_manager.deadline(alert), clock.time() + 15 * 60)
+        scheduler.advance(15 * 60 - 1)
+        self.assertEqual(alert.current_level, 0)
+        scheduler.advance(1)
+        self.assertEqual(alert.current_level, 1)
+        self.assertEqual(
+          [(record.timestamp, record.level) for record in pager_service.alerts_log],
+          [(1_700_000_000.0, 0), (1_700_000_000.0 + 15 * 60, 1)]
+        )
+
+    def testPerLevelTimeouts(self):
+        clock = VirtualClock()
+        scheduler = SimulatedScheduler(clock)
+        service = MonitoredService('service #1')
+        escalation_policy = EscalationPolicy(
+          {
+            service.service_name: EscalationPolicyMonitoredService(
+              service,
+              [
+                EscalationPolicyLevel([SMS('900100200')], timeout=60),
+                EscalationPolicyLevel([Email('user@example.com')]),
+                EscalationPolicyLevel([SMS('900300400')], timeout=300)
+              ],
+              timeout=120
+            )
+          }
+        )
+        pager_service = PagerService(escalation_policy, clock=clock, scheduler=scheduler)
+        alert = Alert(service, clock)
+        pager_service.receive_alert(alert)
+        self.assertEqual(alert.schedule, (60.0, 180.0, 480.0))
+        scheduler.advance(1_000)
+        self.assertEqual(
+          [(record.timestamp, record.level) for record in pager_service.alerts_log],
+          [(0.0, 0), (60.0, 1), (180.0, 2)]
+        )
+        # the last level timing out at 480s exhausts the policy
+        self.assertEqual(pager_service.metrics.snapshot()['pager_escalations_exhausted_total'], 1)
+
+    def testLateTimerCatchesUpLevelByLevel(self):
+        clock = VirtualClock()
+        scheduler = SimulatedScheduler(clock)
+        service = MonitoredService('service #1')
+        escalation_policy = EscalationPolicy(
+          {
+            service.service_name: EscalationPolicyMonitoredService(
+              service,
+              [EscalationPolicyLevel([SMS(str(level))], timeout) for level, timeout in enumerate((60, 120, 300, 3_600))]
+            )
+          }
+        )
+        pager_service = PagerService(escalation_policy, clock=clock, scheduler=scheduler)
+        alert = Alert(service, clock)
+        pager_service.receive_alert(alert)
+        # the process was paused: the clock moved on while no timer could fire
+        clock.advance(500)
+        scheduler.run_until(clock.monotonic())
+        self.assertEqual(alert.current_level, 3)
+        self.assertEqual([record.level for record in pager_service.alerts_log], [0, 1, 2, 3])
+        # the next deadline stays on the original schedule, not 3600s after the catch-up
+        self.assertEqual(scheduler.next_deadline(), 60 + 120 + 300 + 3_600)
+
+    def testPolicyWithMoreLevelsSwappedIn(self):
+        clock = VirtualClock()
+        scheduler = SimulatedScheduler(clock)
+        service = MonitoredService('service #1')
+
+        def policy(timeouts):
+            return EscalationPolicy({
+                service.service_name: EscalationPolicyMonitoredService(
+                  service, [EscalationPolicyLevel([SMS(str(level))], timeout) for level, timeout in enumerate(timeouts)]
+                )
+            })
+
+        pager_service = PagerService(policy((60, 60)), clock=clock, scheduler=scheduler)
+        alert = Alert(service, clock)
+        pager_service.receive_alert(alert)
+        pager_service.update_escalation_policy(policy((60, 60, 300)))
+        scheduler.advance(120)
+        # level 2 is past the schedule the alert opened with, it times out after the new policy's 300s
+        self.assertEqual(alert.current_level, 2)
+        self.assertEqual(scheduler.next_deadline(), 420)
+        scheduler.advance(300)
+        self.assertEqual(pager_service.metrics.snapshot()['pager_escalations_exhausted_total'], 1)
+        self.assertEqual([record.level for record in pager_service.alerts_log], [0, 1, 2])
+
+class TestEscalationSimulator(unittest.TestCase):
+    def testReplay(self):
+        services = [MonitoredService(f'service #{i}') for i in range(3)]
+        simulator = EscalationSimulator(two_level_policy(*services), ack_delay=600)
+        report = simulator.run([
+          TrafficEvent(0, 'alert', 'service #0'),
+          TrafficEvent(60, 'alert', 'service #0'),
+          TrafficEvent(120, 'ack', 'service #0'),
+          TrafficEvent(200, 'alert', 'service #1'),
+          TrafficEvent(1_000, 'ack', 'service #1'),
+          TrafficEvent(3_000, 'alert', 'service #2'),
+          TrafficEvent(3_100, 'healthy', 'service #2'),
+        ])
+        self.assertEqual(report.alerts, 3)
+        self.assertEqual(report.duplicates, 1)
+        self.assertEqual(report.acknowledged, 2)
+        self.assertEqual(report.resolved, 1)
+        self.assertEqual(report.time_to_ack, [120, 800])
+        self.assertEqual(report.pages_per_level, {0: 3, 1: 1})
+        self.assertEqual(report.pages_per_target, {'sms:900100200': 3, 'email:user@example.com': 1})
+        # the caller's services are left alone
+        self.assertTrue(all(service.healthy for service in services))
+        self.assertIn('Time to acknowledge', str(report))
+
+    def testIsDeterministic(self):
+        service = MonitoredService('service #1')
+        traffic = [TrafficEvent(i * 700, 'alert' if i % 3 else 'healthy', 'service #1') for i in range(100)]
+        first = EscalationSimulator(two_level_policy(service), ack_delay=600).run(traffic)
+        second = EscalationSimulator(two_level_policy(service), ack_delay=600).run(traffic)
+        self.assertEqual(first.pages_per_target, second.pages_per_target)
+        self.assertEqual(first.pages_per_level, second.pages_per_level)
+
+    def testLoadTraffic(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'traffic.jsonl')
+            with open(path, 'w') as traffic:
+                traffic.write(json.dumps({'t': 1.5, 'event': 'alert', 'service': 'service #1'}) + '\n')
+            self.assertEqual(list(load_traffic(path)), [TrafficEvent(1.5, 'alert', 'service #1')])
+
+
+if __name__ == '__main__':
+    unittest.main()
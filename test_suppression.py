@@ -0,0 +1,97 @@
+import unittest
+
+from models import SMS, Alert, Email, EscalationPolicy, EscalationPolicyLevel, EscalationPolicyMonitoredService, MonitoredService, PagerService
+from suppression import AlertSuppressor
+
+
+class FakeTime:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestAlertSuppression(unittest.TestCase):
+    def setUp(self):
+        self.time = FakeTime()
+        self.suppressor = AlertSuppressor(dedup_window=60, flap_window=600, flap_threshold=2, time_fn=self.time)
+        self.service = MonitoredService('service #1')
+        self.pager_service = PagerService(EscalationPolicy(
+          {
+            self.service.service_name: EscalationPolicyMonitoredService(
+              self.service,
+              [
+                EscalationPolicyLevel([SMS('900100200')]),
+                EscalationPolicyLevel([Email('user@example.com')])
+              ]
+            )
+          }
+        ), suppressor=self.suppressor)
+
+    def tearDown(self):
+        for alert in list(self.pager_service.timer_manager.timers):
+            self.pager_service.timer_manager.cancel_timer(alert)
+
+    def testRepeatsOfOpenAlertAreCountedWithoutPaging(self):
+        alert = Alert(self.service)
+        self.pager_service.receive_alert(alert, 60)
+        for _ in range(1000):
+            self.pager_service.receive_alert(Alert(self.service), 60)
+        self.assertEqual(alert.occurrences, 1001)
+        self.assertGreaterEqual(alert.last_seen, alert.sent_at)
+        self.assertEqual(self.suppressor.duplicates, 1000)
+        self.assertEqual(len(self.pager_service.alerts_log), 1)
+
+    def testDedupWindowExpires(self):
+        alert = Alert(self.service)
+        self.pager_service.receive_alert(alert, 60)
+        self.pager_service.handle_acknowledgement(alert)
+        self.time.now = 61
+        new_alert = Alert(self.service)
+        self.assertIs(self.pager_service.receive_alert(new_alert, 60), new_alert)
+        self.assertIs(self.pager_service.alerts[self.service], new_alert)
+        self.assertEqual(len(self.pager_service.alerts_log), 2)
+
+    def testHealthyServiceOpensNewAlert(self):
+        alert = Alert(self.service)
+        self.pager_service.receive_alert(alert, 60)
+        self.pager_service.handle_acknowledgement(alert)
+        self.service.set_healthy()
+        new_alert = Alert(self.service)
+        self.assertIs(self.pager_service.receive_alert(new_alert, 60), new_alert)
+
+    def testFlappingServiceHoldsBackFirstLevel(self):
+        for _ in range(2):
+            alert = Alert(self.service)
+            self.pager_service.receive_alert(alert, 60)
+            self.pager_service.handle_acknowledgement(alert)
+            self.service.set_healthy()
+            self.assertFalse(alert.held)
+        flapping_alert = Alert(self.service)
+        self.pager_service.receive_alert(flapping_alert, 60)
+        self.assertTrue(flapping_alert.held)
+        self.assertTrue(self.suppressor.is_flapping(self.service))
+        self.assertEqual(
+          [record.status_name for record in self.pager_service.alerts_log],
+          ['sent', 'sent', 'suppressed']
+        )
+        # still unacknowledged after the delay: the escalation pages the next level as usual
+        self.pager_service.handle_acknowledgement_timeout(flapping_alert)
+        self.assertEqual(list(self.pager_service.alerts_log)[-1].status_name, 'sent')
+        self.assertEqual(list(self.pager_service.alerts_log)[-1].level, 1)
+
+    def testFlappingEndsAfterWindow(self):
+        for _ in range(2):
+            alert = Alert(self.service)
+            self.pager_service.receive_alert(alert, 60)
+            self.pager_service.handle_acknowledgement(alert)
+            self.service.set_healthy()
+        self.time.now = 601
+        alert = Alert(self.service)
+        self.pager_service.receive_alert(alert, 60)
+        self.assertFalse(alert.held)
+
+
+if __name__ == '__main__':
+    unittest.main()
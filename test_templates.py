@@ -0,0 +1,74 @@
+import unittest
+
+from models import Alert, Email, EscalationPolicy, EscalationPolicyLevel, EscalationPolicyMonitoredService, MonitoredService, PagerService, Target
+from templates import MessageRenderer
+
+
+class RecordingTarget(Target):
+    transport = 'sms'
+
+    def __init__(self):
+        self.messages = []
+
+    def notify(self, message: str):
+        self.messages.append(message)
+
+
+class TestMessageRenderer(unittest.TestCase):
+    def testPerChannelTemplates(self):
+        service = MonitoredService('service #1')
+        renderer = MessageRenderer({'sms': '{service} L{level}'})
+        self.assertEqual(renderer.render(service.service_id, 1, 'sms'), 'service #1 L1')
+        self.assertTrue(renderer.render(service.service_id, 1, 'email').startswith('service #1 is unhealthy (Level 1)\n'))
+        # channels without a template of their own use the default one
+        self.assertEqual(renderer.render(service.service_id, 1, 'pager'), 'service #1 is unhealthy (Level 1)')
+
+    def testRendersOnce(self):
+        service = MonitoredService('service #1')
+        renderer = MessageRenderer()
+        first = renderer.render(service.service_id, 0, 'sms')
+        self.assertIs(renderer.render(service.service_id, 0, 'sms'), first)
+        self.assertIs(renderer.encoded(service.service_id, 0, 'sms'), renderer.encoded(service.service_id, 0, 'sms'))
+        self.assertEqual(renderer.encoded(service.service_id, 0, 'sms'), first.encode('utf-8'))
+        self.assertEqual((renderer.hits, renderer.misses), (4, 1))
+
+    def testNewTemplateVersionIsRendered(self):
+        service = MonitoredService('service #1')
+        renderer = MessageRenderer()
+        renderer.render(service.service_id, 0, 'sms')
+        renderer.set_template('sms', 'DOWN {service}')
+        self.assertEqual(renderer.render(service.service_id, 0, 'sms'), 'DOWN service #1')
+        with self.assertRaises(ValueError):
+            renderer.set_template('sms', '{service} is {state}')
+
+    def testLeastRecentlyUsedIsEvicted(self):
+        service = MonitoredService('service #1')
+        renderer = MessageRenderer(maxsize=2)
+        renderer.render(service.service_id, 0)
+        renderer.render(service.service_id, 1)
+        renderer.render(service.service_id, 0)
+        renderer.render(service.service_id, 2)
+        self.assertEqual(len(renderer), 2)
+        renderer.render(service.service_id, 0)
+        self.assertEqual(renderer.misses, 3)
+        renderer.render(service.service_id, 1)
+        self.assertEqual(renderer.misses, 4)
+
+
+class TestFanOut(unittest.TestCase):
+    def testTargetsOfALevelShareOneMessage(self):
+        service = MonitoredService('service #1')
+        targets = [RecordingTarget() for _ in range(10)]
+        pager_service = PagerService(EscalationPolicy(
+          {service.service_name: EscalationPolicyMonitoredService(service, [EscalationPolicyLevel(targets + [Email('user@example.com')])])}
+        ))
+        pager_service.receive_alert(Alert(service), 60)
+        pager_service.timer_manager.scheduler.close()
+        messages = [target.messages[0] for target in targets]
+        self.assertEqual(messages[0], 'service #1 is unhealthy (Level 0)')
+        self.assertTrue(all(message is messages[0] for message in messages))
+        self.assertEqual(pager_service.metrics.snapshot()['pager_message_cache_misses_total'], 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
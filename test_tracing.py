@@ -0,0 +1,136 @@
+import io
+import json
+import os
+import tempfile
+import unittest
+
+from clock import VirtualClock
+from models import SMS, Alert, Email, EscalationPolicy, EscalationPolicyLevel, EscalationPolicyMonitoredService, MonitoredService, PagerService
+from scheduler import SimulatedScheduler
+from tracing import NOTIFIED, RECEIVED, Tracer, load_trace
+
+
+def traced_pager(service, clock, scheduler, tracer=None):
+    escalation_policy = EscalationPolicy(
+      {
+        service.service_name: EscalationPolicyMonitoredService(
+          service,
+          [
+            EscalationPolicyLevel([SMS('900100200'), Email('user@example.com')]),
+            EscalationPolicyLevel([SMS('900300400')])
+          ],
+          timeout=60
+        )
+      }
+    )
+    return PagerService(escalation_policy, clock=clock, scheduler=scheduler, tracer=tracer)
+
+
+class TestTracer(unittest.TestCase):
+    def testTimeline(self):
+        clock = VirtualClock()
+        scheduler = SimulatedScheduler(clock)
+        service = MonitoredService('service #1')
+        pager_service = traced_pager(service, clock, scheduler)
+        alert = Alert(service, clock)
+        pager_service.receive_alert(alert)
+        pager_service.receive_alert(Alert(service, clock))
+        scheduler.advance(60)
+        pager_service.handle_acknowledgement(alert)
+
+        timeline = pager_service.tracer.timeline(alert.alert_id)
+        self.assertEqual(
+          [(span.kind_name, span.timestamp, span.level) for span in timeline],
+          [
+            ('received', 0.0, 0), ('notified', 0.0, 0), ('notified', 0.0, 0), ('duplicate', 0.0, 0),
+            ('timeout', 60.0, 0), ('escalated', 60.0, 1), ('notified', 60.0, 1), ('acknowledged', 60.0, 1)
+          ]
+        )
+        # notifications hang off the span that paged them
+        received, timeout, escalated = timeline[0].span_id, timeline[4].span_id, timeline[5].span_id
+        self.assertEqual([span.parent for span in timeline], [-1, received, received, received, received, timeout, escalated, escalated])
+        self.assertEqual(timeline[1].as_dict()['status'], 'sent')
+        self.assertEqual(pager_service.metrics.snapshot()['pager_trace_spans_total'], 8)
+
+    def testResolvedAndExhausted(self):
+        clock = VirtualClock()
+        scheduler = SimulatedScheduler(clock)
+        service = MonitoredService('service #1')
+        pager_service = traced_pager(service, clock, scheduler)
+        exhausted = Alert(service, clock)
+        pager_service.receive_alert(exhausted)
+        scheduler.advance(200)
+        self.assertEqual(pager_service.tracer.timeline(exhausted.alert_id)[-1].kind_name, 'exhausted')
+        pager_service.handle_healthy(service)
+        pager_service.handle_healthy(service)
+        self.assertEqual(pager_service.tracer.timeline(exhausted.alert_id)[-1].kind_name, 'resolved')
+
+    def testSampling(self):
+        never, always = Tracer(capacity=1, sample_rate=0.0), Tracer(capacity=1, sample_rate=1.0)
+        self.assertFalse(any(never.sampled(alert_id) for alert_id in range(1, 1000)))
+        self.assertTrue(all(always.sampled(alert_id) for alert_id in range(1, 1000)))
+        tracer = Tracer(sample_rate=0.25)
+        sampled = [alert_id for alert_id in range(1, 10_001) if tracer.sampled(alert_id)]
+        self.assertAlmostEqual(len(sampled) / 10_000, 0.25, delta=0.02)
+        skipped = next(alert_id for alert_id in range(1, 10_001) if not tracer.sampled(alert_id))
+        self.assertEqual(tracer.record(skipped, RECEIVED, 0, 0), -1)
+        self.assertEqual(len(tracer), 0)
+
+    def testUnsampledAlertsAreNotTraced(self):
+        clock = VirtualClock()
+        scheduler = SimulatedScheduler(clock)
+        service = MonitoredService('service #1')
+        pager_service = traced_pager(service, clock, scheduler, Tracer(sample_rate=0.0))
+        alert = Alert(service, clock)
+        pager_service.receive_alert(alert)
+        self.assertEqual(pager_service.tracer.timeline(alert.alert_id), [])
+        self.assertEqual(len(pager_service.alerts_log), 2)
+
+    def testRingEvictionPrunesIndex(self):
+        tracer = Tracer(capacity=4, time_fn=lambda: 0.0)
+        tracer.record(1, RECEIVED, 0, 0)
+        tracer.record_notifications(1, [(0, 0, 0, 0), (0, 0, 1, 0)])
+        tracer.record(2, RECEIVED, 0, 0)
+        tracer.record_notifications(2, [(0, 0, 0, 0)])
+        self.assertEqual([span.span_id for span in tracer.timeline(1)], [1, 2])
+        tracer.record_notifications(2, [(0, 0, 1, 0), (0, 0, 2, 0)])
+        self.assertEqual(tracer.timeline(1), [])
+        self.assertNotIn(1, tracer._index)
+        self.assertEqual([span.span_id for span in tracer.spans()], [3, 4, 5, 6])
+        self.assertEqual([span.kind for span in tracer.timeline(2)], [RECEIVED, NOTIFIED, NOTIFIED, NOTIFIED])
+        self.assertEqual((len(tracer), tracer.total), (4, 7))
+
+    def testInvalidTracer(self):
+        with self.assertRaises(ValueError):
+            Tracer(capacity=0)
+        with self.assertRaises(ValueError):
+            Tracer(sample_rate=1.5)
+
+    def testDrainAndExport(self):
+        service = MonitoredService('service #1')
+        tracer = Tracer(capacity=8, time_fn=lambda: 0.0)
+        tracer.record(1, RECEIVED, service.service_id, 0)
+        output = io.StringIO()
+        self.assertEqual(tracer.drain(output), 1)
+        self.assertEqual(tracer.drain(output), 0)
+        tracer.record(2, RECEIVED, service.service_id, 0)
+        self.assertEqual(tracer.drain(output), 1)
+        self.assertEqual([json.loads(line)['alert'] for line in output.getvalue().splitlines()], [1, 2])
+
+        fd, path = tempfile.mkstemp(suffix='.jsonl')
+        os.close(fd)
+        try:
+            with open(path, 'w', encoding='utf-8') as trace_file:
+                self.assertEqual(tracer.export_jsonl(trace_file, alert_id=2), 1)
+            self.assertEqual(list(load_trace(path)), [{'span': 1, 'alert': 2, 'kind': 'received', 'timestamp': 0.0, 'service': 'service #1', 'level': 0}])
+        finally:
+            os.remove(path)
+
+    def testAlertIdsAreUnique(self):
+        service = MonitoredService('service #1')
+        alerts = [Alert(service) for _ in range(100)]
+        self.assertEqual(len({alert.alert_id for alert in alerts}), 100)
+
+
+if __name__ == '__main__':
+    unittest.main()
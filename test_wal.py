@@ -0,0 +1,182 @@
+import os
+import tempfile
+import threading
+import time
+import unittest
+
+from models import SMS, Alert, Email, EscalationPolicy, EscalationPolicyLevel, EscalationPolicyMonitoredService, MonitoredService, PagerService
+from wal import WriteAheadLog, replay_alerts
+
+
+def two_level_policy(*services):
+    return EscalationPolicy(
+      {
+        service.service_name: EscalationPolicyMonitoredService(
+          service,
+          [
+            EscalationPolicyLevel([SMS('900100200')]),
+            EscalationPolicyLevel([Email('user@example.com')])
+          ]
+        )
+        for service in services
+      }
+    )
+
+
+class TestWriteAheadLog(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+
+    def testGroupCommitReplaysInOrder(self):
+        wal = WriteAheadLog(self.directory.name, commit_interval=60)
+        for i in range(10):
+            wal.append({'op': 'alert', 'service': f'service #{i}'})
+        # nothing is written until the batch is committed
+        self.assertEqual(list(wal.replay()), [])
+        wal.sync()
+        self.assertEqual([record['service'] for record in wal.replay()], [f'service #{i}' for i in range(10)])
+        wal.close()
+
+    def testBackgroundCommit(self):
+        wal = WriteAheadLog(self.directory.name, commit_interval=0.01)
+        wal.append({'op': 'alert', 'service': 'service #1'})
+        time.sleep(0.1)
+        self.assertEqual(len(list(wal.replay())), 1)
+        wal.close()
+
+    def testIgnoresTornLastRecord(self):
+        wal = WriteAheadLog(self.directory.name)
+        wal.append({'op': 'alert', 'service': 'service #1'})
+        wal.close()
+        with open(wal.log_path, 'a') as log:
+            log.write('{"op":"ack","serv')
+        with self.assertLogs('wal', level='WARNING'):
+            self.assertEqual([record['op'] for record in WriteAheadLog(self.directory.name).replay()], ['alert'])
+
+    def testCompactReplacesLogWithSnapshot(self):
+        wal = WriteAheadLog(self.directory.name, snapshot_every=3)
+        for op in ('alert', 'ack', 'alert'):
+            wal.append({'op': op, 'service': 'service #1'})
+        self.assertTrue(wal.snapshot_due)
+        wal.compact(lambda: [{'op': 'alert', 'service': 'service #1'}])
+        self.assertFalse(wal.snapshot_due)
+        self.assertEqual(os.path.getsize(wal.log_path), 0)
+        wal.append({'op': 'ack', 'service': 'service #1'})
+        wal.sync()
+        self.assertEqual([record['op'] for record in wal.replay()], ['alert', 'ack'])
+        wal.close()
+
+    def testCompactLaterRunsOnTheFlusher(self):
+        wal = WriteAheadLog(self.directory.name, commit_interval=60)
+        wal.append({'op': 'alert', 'service': 'service #1'})
+        wal.compact_later(lambda: [{'op': 'alert', 'service': 'service #2'}])
+        deadline = time.monotonic() + 5
+        while wal.records_since_snapshot and time.monotonic() < deadline:
+            time.sleep(0.01)
+        self.assertEqual([record['service'] for record in wal.replay()], ['service #2'])
+        wal.close()
+
+    def testConcurrentTransitionsWithSnapshots(self):
+        # every transition makes a snapshot due while its thread holds a stripe lock
+        services = [MonitoredService(f'service #{i}') for i in range(8)]
+        wal = WriteAheadLog(self.directory.name, snapshot_every=1)
+        pager_service = PagerService(two_level_policy(*services), wal=wal)
+        self.addCleanup(pager_service.timer_manager.scheduler.close)
+
+        def churn(service):
+            for _ in range(50):
+                pager_service.handle_acknowledgement(pager_service.receive_alert(Alert(service), 60))
+                pager_service.resolve_healthy(service)
+                pager_service.receive_alert(Alert(service), 60)
+                pager_service.resolve_healthy(service)
+
+        threads = [threading.Thread(target=churn, args=(service,), daemon=True) for service in services]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join(30)
+        self.assertFalse(any(thread.is_alive() for thread in threads))
+        wal.close()
+        self.assertEqual(replay_alerts(wal.replay()), {})
+
+    def testReplayAlerts(self):
+        records = [
+          {'op': 'alert', 'service': 'a', 'level': 0},
+          {'op': 'alert', 'service': 'b', 'level': 0},
+          {'op': 'escalate', 'service': 'a', 'level': 1},
+          {'op': 'ack', 'service': 'b'},
+        ]
+        self.assertEqual(replay_alerts(records), {'a': {'op': 'escalate', 'service': 'a', 'level': 1}})
+
+
+class TestPagerServiceRecovery(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+
+    def testRecoversOpenAlertsWithRemainingDeadline(self):
+        open_service, acked_service, healthy_service = MonitoredService('open'), MonitoredService('acked'), MonitoredService('healthy')
+        wal = WriteAheadLog(self.directory.name)
+        pager_service = PagerService(two_level_policy(open_service, acked_service, healthy_service), wal=wal)
+        open_alert, acked_alert, healthy_alert = Alert(open_service), Alert(acked_service), Alert(healthy_service)
+        for alert in (open_alert, acked_alert, healthy_alert):
+            pager_service.receive_alert(alert, 60)
+        pager_service.handle_acknowledgement_timeout(open_alert)
+        pager_service.handle_acknowledgement(acked_alert)
+        healthy_service.set_healthy()
+        with self.assertRaises(Exception):
+            pager_service.handle_acknowledgement_timeout(healthy_alert)
+        deadline = pager_service.timer_manager.deadline(open_alert)
+        wal.close()
+
+        # a fresh process: new service objects, nothing in memory
+        services = MonitoredService('open'), MonitoredService('acked'), MonitoredService('healthy')
+        recovered = PagerService(two_level_policy(*services), wal=WriteAheadLog(self.directory.name))
+        recovered.recover()
+        self.assertEqual(list(recovered.alerts), [services[0]])
+        alert = recovered.alerts[services[0]]
+        self.assertEqual(alert.current_level, 1)
+        self.assertEqual(alert.sent_at, open_alert.sent_at)
+        # alert ids survive the restart, and new alerts don't reuse them
+        self.assertEqual(alert.alert_id, open_alert.alert_id)
+        self.assertIs(recovered.alerts.by_id(open_alert.alert_id), alert)
+        self.assertGreater(Alert(services[1]).alert_id, healthy_alert.alert_id)
+        self.assertFalse(services[0].healthy)
+        self.assertAlmostEqual(recovered.timer_manager.deadline(alert), deadline, delta=1)
+        # recovery doesn't page anyone again
+        self.assertEqual(len(recovered.alerts_log), 0)
+        recovered.wal.close()
+
+    def testRecoveryKeepsTheAlertsSchedule(self):
+        service = MonitoredService('service #1')
+        wal = WriteAheadLog(self.directory.name)
+        pager_service = PagerService(two_level_policy(service), wal=wal)
+        self.addCleanup(pager_service.timer_manager.scheduler.close)
+        alert = Alert(service)
+        # opened with an explicit 60s delay, the policy's default is 900s
+        pager_service.receive_alert(alert, 60)
+        wal.close()
+
+        recovered_service = MonitoredService('service #1')
+        recovered = PagerService(two_level_policy(recovered_service), wal=WriteAheadLog(self.directory.name))
+        self.addCleanup(recovered.timer_manager.scheduler.close)
+        recovered.recover()
+        self.assertEqual(recovered.alerts[recovered_service].schedule, (60.0, 120.0))
+        recovered.wal.close()
+
+    def testExpiredDeadlineFiresOnRecovery(self):
+        service = MonitoredService('service #1')
+        wal = WriteAheadLog(self.directory.name)
+        wal.append({'op': 'alert', 'service': service.service_name, 'level': 0, 'sent_at': time.time() - 120, 'deadline': time.time() - 60})
+        wal.sync()
+        pager_service = PagerService(two_level_policy(service), wal=wal)
+        pager_service.recover()
+        time.sleep(0.1)
+        self.assertEqual(pager_service.alerts[service].current_level, 1)
+        self.assertEqual([(record.level, record.target) for record in pager_service.alerts_log], [(1, 'email:user@example.com')])
+        wal.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,202 @@
+import json
+import threading
+import time
+from array import array
+from typing import Callable, Dict, Iterable, Iterator, List, NamedTuple, Optional, TextIO
+
+from notification_log import STATUSES
+from policy import service_name, target_name
+
+RECEIVED = 0 # the alert opened
+DUPLICATE = 1 # an alert folded into this one
+NOTIFIED = 2 # one target paged, with the notification status (notification_log.STATUSES)
+TIMEOUT = 3 # the acknowledgement timer of a level fired
+ESCALATED = 4 # moved to the next level
+EXHAUSTED = 5 # timed out past its last level
+ACKNOWLEDGED = 6
+RESOLVED = 7 # closed by a healthy event
+KINDS = ('received', 'duplicate', 'notified', 'timeout', 'escalated', 'exhausted', 'acknowledged', 'resolved')
+# kinds that cause the spans after them: a notification's parent is the span that paged it
+CAUSES = frozenset((RECEIVED, TIMEOUT, ESCALATED, EXHAUSTED, ACKNOWLEDGED, RESOLVED))
+
+
+class Span(NamedTuple):
+    span_id: int # position in the trace, unique for the tracer's lifetime
+    alert_id: int
+    kind: int
+    timestamp: float
+    service_id: int
+    level: int
+    target_id: int # -1 unless NOTIFIED
+    status: int # -1 unless NOTIFIED
+    parent: int # span_id of the span that caused this one, -1 for none
+
+    @property
+    def kind_name(self) -> str:
+        return KINDS[self.kind]
+
+    def as_dict(self) -> dict:
+        span = {
+            'span': self.span_id,
+            'alert': self.alert_id,
+            'kind': self.kind_name,
+            'timestamp': self.timestamp,
+            'service': service_name(self.service_id),
+            'level': self.level,
+        }
+        if self.target_id >= 0:
+            span['target'] = target_name(self.target_id)
+            span['status'] = STATUSES[self.status]
+        if self.parent >= 0:
+            span['parent'] = self.parent
+        return span
+
+
+class Tracer:
+    """
+    Alert-scoped trace of the escalation lifecycle, kept in a fixed-capacity ring buffer.
+
+    Fields live in preallocated arrays as in notification_log.NotificationLog, and an index
+    maps every alert id to the positions of its spans, pruned as the ring overwrites them, so
+    timeline(alert_id) reads only that alert's spans. Sampling is per alert, decided from its
+    id, so an incident is traced whole or not at all.
+    """
+
+    def __init__(self, capacity: int = 100_000, sample_rate: float = 1.0, time_fn: Callable[[], float] = time.time):
+        if capacity <= 0:
+            raise ValueError('Trace capacity must be positive')
+        if not 0.0 <= sample_rate <= 1.0:
+            raise ValueError('Trace sample rate must be between 0 and 1')
+        self.capacity = capacity
+        self.sample_rate = sample_rate
+        self._threshold = int(sample_rate * (1 << 32))
+        self._time = time_fn
+        self.total = 0 # spans ever recorded, including the ones overwritten
+        self._alert_ids = array('q', bytes(8 * capacity))
+        self._kinds = array('b', bytes(capacity))
+        self._timestamps = array('d', bytes(8 * capacity))
+        self._service_ids = array('i', bytes(4 * capacity))
+        self._levels = array('i', bytes(4 * capacity))
+        self._target_ids = array('i', bytes(4 * capacity))
+        self._statuses = array('b', bytes(capacity))
+        self._parents = array('q', bytes(8 * capacity))
+        # { alert_id: [span ids, span id of the latest cause] }; a list is a tenth of a deque's
+        # size and an alert has few spans, so dropping its oldest one is cheap enough
+        self._index: Dict[int, list] = {}
+        self._drained = 0
+        self._lock = threading.Lock()
+
+    def sampled(self, alert_id: int) -> bool:
+        # multiplicative hash: consecutive ids spread evenly over the sampled range
+        return (alert_id * 2654435761) & 0xFFFFFFFF < self._threshold
+
+    def record(self, alert_id: int, kind: int, service_id: int, level: int, target_id: int = -1, status: int = -1) -> int:
+        """
+        Records one span of a sampled alert and returns its span id, -1 when the alert is not sampled.
+        """
+        if not self.sampled(alert_id):
+            return -1
+        timestamp = self._time()
+        with self._lock:
+            return self._append(alert_id, kind, timestamp, service_id, level, target_id, status)
+
+    def record_notifications(self, alert_id: int, records: Iterable[tuple]):
+        """
+        Records a NOTIFIED span per (service_id, level, target_id, status) notification record,
+        under a single lock acquisition.
+        """
+        if not self.sampled(alert_id):
+            return
+        timestamp = self._time()
+        with self._lock:
+            for service_id, level, target_id, status in records:
+                self._append(alert_id, NOTIFIED, timestamp, service_id, level, target_id, status)
+
+    def timeline(self, alert_id: int) -> List[Span]:
+        # the retained spans of one alert, oldest first
+        with self._lock:
+            entry = self._index.get(alert_id)
+            return [self._span(span_id) for span_id in entry[0]] if entry is not None else []
+
+    def spans(self) -> Iterator[Span]:
+        position = max(0, self.total - self.capacity)
+        while position < self.total:
+            with self._lock:
+                if position < self.total - self.capacity:
+                    position = self.total - self.capacity
+                span = self._span(position)
+            position += 1
+            yield span
+
+    def export_jsonl(self, output: TextIO, alert_id: Optional[int] = None) -> int:
+        count = 0
+        for span in self.spans() if alert_id is None else self.timeline(alert_id):
+            output.write(json.dumps(span.as_dict()))
+            output.write('\n')
+            count += 1
+        return count
+
+    def drain(self, output: TextIO) -> int:
+        """
+        Appends the spans recorded since the previous drain to output, e.g. a trace file
+        written periodically; spans overwritten in between are lost and not counted.
+        """
+        with self._lock:
+            start, end = max(self._drained, self.total - self.capacity), self.total
+            spans = [self._span(span_id) for span_id in range(start, end)]
+            self._drained = end
+        for span in spans:
+            output.write(json.dumps(span.as_dict()))
+            output.write('\n')
+        return len(spans)
+
+    def __len__(self) -> int:
+        return min(self.total, self.capacity)
+
+    def _append(self, alert_id: int, kind: int, timestamp: float, service_id: int, level: int, target_id: int, status: int) -> int:
+        # caller holds the lock
+        span_id = self.total
+        index = span_id % self.capacity
+        if span_id >= self.capacity:
+            evicted = self._index[self._alert_ids[index]]
+            del evicted[0][0]
+            if not evicted[0]:
+                del self._index[self._alert_ids[index]]
+        entry = self._index.get(alert_id)
+        if entry is None:
+            entry = self._index[alert_id] = [[], -1]
+        self._alert_ids[index] = alert_id
+        self._kinds[index] = kind
+        self._timestamps[index] = timestamp
+        self._service_ids[index] = service_id
+        self._levels[index] = level
+        self._target_ids[index] = target_id
+        self._statuses[index] = status
+        self._parents[index] = entry[1]
+        entry[0].append(span_id)
+        if kind in CAUSES:
+            entry[1] = span_id
+        self.total += 1
+        return span_id
+
+    def _span(self, span_id: int) -> Span:
+        index = span_id % self.capacity
+        return Span(
+            span_id,
+            self._alert_ids[index],
+            self._kinds[index],
+            self._timestamps[index],
+            self._service_ids[index],
+            self._levels[index],
+            self._target_ids[index],
+            self._statuses[index],
+            self._parents[index],
+        )
+
+
+def load_trace(path: str) -> Iterator[dict]:
+    # spans of a trace file written by export_jsonl or drain, as dicts
+    with open(path, encoding='utf-8') as source:
+        for line in source:
+            if line.strip():
+                yield json.loads(line)
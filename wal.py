@@ -0,0 +1,144 @@
+import json
+import logging
+import os
+import threading
+from typing import Callable, Dict, Iterable, Iterator
+
+logger = logging.getLogger(__name__)
+
+
+class WriteAheadLog:
+    """
+    Append-only log of pager events with group commit and periodic snapshots.
+
+    append() only buffers the record; a background thread writes and fsyncs everything
+    buffered once per commit_interval (or as soon as commit_batch records are waiting),
+    so one fsync covers a whole batch of events. compact() replaces the log with a snapshot
+    of the current state. Records are JSON lines; a torn last line left by a crash is ignored.
+    Replaying must be idempotent: a record can be both in a snapshot and in the log after it.
+    """
+
+    LOG_FILE = 'pager.wal'
+    SNAPSHOT_FILE = 'pager.snapshot'
+
+    def __init__(self, directory: str, commit_interval: float = 0.01, commit_batch: int = 1024, snapshot_every: int = 100_000):
+        os.makedirs(directory, exist_ok=True)
+        self.log_path = os.path.join(directory, self.LOG_FILE)
+        self.snapshot_path = os.path.join(directory, self.SNAPSHOT_FILE)
+        self.commit_interval = commit_interval
+        self.commit_batch = commit_batch
+        self.snapshot_every = snapshot_every
+        self.records_since_snapshot = 0
+        self._buffer = []
+        self._lock = threading.Lock() # guards the buffer
+        self._write_lock = threading.Lock() # serializes writes, keeps batches in order
+        self._file = open(self.log_path, 'a', encoding='utf-8')
+        self._wakeup = threading.Event()
+        self._pending_state = None # set by compact_later, taken by the flusher thread
+        self._closed = False
+        self._flusher = threading.Thread(target=self._run, name='WriteAheadLog', daemon=True)
+        self._flusher.start()
+
+    @property
+    def snapshot_due(self) -> bool:
+        return self.records_since_snapshot >= self.snapshot_every
+
+    def append(self, record: dict):
+        line = json.dumps(record, separators=(',', ':'))
+        with self._lock:
+            self._buffer.append(line)
+            self.records_since_snapshot += 1
+            if len(self._buffer) >= self.commit_batch:
+                self._wakeup.set()
+
+    def sync(self):
+        with self._write_lock:
+            self._write_buffer()
+
+    def compact(self, state: Callable[[], Iterable[dict]]):
+        """
+        Writes state() as the new snapshot and truncates the log. state() is called with
+        writes blocked, so every record appended after it ran survives the truncation.
+        """
+        with self._write_lock:
+            self._write_buffer()
+            temporary_path = f'{self.snapshot_path}.tmp'
+            with open(temporary_path, 'w', encoding='utf-8') as snapshot:
+                for record in state():
+                    snapshot.write(json.dumps(record, separators=(',', ':')))
+                    snapshot.write('\n')
+                snapshot.flush()
+                os.fsync(snapshot.fileno())
+            os.replace(temporary_path, self.snapshot_path)
+            self._file.close()
+            self._file = open(self.log_path, 'w', encoding='utf-8')
+            os.fsync(self._file.fileno())
+            self.records_since_snapshot = 0
+
+    def compact_later(self, state: Callable[[], Iterable[dict]]):
+        """
+        compact(state) run by the flusher thread, for callers holding locks that state()
+        takes: compacting in place would wait on the write lock while another thread
+        holding it waits on theirs.
+        """
+        self._pending_state = state
+        self._wakeup.set()
+
+    def replay(self) -> Iterator[dict]:
+        for path in (self.snapshot_path, self.log_path):
+            yield from self._read(path)
+
+    def close(self):
+        self._closed = True
+        self._wakeup.set()
+        self._flusher.join()
+        self.sync()
+        self._file.close()
+
+    def _read(self, path: str) -> Iterator[dict]:
+        if not os.path.exists(path):
+            return
+        with open(path, encoding='utf-8') as source:
+            for line in source:
+                if not line.endswith('\n'):
+                    logger.warning('Ignoring torn record at the end of %s', path)
+                    return
+                yield json.loads(line)
+
+    def _write_buffer(self):
+        with self._lock:
+            lines, self._buffer = self._buffer, []
+        if lines:
+            self._file.write('\n'.join(lines))
+            self._file.write('\n')
+            self._file.flush()
+            os.fsync(self._file.fileno())
+
+    def _run(self):
+        while not self._closed:
+            self._wakeup.wait(self.commit_interval)
+            self._wakeup.clear()
+            try:
+                self.sync()
+                state, self._pending_state = self._pending_state, None
+                if state is not None:
+                    self.compact(state)
+            except Exception:
+                logger.exception('Write-ahead log commit failed')
+
+
+def replay_alerts(records: Iterable[dict]) -> Dict[str, dict]:
+    """
+    Folds alert/escalate/ack/healthy records into the open alerts they leave behind,
+    keyed by service name.
+    """
+    alerts = {}
+    for record in records:
+        op = record['op']
+        if op == 'alert' or op == 'escalate':
+            alerts[record['service']] = record
+        elif op == 'ack' or op == 'healthy':
+            alerts.pop(record['service'], None)
+        else:
+            raise ValueError(f'Unknown write-ahead log record: {op}')
+    return alerts